@@ -0,0 +1,84 @@
+"""
+Startup time benchmark of the package imports.
+
+Imports every module in a fresh interpreter with `python -X importtime` and
+prints its total import time with the slowest imports it pulled in, e.g.:
+
+    python benchmarks/importtime.py robot_cleaner.app robot_cleaner.wsgi
+
+With `--max-ms`, exits with an error when a module imports slower than that.
+Times are the median of `--runs` interpreters.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import typing
+
+
+DEFAULT_MODULES = (
+    "robot_cleaner.config",
+    "robot_cleaner.db",
+    "robot_cleaner.api.clean",
+    "robot_cleaner.app",
+    "robot_cleaner.wsgi",
+)
+
+
+def import_times(module: str) -> typing.Dict[str, int]:
+    """
+    Return the cumulative import time (us) of `module` and of every module
+    imported by it, in a fresh interpreter.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    slow = []
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.runs)]
+        total = statistics.median(run[module] for run in runs) / 1000
+        print(f"{module}: {total:.1f} ms")
+
+        slowest = sorted(
+            runs[-1].items(),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        # The module itself comes first.
+        del slowest[0]
+        for name, cumulative in slowest[: args.top]:
+            print(f"    {name}: {cumulative / 1000:.1f} ms")
+
+        if args.max_ms is not None and total > args.max_ms:
+            slow.append(module)
+
+    if slow:
+        print(f"Slower than {args.max_ms} ms: {', '.join(slow)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,5 +3,9 @@
 # Run Alembic migrations
 alembic upgrade head
 
-# Start the application
-poetry run uwsgi --ini uwsgi.ini
\ No newline at end of file
+# Start the application, SERVER=asgi serves it with uvicorn
+if [ "$SERVER" = "asgi" ]; then
+    poetry run uvicorn robot_cleaner.asgi:application --host 0.0.0.0 --port 5000 --workers 3
+else
+    poetry run uwsgi --ini uwsgi.ini
+fi
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""02 add executions engine
+
+Revision ID: 3b9d2c7e5a14
+Revises: 8f958f64a426
+Create Date: 2026-10-17 10:12:40.512043
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3b9d2c7e5a14"
+down_revision = "8f958f64a426"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "executions",
+        sa.Column("engine", sa.String(length=32), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("executions", "engine")
@@ -0,0 +1,51 @@
+"""04 add executions listing indexes
+
+Revision ID: 5e07b1d9c3a8
+Revises: c41e8a9f0d27
+Create Date: 2026-10-17 16:27:09.734120
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5e07b1d9c3a8"
+down_revision = "c41e8a9f0d27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently, outside of the migration transaction, so that
+    # large tables stay writable meanwhile. Narrow result and commands
+    # ranges are read from their index and sorted, exact values in
+    # (timestamp, id) order.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_executions_timestamp_id",
+            "executions",
+            ["timestamp", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_executions_result_timestamp_id",
+            "executions",
+            ["result", "timestamp", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_executions_commands_timestamp_id",
+            "executions",
+            ["commands", "timestamp", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_executions_commands_timestamp_id",
+        table_name="executions",
+    )
+    op.drop_index("ix_executions_result_timestamp_id", table_name="executions")
+    op.drop_index("ix_executions_timestamp_id", table_name="executions")
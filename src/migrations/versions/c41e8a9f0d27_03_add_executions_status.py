@@ -0,0 +1,60 @@
+"""03 add executions status
+
+Revision ID: c41e8a9f0d27
+Revises: 3b9d2c7e5a14
+Create Date: 2026-10-17 14:03:51.208716
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c41e8a9f0d27"
+down_revision = "3b9d2c7e5a14"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "executions",
+        sa.Column(
+            "status",
+            sa.String(length=16),
+            server_default="done",
+            nullable=False,
+        ),
+    )
+    op.add_column("executions", sa.Column("path", sa.JSON(), nullable=True))
+    op.add_column(
+        "executions",
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+    )
+    op.alter_column(
+        "executions",
+        "result",
+        existing_type=sa.Integer(),
+        nullable=True,
+    )
+    op.create_index(
+        "ix_executions_unfinished",
+        "executions",
+        ["id"],
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_executions_unfinished", table_name="executions")
+    op.execute("DELETE FROM executions WHERE result IS NULL")
+    op.alter_column(
+        "executions",
+        "result",
+        existing_type=sa.Integer(),
+        nullable=False,
+    )
+    op.drop_column("executions", "started_at")
+    op.drop_column("executions", "path")
+    op.drop_column("executions", "status")
@@ -1,6 +1,6 @@
 from robot_cleaner import config
-from robot_cleaner.app import app
+from robot_cleaner.app import get_app
 
 
 if __name__ == "__main__":
-    app.run(debug=config.IS_DEVELOPMENT, port=5000)
+    get_app().run(debug=config.IS_DEVELOPMENT, port=5000)
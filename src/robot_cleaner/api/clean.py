@@ -1,18 +1,55 @@
+import base64
+import binascii
+import collections.abc
+import hashlib
+import json
+import queue
+import threading
 import time
 import typing
 
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
 from enum import Enum
-from flask import jsonify, request
+from flask import (
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
 from sqlalchemy.orm import Session
-from sortedcontainers import SortedList
-from werkzeug.exceptions import BadRequest
+from werkzeug.exceptions import BadRequest, NotFound, ServiceUnavailable
 
+from robot_cleaner import cache, config, metrics, packing
 from robot_cleaner.db import db_session
+from robot_cleaner.engines import (
+    DECOMPOSED_ENGINES,
+    ENGINES,
+    PARALLEL_ENGINES,
+    get_engine,
+)
 from robot_cleaner.models.execution import (
+    DONE,
+    FAILED,
+    PENDING,
     Execution,
     add_execution,
+    add_executions,
+    claim_execution,
+    claimable_execution_ids,
+    delete_execution,
+    finish_execution,
+    get_execution,
+    id_allocated,
+    list_executions,
+    utcnow,
 )
 
+if typing.TYPE_CHECKING:
+    from robot_cleaner.jobs import JobQueue
+
 
 MOVE_MAP = {
     "north": (0, 1),
@@ -21,6 +58,60 @@ MOVE_MAP = {
     "west": (-1, 0),
 }
 
+# Content type of binary paths, see `robot_cleaner.packing`.
+PACKED_MIMETYPE = packing.CONTENT_TYPE
+
+# Direction of each direction code.
+DIRECTIONS = tuple(MOVE_MAP)
+
+# Direction -> (code, dx, dy), codes follow the order of `MOVE_MAP`.
+MOVES = {
+    direction: (code, dx, dy)
+    for code, (direction, (dx, dy)) in enumerate(MOVE_MAP.items())
+}
+
+# Positive and negative direction of each axis.
+AXES = (("east", "west"), ("north", "south"))
+
+# Sweep event types, in the order they are processed on the same x.
+H_START, VERTICAL, H_END = 0, 1, 2
+
+normalization_metrics = metrics.Counters(
+    "normalization", "commands", "normalized_commands"
+)
+
+_job_queue = None
+_lock = threading.Lock()
+
+
+def get_job_queue() -> "JobQueue":
+    """
+    Return the queue of asynchronous executions, computed by `run_job`,
+    creating it on first use so that importing this module (e.g. in pool
+    workers) starts nothing.
+    """
+    global _job_queue
+
+    from robot_cleaner import jobs
+
+    with _lock:
+        if _job_queue is None:
+            _job_queue = jobs.JobQueue(
+                "jobs",
+                handler=run_job,
+                maxsize=config.JOB_QUEUE_SIZE,
+                threads=config.JOB_THREADS,
+                recover=recover_jobs,
+            )
+        return _job_queue
+
+
+def __getattr__(name: str):
+    # `job_queue` is created on first access.
+    if name == "job_queue":
+        return get_job_queue()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class Direction(str, Enum):
     NORTH = "north"
@@ -48,35 +139,814 @@ class MovingPath(typing.TypedDict):
     commands: typing.List[Directions]
 
 
+class Bounds(typing.NamedTuple):
+    """
+    Bounding box of a path.
+    """
+
+    min_x: int
+    max_x: int
+    min_y: int
+    max_y: int
+
+    @property
+    def area(self) -> int:
+        return (self.max_x - self.min_x + 1) * (self.max_y - self.min_y + 1)
+
+
+class SegmentStore:
+    """
+    Segments of one family (horizontal or vertical) as parallel arrays.
+    `fixed` is the shared coordinate of a segment (y for horizontal, x for
+    vertical segments) and [low, high] the range it covers on the other axis.
+    """
+
+    __slots__ = ("fixed", "low", "high")
+
+    def __init__(self):
+        self.fixed = array("q")
+        self.low = array("q")
+        self.high = array("q")
+
+    def __len__(self):
+        return len(self.fixed)
+
+    def __iter__(self):
+        return zip(self.fixed, self.low, self.high)
+
+    def append(self, fixed: int, a: int, b: int):
+        self.fixed.append(fixed)
+        if a <= b:
+            self.low.append(a)
+            self.high.append(b)
+        else:
+            self.low.append(b)
+            self.high.append(a)
+
+
+class CommandList(collections.abc.Sequence):
+    """
+    Read-only list of commands stored as direction codes (see `MOVES`) and
+    steps, building the command objects on access.
+    """
+
+    __slots__ = ("directions", "steps")
+
+    def __init__(self, directions: bytearray, steps: array):
+        self.directions = directions
+        self.steps = steps
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return {
+            "direction": DIRECTIONS[self.directions[index]],
+            "steps": self.steps[index],
+        }
+
+    def __iter__(self):
+        for direction, steps in zip(self.directions, self.steps):
+            yield {"direction": DIRECTIONS[direction], "steps": steps}
+
+    @classmethod
+    def pack(cls, commands: typing.Iterable[Directions]) -> "CommandList":
+        """
+        Return the `CommandList` of valid `commands`, consumed once.
+        """
+        directions, steps = bytearray(), array("q")
+        for command in commands:
+            directions.append(MOVES[command.get("direction")][0])
+            steps.append(command.get("steps"))
+        return cls(directions, steps)
+
+    def key(self) -> bytes:
+        """
+        Return the result cache key of the commands, see `cache.path_key`.
+        """
+        return cache.commands_key(bytes(self.directions), self.steps.tobytes())
+
+
+class Decomposition(typing.NamedTuple):
+    """
+    Validated request data, see `validate_request_data`. Paths above
+    `MAX_COMMANDS` are only validated and have no segments nor commands.
+    """
+
+    commands: int
+    total_steps: int
+    bounds: Bounds
+    horizontal: typing.Optional[SegmentStore]
+    vertical: typing.Optional[SegmentStore]
+    # Direction codes (in `MOVE_MAP` order) and steps of the commands.
+    directions: typing.Optional[bytearray]
+    steps: typing.Optional[array]
+
+
 def serialize_execution(execution: Execution):
     return {
         "commands": execution.commands,
         "result": execution.result,
         "duration": execution.duration,
         "timestamp": execution.timestamp,
+        "engine": execution.engine,
+        "status": execution.status,
         "uri": f"/tibber-developer-test/enter-path/{execution.id}",
     }
 
 
-@db_session
-def execute_cleaning(session: Session):
+def execute_cleaning():
     """
     POST tibber-developer-test/enter-path API
+    Paths are computed outside of any database session, only persisting
+    the result is retried on database errors.
     """
-    data = request.get_json()
-    validate_request_data(data)
+    if request.mimetype == PACKED_MIMETYPE:
+        # Loads numpy, imported on use only.
+        from robot_cleaner.api import packed
+
+        data = path = packed.decode_path(request.get_data())
+        compute = packed.compute_path
+    else:
+        if parse_incrementally(request.content_length):
+            # Loads ijson, imported on use only.
+            from robot_cleaner.api import jsonstream
+
+            if not request.is_json:
+                # Fails like `request.get_json()`.
+                request.on_json_loading_failed(None)
+            data, path = jsonstream.parse_path(request.stream)
+        else:
+            data = request.get_json()
+            path = validate_request_data(data)
+
+        def compute(data, engine_name):
+            return compute_path(data, engine_name, path)
+
+    # Loads multiprocessing, imported on use only.
+    from robot_cleaner import workers
+
+    if request.args.get("mode") == "async" or (
+        config.ASYNC_MIN_COST > 0
+        and workers.estimate_cost(path) >= config.ASYNC_MIN_COST
+    ):
+        return submit_job(to_json(data), request.args.get("engine"))
+
+    timestamp1 = time.time()
+    engine, result = compute(data, request.args.get("engine"))
+    timestamp2 = time.time()
+
+    row = {
+        "commands": path.commands,
+        "result": result,
+        "duration": round(timestamp2 - timestamp1, 6),
+        "engine": engine,
+    }
+    if config.WRITE_BEHIND:
+        # Starts the flusher thread, imported on use only.
+        from robot_cleaner.recorder import recorder
+
+        execution = recorder.record(**row)
+    else:
+        execution = persist_execution(row)
+    return jsonify(serialize_execution(execution))
+
+
+def parse_incrementally(content_length: typing.Optional[int]) -> bool:
+    """
+    Whether a json body of `content_length` bytes (None when unknown) is
+    parsed while it is read, see `robot_cleaner.api.jsonstream`.
+    """
+    min_length = config.JSON_STREAM_MIN_LENGTH
+    if min_length <= 0:
+        return False
+    return content_length is None or content_length >= min_length
+
+
+def to_json(data) -> MovingPath:
+    """
+    Return the json form of a parsed path, in which pending paths are
+    stored.
+    """
+    if not isinstance(data, dict):
+        # `robot_cleaner.api.packed.PackedPath`
+        return data.to_json()
+    # Commands of incrementally parsed paths are built on access.
+    return {"start": data.get("start"), "commands": list(data.get("commands"))}
+
+
+@db_session(persist=True)
+def persist_execution(row: dict, session: Session):
+    return add_execution(session, **row)
+
+
+@db_session
+def list_cleanings(session: Session):
+    """
+    GET tibber-developer-test/enter-path API
+    Executions, newest first, in pages chained by the opaque `next` cursor.
+    """
+    args = request.args
+    try:
+        limit = parse_arg(args, "limit", int)
+        before = decode_cursor(args.get("cursor"))
+        filters = {
+            "since": parse_arg(args, "since", datetime.fromisoformat),
+            "until": parse_arg(args, "until", datetime.fromisoformat),
+            "min_result": parse_arg(args, "min_result", int),
+            "max_result": parse_arg(args, "max_result", int),
+            "min_commands": parse_arg(args, "min_commands", int),
+            "max_commands": parse_arg(args, "max_commands", int),
+        }
+    except ValueError as exc:
+        raise BadRequest(f"Invalid query parameters: {exc}")
+
+    if limit is None:
+        limit = config.LIST_DEFAULT_LIMIT
+    if not 0 < limit <= config.LIST_MAX_LIMIT:
+        raise BadRequest(
+            f"limit should be between 1 and {config.LIST_MAX_LIMIT}: {limit}"
+        )
+
+    # One extra execution tells whether there is a next page.
+    executions = list_executions(session, limit + 1, before=before, **filters)
+    page = executions[:limit]
+    has_next = len(executions) > limit
+    return jsonify(
+        {
+            "executions": [serialize_execution(item) for item in page],
+            "next": encode_cursor(page[-1]) if has_next else None,
+        }
+    )
+
+
+def parse_arg(args, name: str, parse: typing.Callable):
+    value = args.get(name)
+    return None if value is None else parse(value)
+
+
+def encode_cursor(execution: Execution) -> str:
+    """
+    Return the opaque cursor of the page following `execution`.
+    """
+    key = json.dumps([execution.timestamp.isoformat(), execution.id])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(
+    cursor: typing.Optional[str],
+) -> typing.Optional[typing.Tuple[datetime, int]]:
+    if cursor is None:
+        return None
+
+    try:
+        timestamp, execution_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(timestamp), int(execution_id)
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError(f"invalid cursor {cursor}")
+
+
+def get_cleaning(execution_id: int):
+    """
+    GET tibber-developer-test/enter-path/<id> API
+    Finished executions never change, their responses are served from
+    `cache.executions` and can be revalidated with `If-None-Match`.
+    Executions recorded behind the response by another process are only
+    visible once written, see `WRITE_BEHIND`: until then, and for at most
+    `RECORDER_MAX_DELAY` seconds, the response is a 202 to retry.
+    """
+    cached = cache.executions.get(execution_id)
+    if cached is None:
+        if config.WRITE_BEHIND:
+            from robot_cleaner.recorder import recorder
+
+            recorded = recorder.get(execution_id)
+            if recorded is not None:
+                # Not written yet.
+                return jsonify(serialize_execution(recorded))
+        cached = load_execution_response(execution_id)
+        if cached is None:
+            uri = f"/tibber-developer-test/enter-path/{execution_id}"
+            output = {"message": "Execution not written yet.", "uri": uri}
+            retry_after = str(max(1, round(config.RECORDER_MAX_AGE)))
+            return jsonify(output), 202, {"Retry-After": retry_after}
+
+    body, etag = cached
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+@db_session
+def load_execution_response(
+    execution_id: int,
+    session: Session,
+) -> typing.Optional[typing.Tuple[bytes, str]]:
+    """
+    Return the serialized execution and its ETag, caching finished ones.
+    None if the execution may still be recorded by another process.
+    """
+    execution = get_execution(session, execution_id)
+    if execution is None:
+        if config.WRITE_BEHIND and awaiting_write(session, execution_id):
+            return None
+        raise NotFound(f"Execution not found: {execution_id}")
+
+    body = current_app.json.dumps(serialize_execution(execution)).encode()
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    if execution.status in (DONE, FAILED):
+        cache.executions.set(execution_id, (body, etag))
+    return body, etag
+
+
+def awaiting_write(session: Session, execution_id: int) -> bool:
+    """
+    Whether `execution_id` may still be written by the recorder of another
+    process: it was taken from the id sequence and first polled less than
+    `RECORDER_MAX_DELAY` seconds ago.
+    """
+    now = time.monotonic()
+    first_polled = cache.unwritten.get(execution_id)
+    if first_polled is None:
+        if not id_allocated(session, execution_id):
+            return False
+        first_polled = now
+        cache.unwritten.set(execution_id, now)
+    return now - first_polled < config.RECORDER_MAX_DELAY
+
+
+def submit_job(
+    data: MovingPath,
+    engine_name: typing.Optional[str],
+):
+    """
+    Store a pending execution of the validated path and queue it.
+    Responds 202 with the execution to poll, or 503 if the queue is full.
+    """
+    validate_engine_name(engine_name)
+
+    execution = persist_execution(
+        {
+            "commands": len(data.get("commands")),
+            "result": None,
+            "duration": None,
+            "engine": engine_name,
+            "status": PENDING,
+            "path": data,
+        }
+    )
+    try:
+        get_job_queue().submit(execution.id)
+    except queue.Full:
+        remove_execution(execution.id)
+        raise ServiceUnavailable("Too many pending executions.")
 
+    output = serialize_execution(execution)
+    return jsonify(output), 202, {"Location": output["uri"]}
+
+
+def run_job(execution_id: int):
+    """
+    Compute a pending execution, unless another worker claimed it already.
+    """
+    claimed = claim_job(execution_id)
+    if claimed is None:
+        return
+
+    # The requested engine is stored until the job runs.
+    path, engine_name = claimed
     timestamp1 = time.time()
-    result = calculate_unique_places(data)
+    try:
+        engine, result = compute_path(path, engine_name)
+    except Exception:
+        finish_job(execution_id, status=FAILED)
+        raise
     timestamp2 = time.time()
 
-    execution = add_execution(
-        session,
-        commands=len(data.get("commands")),
+    finish_job(
+        execution_id,
         result=result,
         duration=round(timestamp2 - timestamp1, 6),
+        engine=engine,
+        status=DONE,
     )
-    return jsonify(serialize_execution(execution))
+
+
+@db_session
+def claim_job(
+    execution_id: int, session: Session
+) -> typing.Optional[typing.Tuple[MovingPath, typing.Optional[str]]]:
+    """
+    Claim a pending execution and return its path and requested engine.
+    """
+    stale_before = utcnow() - timedelta(seconds=config.JOB_STALE_AFTER)
+    execution = claim_execution(session, execution_id, stale_before)
+    if execution is None:
+        return None
+    return execution.path, execution.engine
+
+
+@db_session(persist=True)
+def finish_job(execution_id: int, session: Session, **values):
+    finish_execution(session, execution_id, **values)
+
+
+@db_session(persist=True)
+def remove_execution(execution_id: int, session: Session):
+    delete_execution(session, execution_id)
+
+
+@db_session
+def recover_jobs(session: Session) -> typing.List[int]:
+    """
+    Return the ids of the executions left pending by previous processes.
+    """
+    stale_before = utcnow() - timedelta(seconds=config.JOB_STALE_AFTER)
+    return claimable_execution_ids(session, stale_before)
+
+
+def execute_cleaning_batch():
+    """
+    POST tibber-developer-test/enter-paths API
+    Paths failing validation get an error instead of a result, the others
+    are computed together and inserted with a single statement.
+    """
+    data = request.get_json()
+    validate_batch_data(data)
+
+    timestamp1 = time.time()
+    items = []
+    for path_data in data:
+        try:
+            # Batch paths are computed from their normalized commands.
+            validate_request_data(path_data, decompose=False)
+        except BadRequest as exc:
+            items.append(exc.description)
+        else:
+            items.append(path_data)
+
+    valid = [item for item in items if not isinstance(item, str)]
+    commands = sum(len(path_data.get("commands")) for path_data in valid)
+    if commands > config.MAX_BATCH_COMMANDS:
+        raise BadRequest(
+            f"Number of commands in a batch should be lower than {config.MAX_BATCH_COMMANDS}: {commands}"  # noqa
+        )
+
+    # Identical paths are computed once, cached ones not at all.
+    rows = []
+    results = {}
+    tasks = {}
+    inline = {}
+    timeout = None
+    for path_data in valid:
+        path, key = prepare_path(path_data)
+        engine, calculate = select_engine(request.args.get("engine"), path)
+        rows.append((len(path_data.get("commands")), engine, key))
+        if engine == "external":
+            timeout = config.LARGE_PATH_TASK_TIMEOUT
+        if key in results or key in tasks:
+            continue
+
+        result = cache.results.get(key)
+        if result is not None:
+            results[key] = result
+        elif engine in PARALLEL_ENGINES:
+            inline[key] = (calculate, path)
+        else:
+            tasks[key] = (calculate, path)
+
+    from robot_cleaner import workers
+
+    computed = dict(
+        zip(tasks, workers.run_many(list(tasks.values()), timeout)),
+    )
+    # Submit their own tasks to the pool once the other paths are done.
+    for key, (calculate, path) in inline.items():
+        computed[key] = calculate(path)
+    for key, result in computed.items():
+        cache.results.set(key, result)
+    results.update(computed)
+    timestamp2 = time.time()
+
+    # Paths are computed together, each one is given an equal share.
+    duration = round((timestamp2 - timestamp1) / max(len(rows), 1), 6)
+    executions = iter(
+        persist_executions(
+            [
+                {
+                    "commands": commands,
+                    "result": results[key],
+                    "duration": duration,
+                    "engine": engine,
+                }
+                for commands, engine, key in rows
+            ],
+        )
+    )
+    return jsonify(
+        {
+            "executions": [
+                (
+                    {"error": item}
+                    if isinstance(item, str)
+                    else serialize_execution(next(executions))
+                )
+                for item in items
+            ]
+        }
+    )
+
+
+def execute_cleaning_stream():
+    """
+    POST tibber-developer-test/enter-paths/stream API
+    Reads newline-delimited paths and writes one newline-delimited result
+    per path, in order, as soon as it is computed and persisted.
+    """
+    engine_name = request.args.get("engine")
+    validate_engine_name(engine_name)
+
+    return Response(
+        stream_with_context(stream_executions(request.stream, engine_name)),
+        mimetype="application/x-ndjson",
+    )
+
+
+def stream_executions(
+    lines: typing.Iterable[bytes],
+    engine_name: typing.Optional[str],
+) -> typing.Iterator[str]:
+    """
+    Compute the paths of newline-delimited json `lines` one by one and
+    yield their results. Executions are persisted in transactions of up to
+    `STREAM_FLUSH_SIZE` rows, and at least every `STREAM_FLUSH_INTERVAL`
+    seconds, before their results are sent. `lines` are read ahead in a
+    thread, so pending results are flushed while the next line is late.
+    The thread is stopped before the generator returns, even early, so it
+    never reads past the request.
+    """
+    pending = []
+    flushed = time.monotonic()
+    reader = LineReader(lines)
+
+    try:
+        while True:
+            timeout = None
+            if pending:
+                deadline = flushed + config.STREAM_FLUSH_INTERVAL
+                timeout = max(deadline - time.monotonic(), 0)
+            try:
+                line = reader.get(timeout)
+            except queue.Empty:
+                yield from flush_executions(pending)
+                pending = []
+                flushed = time.monotonic()
+                continue
+            if line is None:
+                break
+            if not line.strip():
+                continue
+            pending.append(execute_line(line, engine_name))
+
+            if (
+                len(pending) >= config.STREAM_FLUSH_SIZE
+                or time.monotonic() - flushed >= config.STREAM_FLUSH_INTERVAL
+            ):
+                yield from flush_executions(pending)
+                pending = []
+                flushed = time.monotonic()
+    finally:
+        reader.close()
+
+    if pending:
+        yield from flush_executions(pending)
+
+
+def execute_line(
+    line: bytes,
+    engine_name: typing.Optional[str],
+) -> typing.Union[str, dict]:
+    """
+    Return the execution row of the json path `line`, or its error.
+    """
+    try:
+        data = json.loads(line)
+        decomposition = validate_request_data(data)
+    except BadRequest as exc:
+        return exc.description
+    except ValueError:
+        return f"Invalid path: {line.decode(errors='replace')}"
+
+    timestamp1 = time.time()
+    engine, result = compute_path(data, engine_name, decomposition)
+    timestamp2 = time.time()
+    return {
+        "commands": decomposition.commands,
+        "result": result,
+        "duration": round(timestamp2 - timestamp1, 6),
+        "engine": engine,
+    }
+
+
+class LineReader:
+    """
+    Reads up to `maxsize` `lines` ahead in a daemon thread. `get` returns
+    the next line, or None at the end of `lines`, and raises the errors
+    of reading them.
+    """
+
+    def __init__(self, lines: typing.Iterable[bytes], maxsize: int = 64):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self._read, args=(lines,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def get(self, timeout: typing.Optional[float] = None):
+        """
+        Raises `queue.Empty` when no line is read within `timeout` seconds.
+        """
+        item = self.queue.get(timeout=timeout)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def close(self):
+        """
+        Stop reading, e.g. when the client is gone, and wait for the thread
+        to finish the line it is reading, as a plain read would.
+        """
+        self.closed.set()
+        self.thread.join()
+
+    def _read(self, lines: typing.Iterable[bytes]):
+        try:
+            for line in lines:
+                if not self._put(line):
+                    return
+        except Exception as exc:
+            self._put(exc)
+        else:
+            self._put(None)
+
+    def _put(self, item) -> bool:
+        while not self.closed.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+
+def flush_executions(pending: typing.List[typing.Union[str, dict]]):
+    """
+    Persist the pending execution rows and yield a result line for every
+    pending item, errors included.
+    """
+    rows = [item for item in pending if not isinstance(item, str)]
+    executions = iter(persist_executions(rows))
+    for item in pending:
+        if isinstance(item, str):
+            output = {"error": item}
+        else:
+            output = serialize_execution(next(executions))
+        yield current_app.json.dumps(output) + "\n"
+
+
+@db_session(persist=True)
+def persist_executions(rows: typing.List[dict], session: Session):
+    return add_executions(session, rows)
+
+
+def compute_path(
+    data: MovingPath,
+    engine_name: typing.Optional[str],
+    decomposition: typing.Optional[Decomposition] = None,
+) -> typing.Tuple[str, int]:
+    """
+    Return the engine and the number of unique places of validated request
+    data, from the result cache when the path was computed already.
+    Engines of `DECOMPOSED_ENGINES` compute the segments of `decomposition`
+    instead of walking the commands again. Paths routed to the `external`
+    engine are neither normalized nor cached: they are computed once, with
+    bounded memory, within `LARGE_PATH_TASK_TIMEOUT`.
+    """
+    if decomposition is not None and decomposition.horizontal is not None:
+        engine, _ = select_engine(engine_name, data, decomposition)
+        if engine in DECOMPOSED_ENGINES:
+            return engine, compute_decomposition(decomposition, engine)
+
+    engine, calculate = select_engine(engine_name, data, decomposition)
+    if engine == "external":
+        timeout = config.LARGE_PATH_TASK_TIMEOUT
+        cost = None
+        if decomposition is not None:
+            from robot_cleaner import workers
+
+            # The json commands are not walked again.
+            cost = workers.estimate_cost(decomposition)
+        return engine, run_engine(engine, calculate, data, timeout, cost)
+
+    path, key = prepare_path(data)
+    if path is not data:
+        engine, calculate = select_engine(engine_name, path, decomposition)
+    result = cache.results.get(key)
+    if result is None:
+        result = run_engine(engine, calculate, path)
+        cache.results.set(key, result)
+    return engine, result
+
+
+def compute_decomposition(decomposition: Decomposition, engine: str) -> int:
+    """
+    Return the number of unique places of `decomposition` computed by
+    `engine`, one of the `DECOMPOSED_ENGINES`. The commands are not
+    normalized, so the result is cached under the key of the raw commands.
+    """
+    key = cache.commands_key(
+        bytes(decomposition.directions), decomposition.steps.tobytes()
+    )
+    result = cache.results.get(key)
+    if result is None:
+        calculate = get_engine(engine, DECOMPOSED_ENGINES)
+        result = run_engine(engine, calculate, decomposition)
+        cache.results.set(key, result)
+    return result
+
+
+def run_engine(
+    engine: str,
+    calculate: typing.Callable,
+    data,
+    timeout: typing.Optional[float] = None,
+    cost: typing.Optional[int] = None,
+):
+    """
+    Return `calculate(data)` computed by `engine`, in the process pool for
+    expensive paths (see `workers.run`) unless `engine` is one of the
+    `PARALLEL_ENGINES`, which submit their own tasks to it.
+    """
+    if engine in PARALLEL_ENGINES:
+        return calculate(data)
+
+    # Loads multiprocessing, imported on use only.
+    from robot_cleaner import workers
+
+    return workers.run(calculate, data, timeout, cost)
+
+
+def prepare_path(data: MovingPath) -> typing.Tuple[MovingPath, bytes]:
+    """
+    Return the path to compute for validated request data, with its
+    commands normalized when `NORMALIZE_COMMANDS` is set, and its result
+    cache key. Normalized commands are packed in a `CommandList` as they
+    are generated, which both the key and the engine read.
+    """
+    commands = data.get("commands")
+    if config.NORMALIZE_COMMANDS:
+        normalized = CommandList.pack(normalize_commands(commands))
+        normalization_metrics.inc("commands", len(commands))
+        normalization_metrics.inc("normalized_commands", len(normalized))
+        data = {"start": data.get("start"), "commands": normalized}
+        commands = normalized
+
+    if isinstance(commands, CommandList):
+        return data, commands.key()
+    return data, cache.path_key(data)
+
+
+def select_engine(
+    name: typing.Optional[str],
+    data: MovingPath,
+    decomposition: typing.Optional[Decomposition] = None,
+) -> typing.Tuple[str, typing.Callable]:
+    """
+    Return the name and the function of the engine computing unique places
+    for the request.
+    Defaults to the configured `CLEANING_ENGINE`, or to the bounded-memory
+    `external` engine for paths above `MAX_COMMANDS`. The `auto` engine is
+    resolved to the engine it picks for the path, given its `decomposition`
+    when it is known already.
+    """
+    if name is None:
+        name = (
+            "external"
+            if len(data.get("commands")) > config.MAX_COMMANDS
+            else config.CLEANING_ENGINE
+        )
+    if name == "auto":
+        # Engine modules import this module, import them on use only.
+        from robot_cleaner.engines.auto import choose_engine
+
+        name = choose_engine(data, decomposition)
+
+    try:
+        return name, get_engine(name)
+    except ValueError as exc:
+        raise BadRequest(str(exc))
 
 
 def calculate_unique_places(data: MovingPath):
@@ -91,7 +961,8 @@ def calculate_unique_places(data: MovingPath):
     merged_vertical_lines = merge_overlapping(vertical_lines, axis=0)
     merged_horizontal_lines = merge_overlapping(horizontal_lines, axis=1)
 
-    common = count_intersections(
+    sweep = SWEEPS[config.CLEANING_SWEEP]
+    common = sweep(
         merged_vertical_lines,
         merged_horizontal_lines,
     )
@@ -103,6 +974,62 @@ def calculate_unique_places(data: MovingPath):
     return total - common
 
 
+def normalize_commands(
+    commands: typing.Iterable[Directions],
+) -> typing.Iterator[Directions]:
+    """
+    Shrink a command list without changing the places it cleans, yielding
+    the new commands as they are found.
+    Every run of commands on the same axis covers one interval of its line
+    and ends somewhere inside it, which takes at most 3 commands to cover:
+    consecutive moves in one direction are coalesced and back-and-forth
+    moves over already cleaned places are folded. Zero steps are dropped.
+    """
+    axis = None
+    start = position = low = high = 0
+
+    for command in commands:
+        steps = command.get("steps")
+        if steps == 0:
+            continue
+
+        dx, dy = MOVE_MAP[command.get("direction")]
+        command_axis = 0 if dy == 0 else 1
+        if command_axis != axis:
+            if axis is not None:
+                yield from _fold_run(axis, start, position, low, high)
+            axis = command_axis
+            start = position = low = high = 0
+
+        position += (dx + dy) * steps
+        low = min(low, position)
+        high = max(high, position)
+
+    if axis is not None:
+        yield from _fold_run(axis, start, position, low, high)
+
+
+def _fold_run(axis: int, start: int, end: int, low: int, high: int):
+    """
+    Return the fewest commands going from `start` to `end` on `axis` and
+    covering [low, high].
+    """
+    positive, negative = AXES[axis]
+    candidates = []
+    for targets in ((low, high, end), (high, low, end)):
+        moves = []
+        position = start
+        for target in targets:
+            if target == position:
+                continue
+            direction = positive if target > position else negative
+            steps = abs(target - position)
+            moves.append({"direction": direction, "steps": steps})
+            position = target
+        candidates.append(moves)
+    return min(candidates, key=len)
+
+
 def divide_path(data: MovingPath):
     """
     Divide given path into lists of vertical and horizontal segments.
@@ -203,6 +1130,9 @@ def count_intersections(vertical_segments, horizontal_segments):
 
     events.sort(key=lambda e: (e[0], e[3] != "h_start", e[3] == "h_end"))
 
+    # Only this sweep needs it, it is imported on first use.
+    from sortedcontainers import SortedList
+
     active_horizontal_segments = SortedList()
     num_intersections = 0
 
@@ -220,6 +1150,89 @@ def count_intersections(vertical_segments, horizontal_segments):
     return num_intersections
 
 
+def count_intersections_fenwick(vertical_segments, horizontal_segments):
+    """
+    Sweep Line Algorithm over compressed y coordinates.
+    Same as `count_intersections`, but events are sorted by a single integer
+    key and active horizontal segments are counted in a Fenwick tree.
+    """
+    if len(vertical_segments) == 0 or len(horizontal_segments) == 0:
+        return 0
+
+    return fenwick_sweep(
+        [x for (x, _), _ in vertical_segments],
+        [min(y1, y2) for (_, y1), (_, y2) in vertical_segments],
+        [max(y1, y2) for (_, y1), (_, y2) in vertical_segments],
+        [y for (_, y), _ in horizontal_segments],
+        [min(x1, x2) for (x1, _), (x2, _) in horizontal_segments],
+        [max(x1, x2) for (x1, _), (x2, _) in horizontal_segments],
+    )
+
+
+def fenwick_sweep(v_x, v_low, v_high, h_y, h_low, h_high):
+    """
+    Count intersections between vertical segments x, [low, high] and
+    horizontal segments y, [low, high], given as parallel sequences.
+    """
+    # Compress the y coordinates of horizontal segments to 1-based ranks.
+    ys = sorted(set(h_y))
+    rank = {y: i for i, y in enumerate(ys, 1)}
+    size = len(ys)
+
+    # Event key: (x * 3 + event type) * base + payload, where the payload is
+    # the y rank of a horizontal segment, or the Fenwick prefix bounds
+    # (low, high] of the ranks a vertical segment covers.
+    width = size + 1
+    base = width * width
+    keys = []
+
+    for y, x1, x2 in zip(h_y, h_low, h_high):
+        keys.append((x1 * 3 + H_START) * base + rank[y])
+        keys.append((x2 * 3 + H_END) * base + rank[y])
+
+    for x, y1, y2 in zip(v_x, v_low, v_high):
+        keys.append(
+            (x * 3 + VERTICAL) * base
+            + bisect_left(ys, y1) * width
+            + bisect_right(ys, y2)
+        )
+
+    keys.sort()
+
+    tree = array("l", [0]) * width
+    num_intersections = 0
+
+    for key in keys:
+        event, payload = divmod(key, base)
+        event_type = event % 3
+
+        if event_type == VERTICAL:
+            low, high = divmod(payload, width)
+            # prefix(high) - prefix(low), walking both down to their
+            # common ancestor only.
+            while high != low:
+                if high > low:
+                    num_intersections += tree[high]
+                    high &= high - 1
+                else:
+                    num_intersections -= tree[low]
+                    low &= low - 1
+        else:
+            delta = 1 if event_type == H_START else -1
+            i = payload
+            while i <= size:
+                tree[i] += delta
+                i += i & -i
+
+    return num_intersections
+
+
+SWEEPS = {
+    "sortedlist": count_intersections,
+    "fenwick": count_intersections_fenwick,
+}
+
+
 def count_points(lines: typing.List[tuple]):
     """
     Count number of vertices of multiple horizontal/vertical segments.
@@ -237,8 +1250,8 @@ def count_segment_points(a: typing.Tuple, b: typing.Tuple):
     Count number of vertices that a vertical/horizontal segment passes through.
     The segment starts at point a(x, y) and ends at point b(x, y).
     """
-    ax, ay = abs(a[0]), abs(a[1])
-    bx, by = abs(b[0]), abs(b[1])
+    ax, ay = a
+    bx, by = b
 
     if ax == bx:
         return abs(by - ay) + 1
@@ -247,29 +1260,156 @@ def count_segment_points(a: typing.Tuple, b: typing.Tuple):
     return 0
 
 
-def validate_request_data(data: MovingPath):
+def validate_batch_data(data: typing.List[MovingPath]):
+    if data is None or not isinstance(data, list):
+        raise BadRequest(
+            f"Invalid data: {data}. Data should be a json array of paths.",
+        )
+
+    if len(data) > config.MAX_BATCH_PATHS:
+        raise BadRequest(
+            f"Number of paths should be lower than {config.MAX_BATCH_PATHS}: {len(data)}"  # noqa
+        )
+
+
+def validate_engine_name(engine_name: typing.Optional[str]):
+    if engine_name is not None and engine_name not in ENGINES:
+        raise BadRequest(
+            f"Unknown engine: {engine_name}. Should be one of: {tuple(ENGINES)}"  # noqa
+        )
+
+
+def validate_request_data(
+    data: MovingPath,
+    decompose: bool = True,
+) -> Decomposition:
+    """
+    Validate request data in a single pass over its commands, which also
+    divides the path into segments unless `decompose` is false or the path
+    has more than `MAX_COMMANDS` commands. Raises `BadRequest` for invalid
+    values and malformed data, naming the first invalid command.
+    """
     if data is None or not isinstance(data, dict):
         raise BadRequest(f"Invalid data: {data}. Data should be valid json.")
 
-    x = data.get("start").get("x")
+    x, y = validate_start(data.get("start"))
+
+    commands = data.get("commands")
+    if not isinstance(commands, list):
+        raise BadRequest(f"Invalid commands: {commands}. Should be a list.")
+
+    max_commands = max(config.MAX_COMMANDS, config.LARGE_PATH_MAX_COMMANDS)
+    if len(commands) > max_commands:
+        raise BadRequest(
+            f"Number of commands should be lower than {max_commands}: {len(commands)}"  # noqa
+        )
+
+    return decompose_commands(
+        x, y, commands, decompose and len(commands) <= config.MAX_COMMANDS
+    )
+
+
+def validate_start(start: Coordinates) -> typing.Tuple[int, int]:
+    if not isinstance(start, dict):
+        raise BadRequest(f"Invalid start: {start}. Should be an object.")
+
+    x = start.get("x")
+    if not _is_integer(x):
+        raise BadRequest(f"x value should be an integer: {x}")
     if not -100000 <= x <= 100000:
         raise BadRequest(f"x value out of bounds: {x}")
 
-    y = data.get("start").get("y")
+    y = start.get("y")
+    if not _is_integer(y):
+        raise BadRequest(f"y value should be an integer: {y}")
     if not -100000 <= y <= 100000:
         raise BadRequest(f"y value out of bounds: {y}")
 
-    if len(data.get("commands")) > 10000:
-        raise BadRequest(
-            f"Number of commands should be lower than 10000: {len(data.get("commands"))}"  # noqa
-        )
+    return x, y
 
-    for command in data.get("commands"):
-        if command.get("direction") not in MOVE_MAP.keys():
+
+def decompose_commands(
+    x: int,
+    y: int,
+    commands: typing.Iterable[Directions],
+    decompose: bool = True,
+) -> Decomposition:
+    """
+    Validate the commands of a path starting at (x, y), walking them once,
+    and divide the path into segments when `decompose` is set. `commands`
+    may be any iterable, e.g. commands parsed as they are read. Segments
+    are dropped, and no longer built, past `MAX_COMMANDS` commands.
+    """
+    horizontal = vertical = directions = steps_list = None
+    segments = decompose
+    if decompose:
+        horizontal, vertical = SegmentStore(), SegmentStore()
+        directions, steps_list = bytearray(), array("q")
+
+    min_x = max_x = x
+    min_y = max_y = y
+    total_steps = 0
+    index = -1
+    for index, command in enumerate(commands):
+        if segments and index == config.MAX_COMMANDS:
+            segments = False
+            horizontal = vertical = None
+
+        if not isinstance(command, dict):
+            raise BadRequest(f"Command {index} should be an object: {command}")
+
+        direction = command.get("direction")
+        move = MOVES.get(direction) if isinstance(direction, str) else None
+        if move is None:
             raise BadRequest(
-                "Direction value should be one of: (north, south, east, west)",
+                f"Direction value of command {index} should be one of: (north, south, east, west)",  # noqa
             )
-        if not 0 < command.get("steps") < 100000:
+
+        steps = command.get("steps")
+        if not _is_integer(steps):
             raise BadRequest(
-                f"Steps value is out of bounds: {command.get("steps")}",
+                f"Steps value of command {index} should be an integer: {steps}",  # noqa
             )
+        if not 0 < steps < 100000:
+            raise BadRequest(
+                f"Steps value of command {index} is out of bounds: {steps}",
+            )
+
+        code, dx, dy = move
+        total_steps += steps
+        if dx:
+            x_next = x + dx * steps
+            if segments:
+                horizontal.append(y, x, x_next)
+            x = x_next
+            if x < min_x:
+                min_x = x
+            elif x > max_x:
+                max_x = x
+        else:
+            y_next = y + dy * steps
+            if segments:
+                vertical.append(x, y, y_next)
+            y = y_next
+            if y < min_y:
+                min_y = y
+            elif y > max_y:
+                max_y = y
+        if decompose:
+            directions.append(code)
+            steps_list.append(steps)
+
+    return Decomposition(
+        commands=index + 1,
+        total_steps=total_steps,
+        bounds=Bounds(min_x, max_x, min_y, max_y),
+        horizontal=horizontal,
+        vertical=vertical,
+        directions=directions,
+        steps=steps_list,
+    )
+
+
+def _is_integer(value) -> bool:
+    # json booleans are ints in Python.
+    return isinstance(value, int) and not isinstance(value, bool)
@@ -0,0 +1,220 @@
+"""
+Asyncio views of the ASGI app, see `robot_cleaner.asgi`.
+
+They behave like their `robot_cleaner.api.clean` counterparts and respond
+the same way: paths are parsed, validated and computed in worker threads,
+off the event loop, and executions are written with pooled asyncpg sessions.
+"""
+
+import asyncio
+import json
+import queue
+import time
+import typing
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
+from werkzeug.exceptions import (
+    BadRequest,
+    HTTPException,
+    ServiceUnavailable,
+    UnsupportedMediaType,
+)
+
+from robot_cleaner import config
+from robot_cleaner.api import clean
+from robot_cleaner.db import async_db_session
+from robot_cleaner.models.execution import (
+    PENDING,
+    async_add_execution,
+    async_delete_execution,
+)
+
+
+async def execute_cleaning(request: Request) -> Response:
+    """
+    POST tibber-developer-test/enter-path API
+    """
+    if get_mimetype(request) == clean.PACKED_MIMETYPE:
+        # Loads numpy, imported on use only.
+        from robot_cleaner.api import packed
+
+        body = await request.body()
+        data = path = await asyncio.to_thread(packed.decode_path, body)
+        compute = packed.compute_path
+    else:
+        if clean.parse_incrementally(get_content_length(request)):
+            # Loads ijson, imported on use only.
+            from robot_cleaner.api import jsonstream
+
+            check_json(request)
+            reader = BodyReader(request, asyncio.get_running_loop())
+            data, path = await asyncio.to_thread(jsonstream.parse_path, reader)
+        else:
+            data = await get_json(request)
+            path = await asyncio.to_thread(clean.validate_request_data, data)
+
+        def compute(data, engine_name):
+            return clean.compute_path(data, engine_name, path)
+
+    # Loads multiprocessing, imported on use only.
+    from robot_cleaner import workers
+
+    engine_name = request.query_params.get("engine")
+    if request.query_params.get("mode") == "async" or (
+        config.ASYNC_MIN_COST > 0
+        and workers.estimate_cost(path) >= config.ASYNC_MIN_COST
+    ):
+        data = await asyncio.to_thread(clean.to_json, data)
+        return await submit_job(data, engine_name)
+
+    timestamp1 = time.time()
+    engine, result = await asyncio.to_thread(compute, data, engine_name)
+    timestamp2 = time.time()
+
+    row = {
+        "commands": path.commands,
+        "result": result,
+        "duration": round(timestamp2 - timestamp1, 6),
+        "engine": engine,
+    }
+    if config.WRITE_BEHIND:
+        # Starts the flusher thread, imported on use only.
+        from robot_cleaner.recorder import recorder
+
+        # Waits for ids or for room in the queue.
+        execution = await asyncio.to_thread(recorder.record, **row)
+    else:
+        execution = await persist_execution(row)
+    return jsonify(clean.serialize_execution(execution))
+
+
+async def submit_job(
+    data: clean.MovingPath,
+    engine_name: typing.Optional[str],
+) -> Response:
+    """
+    `clean.submit_job`, the job is computed by the same job queue.
+    """
+    clean.validate_engine_name(engine_name)
+
+    execution = await persist_execution(
+        {
+            "commands": len(data.get("commands")),
+            "result": None,
+            "duration": None,
+            "engine": engine_name,
+            "status": PENDING,
+            "path": data,
+        }
+    )
+    try:
+        clean.get_job_queue().submit(execution.id)
+    except queue.Full:
+        await remove_execution(execution.id)
+        raise ServiceUnavailable("Too many pending executions.")
+
+    output = clean.serialize_execution(execution)
+    return jsonify(output, 202, {"Location": output["uri"]})
+
+
+@async_db_session(persist=True)
+async def persist_execution(row: dict, session: AsyncSession):
+    return await async_add_execution(session, **row)
+
+
+@async_db_session(persist=True)
+async def remove_execution(execution_id: int, session: AsyncSession):
+    await async_delete_execution(session, execution_id)
+
+
+class BodyReader:
+    """
+    Blocking file-like reader of the body of `request`, for parsers running
+    in worker threads: chunks are received by the event loop `loop`.
+    """
+
+    def __init__(self, request: Request, loop: asyncio.AbstractEventLoop):
+        self.chunks = request.stream()
+        self.loop = loop
+
+    def read(self, size: int = -1) -> bytes:
+        # Chunks are returned whole, ijson accepts shorter or longer reads.
+        try:
+            return asyncio.run_coroutine_threadsafe(
+                anext(self.chunks), self.loop
+            ).result()
+        except StopAsyncIteration:
+            return b""
+
+
+async def get_json(request: Request) -> typing.Any:
+    """
+    Return the json body of `request`, failing like `flask.Request.get_json`.
+    """
+    check_json(request)
+    body = await request.body()
+    try:
+        return await asyncio.to_thread(json.loads, body)
+    except ValueError as exc:
+        # Flask hides the decoding error outside of debug mode.
+        raise BadRequest() from exc
+
+
+def check_json(request: Request):
+    """
+    Fail like `flask.Request.get_json` unless `request` has a json body.
+    """
+    mimetype = get_mimetype(request)
+    if not (
+        mimetype == "application/json"
+        or mimetype.startswith("application/")
+        and mimetype.endswith("+json")
+    ):
+        raise UnsupportedMediaType(
+            "Did not attempt to load JSON data because the request"
+            " Content-Type was not 'application/json'."
+        )
+
+
+def get_content_length(request: Request) -> typing.Optional[int]:
+    try:
+        return int(request.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def get_mimetype(request: Request) -> str:
+    """
+    Return the content type of `request` without its parameters, like
+    `flask.Request.mimetype`.
+    """
+    content_type = request.headers.get("Content-Type", "")
+    return content_type.split(";")[0].strip().lower()
+
+
+def jsonify(
+    obj: typing.Any,
+    status: int = 200,
+    headers: typing.Optional[typing.Dict[str, str]] = None,
+) -> Response:
+    """
+    Return a json response encoded like `flask.jsonify` does.
+    """
+    body = json.dumps(
+        obj,
+        default=DefaultJSONProvider.default,
+        ensure_ascii=DefaultJSONProvider.ensure_ascii,
+        sort_keys=DefaultJSONProvider.sort_keys,
+        separators=(",", ":"),
+    )
+    return Response(f"{body}\n", status, headers, "application/json")
+
+
+def error_response(exc: HTTPException) -> Response:
+    """
+    Return the error page Flask responds with for `exc`.
+    """
+    return Response(exc.get_body(), exc.code, dict(exc.get_headers()))
@@ -0,0 +1,167 @@
+"""
+Incremental parsing of large json bodies of the enter-path endpoint.
+
+`request.get_json()` reads the whole body and builds every command object
+before validation starts. Bodies of at least `JSON_STREAM_MIN_LENGTH` bytes
+are parsed with ijson while they are read instead: each command is
+validated and divided into segments as soon as it is parsed, then dropped.
+Memory holds the segments and the packed commands only, and parsing
+overlaps with the upload. It takes about twice the CPU time of
+`json.loads` though, so smaller bodies are still read whole.
+
+The number of unique places does not change when a path is translated, so
+commands are walked from (0, 0) and the members of the body may come in
+any order.
+"""
+
+import typing
+
+import ijson
+
+from werkzeug.exceptions import BadRequest
+
+from robot_cleaner import config
+from robot_cleaner.api.clean import (
+    CommandList,
+    Decomposition,
+    MovingPath,
+    decompose_commands,
+    validate_start,
+)
+
+
+# Bytes read from the body at once.
+BUFFER_SIZE = 64 * 1024
+
+_CONTAINERS = ("start_map", "start_array")
+
+
+class _Reader:
+    """
+    `stream` without empty reads, which ijson makes to check the type of
+    the data read and werkzeug streams take for disconnections.
+    """
+
+    def __init__(self, stream: typing.BinaryIO):
+        self.stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        return self.stream.read(size) if size else b""
+
+
+def parse_path(
+    stream: typing.BinaryIO,
+) -> typing.Tuple[MovingPath, Decomposition]:
+    """
+    Parse and validate the json path read from `stream`, see
+    `robot_cleaner.api.clean.validate_request_data`. Returns the path, with
+    a `CommandList`, and its decomposition, without segments above
+    `MAX_COMMANDS` commands.
+    """
+    events = ijson.basic_parse(
+        _Reader(stream),
+        use_float=True,
+        buf_size=BUFFER_SIZE,
+    )
+    members = {}
+    try:
+        decomposition = decompose_commands(0, 0, _commands(events, members))
+    except ijson.JSONError as exc:
+        # Same response as `request.get_json()` outside of debug mode.
+        raise BadRequest() from exc
+
+    start = members.get("start")
+    validate_start(start)
+    if "commands" not in members:
+        raise BadRequest("Invalid commands: None. Should be a list.")
+
+    commands = CommandList(decomposition.directions, decomposition.steps)
+    return {"start": start, "commands": commands}, decomposition
+
+
+def _commands(
+    events: typing.Iterator[typing.Tuple[str, typing.Any]],
+    members: dict,
+) -> typing.Iterator[typing.Any]:
+    """
+    Yield the items of the `commands` array of the json object parsed from
+    `events` as they are parsed, and collect its other members in
+    `members`.
+    """
+    event, value = next(events)
+    if event != "start_map":
+        data = _build(event, value, events)
+        raise BadRequest(f"Invalid data: {data}. Data should be valid json.")
+
+    max_commands = max(config.MAX_COMMANDS, config.LARGE_PATH_MAX_COMMANDS)
+    for event, key in events:
+        if event == "end_map":
+            break
+
+        event, value = next(events)
+        if key != "commands":
+            members[key] = _build(event, value, events)
+            if key == "start":
+                # Fail before reading the commands.
+                validate_start(members[key])
+            continue
+        if event != "start_array":
+            value = _build(event, value, events)
+            raise BadRequest(f"Invalid commands: {value}. Should be a list.")
+
+        members[key] = None
+        count = 0
+        for event, value in events:
+            if event == "end_array":
+                break
+            count += 1
+            if count > max_commands:
+                raise BadRequest(
+                    f"Number of commands should be lower than {max_commands}"  # noqa
+                )
+            yield _build_command(event, value, events)
+
+    # Fails on trailing data.
+    for _ in events:
+        pass
+
+
+def _build_command(
+    event: str,
+    value: typing.Any,
+    events: typing.Iterator[typing.Tuple[str, typing.Any]],
+) -> typing.Any:
+    # Flat objects, i.e. valid commands, are built without `_build`.
+    if event != "start_map":
+        return _build(event, value, events)
+
+    command = {}
+    for event, key in events:
+        if event == "end_map":
+            return command
+        event, value = next(events)
+        if event in _CONTAINERS:
+            value = _build(event, value, events)
+        command[key] = value
+
+
+def _build(
+    event: str,
+    value: typing.Any,
+    events: typing.Iterator[typing.Tuple[str, typing.Any]],
+) -> typing.Any:
+    """
+    Return the json value starting with (`event`, `value`), reading the
+    rest of its events.
+    """
+    builder = ijson.ObjectBuilder()
+    depth = 0
+    while True:
+        builder.event(event, value)
+        if event in _CONTAINERS:
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+        if depth == 0:
+            return builder.value
+        event, value = next(events)
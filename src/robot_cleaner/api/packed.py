@@ -0,0 +1,154 @@
+"""
+Binary uploads of the enter-path endpoint, in the format of
+`robot_cleaner.packing`.
+
+The records are read in place with `numpy.frombuffer` and validated with
+array operations, so no Python object is built per command.
+"""
+
+import typing
+
+import numpy as np
+
+from werkzeug.exceptions import BadRequest
+
+from robot_cleaner import cache, config, workers
+from robot_cleaner.api.clean import MovingPath, validate_engine_name
+from robot_cleaner.engines import PACKED_ENGINES, get_engine
+from robot_cleaner.packing import (
+    DIRECTIONS,
+    HEADER,
+    check_size,
+    decode_header,
+)
+
+
+COMMAND_DTYPE = np.dtype([("direction", "<u1"), ("steps", "<u4")])
+
+
+class PackedPath(typing.NamedTuple):
+    """
+    Decoded binary upload. The arrays are views of the request body.
+    """
+
+    x: int
+    y: int
+    directions: np.ndarray
+    steps: np.ndarray
+
+    @property
+    def commands(self) -> int:
+        return len(self.steps)
+
+    @property
+    def total_steps(self) -> int:
+        return int(self.steps.sum(dtype=np.int64))
+
+    def to_json(self) -> MovingPath:
+        """
+        Return the path in the json form of the API.
+        """
+        return {
+            "start": {"x": self.x, "y": self.y},
+            "commands": [
+                {"direction": DIRECTIONS[direction], "steps": steps}
+                for direction, steps in zip(
+                    self.directions.tolist(), self.steps.tolist()
+                )
+            ],
+        }
+
+
+def decode_path(body: bytes) -> PackedPath:
+    """
+    Return the path of a binary upload, validated like
+    `validate_request_data` validates json paths.
+    """
+    try:
+        x, y, count = decode_header(body)
+    except ValueError as exc:
+        raise BadRequest(str(exc))
+
+    if not -100000 <= x <= 100000:
+        raise BadRequest(f"x value out of bounds: {x}")
+    if not -100000 <= y <= 100000:
+        raise BadRequest(f"y value out of bounds: {y}")
+
+    max_commands = max(config.MAX_COMMANDS, config.LARGE_PATH_MAX_COMMANDS)
+    if count > max_commands:
+        raise BadRequest(
+            f"Number of commands should be lower than {max_commands}: {count}"  # noqa
+        )
+
+    try:
+        check_size(body, count)
+    except ValueError as exc:
+        raise BadRequest(str(exc))
+
+    commands = np.frombuffer(
+        memoryview(body), dtype=COMMAND_DTYPE, count=count, offset=HEADER.size
+    )
+    directions = commands["direction"]
+    steps = commands["steps"]
+
+    invalid = np.flatnonzero(directions >= len(DIRECTIONS))
+    if len(invalid):
+        raise BadRequest(
+            f"Direction code of command {invalid[0]} should be one of: {tuple(range(len(DIRECTIONS)))}"  # noqa
+        )
+    invalid = np.flatnonzero((steps == 0) | (steps >= 100000))
+    if len(invalid):
+        raise BadRequest(
+            f"Steps value of command {invalid[0]} is out of bounds: {steps[invalid[0]]}"  # noqa
+        )
+
+    return PackedPath(x, y, directions, steps)
+
+
+def compute_path(
+    path: PackedPath,
+    engine_name: typing.Optional[str],
+) -> typing.Tuple[str, int]:
+    """
+    `robot_cleaner.api.clean.compute_path` for binary uploads. They are not
+    normalized, so they share the cached results of their json form only
+    when `NORMALIZE_COMMANDS` is off.
+    """
+    engine, calculate = select_engine(engine_name, path)
+    key = cache.commands_key(
+        path.directions.tobytes(), path.steps.astype(np.int64).tobytes()
+    )
+    result = cache.results.get(key)
+    if result is None:
+        result = workers.run(calculate, path)
+        cache.results.set(key, result)
+    return engine, result
+
+
+def select_engine(
+    name: typing.Optional[str],
+    path: PackedPath,
+) -> typing.Tuple[str, typing.Callable]:
+    """
+    Return the name and the function of the engine computing the binary
+    upload, among the `PACKED_ENGINES`. Defaults to `CLEANING_ENGINE` when
+    it is one of them, and to `auto` otherwise.
+    """
+    validate_engine_name(name)
+    if name is None:
+        name = (
+            config.CLEANING_ENGINE
+            if config.CLEANING_ENGINE in PACKED_ENGINES
+            else "auto"
+        )
+    if name not in PACKED_ENGINES:
+        raise BadRequest(
+            f"Engine {name} does not compute binary paths. Should be one of: {tuple(PACKED_ENGINES)}"  # noqa
+        )
+    if name == "auto":
+        # Engine modules import this module, import them on use only.
+        from robot_cleaner.engines.auto import choose_packed_engine
+
+        name = choose_packed_engine(path)
+
+    return name, get_engine(name, PACKED_ENGINES)
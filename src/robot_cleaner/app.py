@@ -1,3 +1,7 @@
+import sys
+import threading
+import typing
+
 from flask import Flask
 
 from robot_cleaner import auth
@@ -5,6 +9,10 @@ from robot_cleaner import routes
 from robot_cleaner import config
 
 
+_app: typing.Optional[Flask] = None
+_lock = threading.Lock()
+
+
 def create_app(is_production=False):
     app = Flask("robot_cleaner")
     app.config.from_pyfile("config.py")
@@ -14,5 +22,33 @@ def create_app(is_production=False):
     return app
 
 
-app = create_app(is_production=config.IS_PRODUCTION)
-application = app
+def get_app() -> Flask:
+    """
+    Return the application of this process, created on first use so that
+    importing the package (CLI, tests, workers) does not build it.
+    """
+    global _app
+
+    with _lock:
+        if _app is None:
+            _app = create_app(is_production=config.IS_PRODUCTION)
+        return _app
+
+
+def shutdown():
+    """
+    Shut the process pool of this process down, if it was started. Called
+    by the servers when a worker exits or reloads, so that its pool
+    processes never outlive it, on top of `atexit`.
+    """
+    # Processes which never used the pool did not import it.
+    workers = sys.modules.get("robot_cleaner.workers")
+    if workers is not None:
+        workers.shutdown()
+
+
+def __getattr__(name: str):
+    # `app` and `application` are created on first access.
+    if name in ("app", "application"):
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
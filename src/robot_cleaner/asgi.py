@@ -0,0 +1,65 @@
+"""
+ASGI entry point, served with e.g.
+`uvicorn robot_cleaner.asgi:application --workers 3`.
+
+The enter-path endpoint is served by the asyncio view of
+`robot_cleaner.api.clean_async`, every other request by the WSGI app in a
+thread pool.
+"""
+
+import contextlib
+
+import structlog
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.exceptions import HTTPException, InternalServerError
+
+from robot_cleaner import app, auth, config, db
+from robot_cleaner.api import clean, clean_async
+
+
+logger = structlog.get_logger()
+
+
+def create_app(is_production=False) -> Starlette:
+    wsgi_app = app.create_app(is_production=is_production)
+    authentication = auth.AuthMiddleware(None, is_production=is_production)
+
+    async def execute_cleaning(request: Request) -> Response:
+        try:
+            authentication.check(
+                request.url.path, request.headers.get("Authorization", "")
+            )
+            return await clean_async.execute_cleaning(request)
+        except HTTPException as exc:
+            return clean_async.error_response(exc)
+        except Exception:
+            logger.exception("Request failed", path=request.url.path)
+            return clean_async.error_response(InternalServerError())
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_):
+        # asynchronous executions, started in every server process
+        clean.get_job_queue().start()
+        yield
+        await db.dispose_async_engine()
+        app.shutdown()
+
+    return Starlette(
+        routes=[
+            Route(
+                "/tibber-developer-test/enter-path",
+                execute_cleaning,
+                methods=["POST"],
+            ),
+            Mount("/", app=WSGIMiddleware(wsgi_app)),
+        ],
+        lifespan=lifespan,
+    )
+
+
+application = create_app(is_production=config.IS_PRODUCTION)
@@ -1,3 +1,5 @@
+import typing
+
 import structlog
 
 from flask import Flask, request
@@ -10,21 +12,28 @@ logger = structlog.get_logger()
 
 
 class AuthMiddleware:
-    def __init__(self, app: Flask, is_production=True):
+    def __init__(self, app: typing.Optional[Flask], is_production=True):
         self.token = config.AUTH_API_KEY
         self.dev = not is_production
 
-        app.before_request(self.handle_auth)
+        # Without an app, requests are checked by calling `check`.
+        if app is not None:
+            app.before_request(self.handle_auth)
 
     def handle_auth(self):
+        self.check(request.path, request.headers.get("Authorization", ""))
+
+    def check(self, path: str, auth_header: str):
+        """
+        Raise `Unauthorized` unless `auth_header` holds the API token.
+        """
         if self.dev:
             logger.warning("Running in DEV mode. Skipping authentication!")
             return
 
-        if request.path == "/_health":
+        if path == "/_health":
             return
 
-        auth_header = request.headers.get("Authorization", "")
         if auth_header == "":
             raise Unauthorized("Empty authorization header!")
 
@@ -0,0 +1,120 @@
+import hashlib
+import threading
+import typing
+
+from array import array
+from collections import OrderedDict
+
+from robot_cleaner import config, metrics
+
+
+DIRECTIONS = ("north", "south", "east", "west")
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+
+# The 8 rotations/reflections of the grid, as the direction each of
+# `DIRECTIONS` is mapped to.
+SYMMETRIES = (
+    ("north", "south", "east", "west"),  # identity
+    ("west", "east", "north", "south"),  # rotate 90
+    ("south", "north", "west", "east"),  # rotate 180
+    ("east", "west", "south", "north"),  # rotate 270
+    ("north", "south", "west", "east"),  # mirror x
+    ("south", "north", "east", "west"),  # mirror y
+    ("east", "west", "north", "south"),  # transpose
+    ("west", "east", "south", "north"),  # anti-transpose
+)
+SYMMETRY_TABLES = tuple(
+    bytes.maketrans(
+        bytes(range(len(DIRECTIONS))),
+        bytes(DIRECTIONS.index(direction) for direction in symmetry),
+    )
+    for symmetry in SYMMETRIES
+)
+
+
+class LRUCache:
+    """
+    Thread-safe least recently used cache holding up to `maxsize` items.
+    Hits, misses and evictions are counted and reported by `stats`.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key: typing.Hashable, default=None):
+        with self.lock:
+            if key not in self.items:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def set(self, key: typing.Hashable, value):
+        if self.maxsize <= 0:
+            return
+
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.items),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def path_key(data: dict) -> bytes:
+    """
+    Return a hash of the canonical form of the path commands.
+    The number of unique places does not change when the path is translated,
+    rotated or mirrored, so the start coordinates are ignored and the
+    directions are mapped to the smallest of their 8 symmetric forms.
+    """
+    commands = data.get("commands")
+    directions = bytes(
+        DIRECTION_CODES[command.get("direction")] for command in commands
+    )
+    steps = array("q", (command.get("steps") for command in commands))
+    return commands_key(directions, steps.tobytes())
+
+
+def commands_key(directions: bytes, steps: bytes) -> bytes:
+    """
+    `path_key` of commands given as direction codes (one byte each, see
+    `DIRECTION_CODES`) and steps (native 64-bit integers).
+    """
+    canonical = min(directions.translate(table) for table in SYMMETRY_TABLES)
+    digest = hashlib.blake2b(canonical + steps, digest_size=16)
+    return digest.digest()
+
+
+results = LRUCache(config.RESULT_CACHE_SIZE)
+metrics.register("result_cache", results.stats)
+
+# Serialized finished executions and their ETags, by id.
+executions = LRUCache(config.EXECUTION_CACHE_SIZE)
+metrics.register("execution_cache", executions.stats)
+
+# When ids taken from the id sequence but not written yet were first polled.
+unwritten = LRUCache(config.EXECUTION_CACHE_SIZE)
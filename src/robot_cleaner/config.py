@@ -12,3 +12,117 @@ POSTGRES_PORT = os.getenv("POSTGRES_PORT")
 POSTGRES_DB = os.getenv("POSTGRES_DB")
 
 SQLALCHEMY_URI = f"postgresql+psycopg2://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"  # noqa
+# Used by the ASGI app, see `robot_cleaner.asgi`.
+ASYNC_SQLALCHEMY_URI = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"  # noqa
+# Connection pool of every process: DB_POOL_SIZE connections are kept open
+# and up to DB_MAX_OVERFLOW more are opened under load. A checkout waits up
+# to DB_POOL_TIMEOUT seconds for a free connection. Connections are replaced
+# after DB_POOL_RECYCLE seconds (-1 never) and, with DB_POOL_PRE_PING, tested
+# before use so that connections dropped by a database restart are replaced.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true") == "true"
+# Database calls are retried on operational errors, with exponential backoff
+# and full jitter, up to MAX_TRIES attempts within MAX_TIME seconds. Writes
+# of computed results have their own budget (DB_PERSIST_*).
+DB_RETRY_MAX_TRIES = int(os.getenv("DB_RETRY_MAX_TRIES", "3"))
+DB_RETRY_MAX_TIME = float(os.getenv("DB_RETRY_MAX_TIME", "30"))
+DB_PERSIST_MAX_TRIES = int(os.getenv("DB_PERSIST_MAX_TRIES", "5"))
+DB_PERSIST_MAX_TIME = float(os.getenv("DB_PERSIST_MAX_TIME", "30"))
+
+# LIMITS
+MAX_COMMANDS = int(os.getenv("MAX_COMMANDS", "10000"))
+# Paths with more than MAX_COMMANDS commands are accepted up to this limit and
+# computed by the bounded-memory `external` engine.
+LARGE_PATH_MAX_COMMANDS = int(os.getenv("LARGE_PATH_MAX_COMMANDS", "5000000"))
+LARGE_PATH_MEMORY_BUDGET = int(
+    os.getenv("LARGE_PATH_MEMORY_BUDGET", str(64 * 1024 * 1024))
+)
+# The `external` engine computes 30k to 70k commands per second, so paths
+# near LARGE_PATH_MAX_COMMANDS take up to 3 minutes. Its tasks wait for
+# LARGE_PATH_TASK_TIMEOUT seconds instead of WORKER_TASK_TIMEOUT, keep it
+# below JOB_STALE_AFTER.
+LARGE_PATH_TASK_TIMEOUT = float(os.getenv("LARGE_PATH_TASK_TIMEOUT", "300"))
+# Paths and commands accepted by one batch request.
+MAX_BATCH_PATHS = int(os.getenv("MAX_BATCH_PATHS", "1000"))
+MAX_BATCH_COMMANDS = int(os.getenv("MAX_BATCH_COMMANDS", "1000000"))
+# Executions per page of the executions listing.
+LIST_DEFAULT_LIMIT = int(os.getenv("LIST_DEFAULT_LIMIT", "100"))
+LIST_MAX_LIMIT = int(os.getenv("LIST_MAX_LIMIT", "1000"))
+# json paths of at least JSON_STREAM_MIN_LENGTH bytes, or of unknown length,
+# are parsed while they are read, see `robot_cleaner.api.jsonstream`. Set it
+# to 0 to read every body before parsing it.
+JSON_STREAM_MIN_LENGTH = int(os.getenv("JSON_STREAM_MIN_LENGTH", "1048576"))
+# Streamed executions are persisted every STREAM_FLUSH_SIZE paths or
+# STREAM_FLUSH_INTERVAL seconds.
+STREAM_FLUSH_SIZE = int(os.getenv("STREAM_FLUSH_SIZE", "50"))
+STREAM_FLUSH_INTERVAL = float(os.getenv("STREAM_FLUSH_INTERVAL", "0.5"))
+
+# ENGINE
+# Coalesce and fold the commands of every path before its calculation.
+NORMALIZE_COMMANDS = os.getenv("NORMALIZE_COMMANDS", "true") == "true"
+# Default engine for unique places calculation, see `robot_cleaner.engines`.
+CLEANING_ENGINE = os.getenv("CLEANING_ENGINE", "auto")
+# Sweep used by the python engine to count intersections, see
+# `robot_cleaner.api.clean.SWEEPS`.
+CLEANING_SWEEP = os.getenv("CLEANING_SWEEP", "sortedlist")
+# The `auto` engine computes paths in a grid when their bounding box holds
+# at most BITMAP_MAX_CELLS places and BITMAP_CELLS_PER_COMMAND per command.
+BITMAP_MAX_CELLS = int(os.getenv("BITMAP_MAX_CELLS", "4000000"))
+BITMAP_CELLS_PER_COMMAND = int(os.getenv("BITMAP_CELLS_PER_COMMAND", "200"))
+
+# WORKERS
+# Process pool for expensive paths, see `robot_cleaner.workers`.
+# Set WORKER_POOL_SIZE to 0 to compute every path inline.
+WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL_SIZE", "2"))
+WORKER_MAX_TASKS_PER_CHILD = int(
+    os.getenv("WORKER_MAX_TASKS_PER_CHILD", "100"),
+)
+WORKER_TASK_TIMEOUT = float(os.getenv("WORKER_TASK_TIMEOUT", "30"))
+# Paths with an estimated cost below WORKER_MIN_COST are computed inline.
+WORKER_MIN_COST = int(os.getenv("WORKER_MIN_COST", "5000"))
+WORKER_STEPS_PER_UNIT = int(os.getenv("WORKER_STEPS_PER_UNIT", "10000"))
+# Stripes swept in parallel by the `parallel` engine, defaults to one per
+# pool worker. Fewer merged segments than PARALLEL_MIN_SEGMENTS are swept
+# inline: json paths only reach it above MAX_COMMANDS commands, when the
+# engine is requested explicitly (the default is the `external` engine).
+PARALLEL_STRIPES = int(os.getenv("PARALLEL_STRIPES", "0"))
+PARALLEL_MIN_SEGMENTS = int(os.getenv("PARALLEL_MIN_SEGMENTS", "100000"))
+if PARALLEL_STRIPES > 1 and WORKER_POOL_SIZE <= 0:
+    raise ValueError("PARALLEL_STRIPES requires a WORKER_POOL_SIZE above 0")
+
+# CACHE
+# Number of path results kept in memory, 0 disables the cache.
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+# Number of serialized executions kept in memory, 0 disables the cache.
+EXECUTION_CACHE_SIZE = int(os.getenv("EXECUTION_CACHE_SIZE", "10000"))
+
+# JOBS
+# Asynchronous executions, see `robot_cleaner.jobs`. Paths with an estimated
+# cost of at least ASYNC_MIN_COST are always computed asynchronously (0 to
+# only do it on request).
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "1000"))
+JOB_THREADS = int(os.getenv("JOB_THREADS", "2"))
+# Running jobs not finished after JOB_STALE_AFTER seconds are run again.
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "600"))
+ASYNC_MIN_COST = int(os.getenv("ASYNC_MIN_COST", "0"))
+
+# RECORDER
+# Write executions of the enter-path endpoint behind the response, in
+# batches, see `robot_cleaner.recorder`.
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "false") == "true"
+RECORDER_QUEUE_SIZE = int(os.getenv("RECORDER_QUEUE_SIZE", "10000"))
+# A batch is written once it holds RECORDER_BATCH_SIZE executions or its
+# first one waited RECORDER_MAX_AGE seconds.
+RECORDER_BATCH_SIZE = int(os.getenv("RECORDER_BATCH_SIZE", "500"))
+RECORDER_MAX_AGE = float(os.getenv("RECORDER_MAX_AGE", "0.1"))
+# Seconds a request waits for room in a full queue before a 503.
+RECORDER_PUT_TIMEOUT = float(os.getenv("RECORDER_PUT_TIMEOUT", "1"))
+RECORDER_ID_BLOCK = int(os.getenv("RECORDER_ID_BLOCK", "100"))
+# Seconds an execution recorded by another process may take to be written:
+# polled ids not written by then are not found (the rest of an id block,
+# dropped executions, rolled back inserts).
+RECORDER_MAX_DELAY = float(os.getenv("RECORDER_MAX_DELAY", "30"))
+RECORDER_SHUTDOWN_TIMEOUT = float(os.getenv("RECORDER_SHUTDOWN_TIMEOUT", "30"))
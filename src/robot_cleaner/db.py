@@ -1,31 +1,215 @@
+import threading
+import time
+import typing
+
 import backoff
 
 from functools import wraps
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import OperationalError, TimeoutError
+from sqlalchemy.pool import QueuePool
+
+from robot_cleaner import config, metrics
+
+if typing.TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    Queue pool measuring how long checkouts take, waiting for a free
+    connection or opening a new one. Timings are shared by the pools
+    recreated on `Engine.dispose()`.
+    """
 
-from robot_cleaner import config
+    lock = threading.Lock()
+    counts = {"checkouts": 0, "timeouts": 0, "wait_time": 0.0, "max_wait": 0.0}
 
+    def connect(self):
+        started = time.monotonic()
+        timed_out = False
+        try:
+            return super().connect()
+        except TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self._record(time.monotonic() - started, timed_out)
 
-engine = create_engine(config.SQLALCHEMY_URI)
-Session = sessionmaker(engine)
+    @classmethod
+    def _record(cls, elapsed: float, timed_out: bool):
+        with cls.lock:
+            cls.counts["checkouts"] += 1
+            cls.counts["timeouts"] += timed_out
+            cls.counts["wait_time"] += elapsed
+            cls.counts["max_wait"] = max(cls.counts["max_wait"], elapsed)
 
 
-def db_session(func):
+def pool_stats() -> dict:
+    pool = get_engine().pool
+    with InstrumentedQueuePool.lock:
+        counts = dict(InstrumentedQueuePool.counts)
+    checkouts = counts.pop("checkouts")
+    wait_time = counts.pop("wait_time")
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "checkouts": checkouts,
+        **counts,
+        "avg_wait": wait_time / checkouts if checkouts else 0,
+    }
+
+
+_engine: typing.Optional[Engine] = None
+_session: typing.Optional[sessionmaker] = None
+_async_session: typing.Optional["async_sessionmaker"] = None
+_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
     """
-    Use this decorator to pass a session object to the wrapped `func`.
+    Return the engine of this process, creating it on first use so that
+    importing the package does not load the database driver and forked
+    web server workers each get their own pool.
     """
+    global _engine
+
+    with _lock:
+        if _engine is None:
+            _engine = create_engine(
+                config.SQLALCHEMY_URI,
+                poolclass=InstrumentedQueuePool,
+                pool_size=config.DB_POOL_SIZE,
+                max_overflow=config.DB_MAX_OVERFLOW,
+                pool_timeout=config.DB_POOL_TIMEOUT,
+                pool_recycle=config.DB_POOL_RECYCLE,
+                pool_pre_ping=config.DB_POOL_PRE_PING,
+            )
+        return _engine
+
+
+def get_session() -> sessionmaker:
+    """
+    Return the session factory bound to `get_engine()`.
+    """
+    global _session
+
+    engine = get_engine()
+    with _lock:
+        if _session is None:
+            _session = sessionmaker(engine)
+        return _session
+
+
+def __getattr__(name: str):
+    # `engine` and `Session` are created on first access.
+    if name == "engine":
+        return get_engine()
+    if name == "Session":
+        return get_session()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+metrics.register("db_pool", pool_stats)
+
+retry_metrics = metrics.Counters("db_retries", "retries", "giveups")
+
+
+def _on_backoff(details):
+    retry_metrics.inc("retries")
+    retry_metrics.inc(f"{details['target'].__name__}.retries")
+
+
+def _on_giveup(details):
+    retry_metrics.inc("giveups")
+    retry_metrics.inc(f"{details['target'].__name__}.giveups")
 
-    @backoff.on_exception(
+
+def _retry(persist: bool):
+    prefix = "DB_PERSIST" if persist else "DB_RETRY"
+    return backoff.on_exception(
         backoff.expo,
         OperationalError,
-        max_tries=3,
-        max_time=30,
+        max_tries=lambda: getattr(config, f"{prefix}_MAX_TRIES"),
+        max_time=lambda: getattr(config, f"{prefix}_MAX_TIME"),
+        jitter=backoff.full_jitter,
+        on_backoff=_on_backoff,
+        on_giveup=_on_giveup,
     )
+
+
+def db_session(func=None, *, persist=False):
+    """
+    Use this decorator to pass a session object to the wrapped `func`.
+    The whole call is retried on operational errors, so it should only
+    hold database work: functions writing computed results are decorated
+    with `persist=True` and get the `DB_PERSIST_*` retry budget.
+    """
+    if func is None:
+        return lambda func: db_session(func, persist=persist)
+
+    @_retry(persist)
     @wraps(func)
     def wrapper(*args, **kwargs):
-        with Session() as session:
+        with get_session()() as session:
             return func(*args, session=session, **kwargs)
 
     return wrapper
+
+
+def get_async_session() -> "async_sessionmaker":
+    """
+    Return the session factory of the asyncpg engine of this process, used
+    by the ASGI app. Both are created on first use, with the pool settings
+    of `get_engine()`.
+    """
+    global _async_session
+
+    # Loads the asyncio extension and its greenlet dependency on use only.
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    with _lock:
+        if _async_session is None:
+            engine = create_async_engine(
+                config.ASYNC_SQLALCHEMY_URI,
+                pool_size=config.DB_POOL_SIZE,
+                max_overflow=config.DB_MAX_OVERFLOW,
+                pool_timeout=config.DB_POOL_TIMEOUT,
+                pool_recycle=config.DB_POOL_RECYCLE,
+                pool_pre_ping=config.DB_POOL_PRE_PING,
+            )
+            _async_session = async_sessionmaker(engine)
+        return _async_session
+
+
+async def dispose_async_engine():
+    """
+    Close the connections of the asyncpg engine, which belong to the
+    running event loop, and drop it.
+    """
+    global _async_session
+
+    with _lock:
+        session, _async_session = _async_session, None
+    if session is not None:
+        await session.kw["bind"].dispose()
+
+
+def async_db_session(func=None, *, persist=False):
+    """
+    `db_session` for coroutine functions, passing an `AsyncSession`.
+    """
+    if func is None:
+        return lambda func: async_db_session(func, persist=persist)
+
+    @_retry(persist)
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with get_async_session()() as session:
+            return await func(*args, session=session, **kwargs)
+
+    return wrapper
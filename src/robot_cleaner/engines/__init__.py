@@ -0,0 +1,57 @@
+import importlib
+import typing
+
+
+# Engine name -> "module:function". Modules are imported on first use so
+# optional dependencies (e.g. numpy) are only loaded when actually selected.
+ENGINES = {
+    "auto": "robot_cleaner.engines.auto:calculate_unique_places",
+    "bitmap": "robot_cleaner.engines.bitmap:calculate_unique_places",
+    "python": "robot_cleaner.api.clean:calculate_unique_places",
+    "columnar": "robot_cleaner.engines.columnar:calculate_unique_places",
+    "external": "robot_cleaner.engines.external:calculate_unique_places",
+    "incremental": "robot_cleaner.engines.incremental:calculate_unique_places",  # noqa
+    "numpy": "robot_cleaner.engines.vectorized:calculate_unique_places",
+    "parallel": "robot_cleaner.engines.parallel:calculate_unique_places",
+    "periodic": "robot_cleaner.engines.periodic:calculate_unique_places",
+}
+
+# Engines computing binary uploads (`robot_cleaner.api.packed.PackedPath`)
+# from their arrays, without building an object per command.
+PACKED_ENGINES = {
+    "auto": "robot_cleaner.engines.auto:calculate_unique_places_packed",
+    "bitmap": "robot_cleaner.engines.bitmap:calculate_unique_places_packed",
+    "numpy": "robot_cleaner.engines.vectorized:calculate_unique_places_packed",  # noqa
+}
+
+# Engines computing the segments built while validating json paths
+# (`robot_cleaner.api.clean.Decomposition`).
+DECOMPOSED_ENGINES = {
+    "bitmap": "robot_cleaner.engines.bitmap:calculate_unique_places_decomposed",  # noqa
+    "columnar": "robot_cleaner.engines.columnar:calculate_unique_places_decomposed",  # noqa
+    "numpy": "robot_cleaner.engines.vectorized:calculate_unique_places_decomposed",  # noqa
+    "parallel": "robot_cleaner.engines.parallel:calculate_unique_places_decomposed",  # noqa
+    "periodic": "robot_cleaner.engines.periodic:calculate_unique_places_decomposed",  # noqa
+}
+
+# Engines submitting their own tasks to the process pool. They run in the
+# request process: in a pool worker, they would compute everything inline.
+PARALLEL_ENGINES = ("parallel",)
+
+
+def get_engine(
+    name: str,
+    engines: typing.Dict[str, str] = ENGINES,
+) -> typing.Callable:
+    """
+    Return the `calculate_unique_places` implementation registered as `name`
+    in `engines`.
+    """
+    if name not in engines:
+        raise ValueError(
+            f"Unknown engine: {name}. Should be one of: {tuple(engines)}",
+        )
+
+    module_name, function_name = engines[name].split(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name)
@@ -0,0 +1,114 @@
+"""
+Engine dispatcher picking an engine for every path.
+
+The grid of the bitmap engine costs about one command's worth of segment
+sorting for every `BITMAP_CELLS_PER_COMMAND` cells of the bounding box, so
+compact paths are marked in a grid. A path of S steps fits in a box of at
+most (S // 2 + 1) * (S - S // 2 + 1) places, so short paths are sent to the
+grid without walking their commands for the bounds. Paths whose repeated
+blocks are worth extrapolating go to the periodic engine, the others to
+the numpy engine, which computes the segments of validated json paths in
+place. Paths above `MAX_COMMANDS` go to the bounded-memory engine. Binary
+uploads are computed by the bitmap or the numpy engine, which both work on
+their arrays.
+"""
+
+import typing
+
+from robot_cleaner import config
+from robot_cleaner.api.clean import (
+    CommandList,
+    Decomposition,
+    MovingPath,
+)
+from robot_cleaner.api.packed import PackedPath
+from robot_cleaner.engines import PACKED_ENGINES, bitmap, get_engine, periodic
+
+
+def calculate_unique_places(data: MovingPath):
+    """
+    Return the number of unique vertices the robot's path followed.
+    """
+    return get_engine(choose_engine(data))(data)
+
+
+def choose_engine(
+    data: MovingPath,
+    decomposition: typing.Optional[Decomposition] = None,
+) -> str:
+    """
+    Return the name of the engine computing `data` the fastest, given its
+    `decomposition` (total steps and bounds) when it is known already.
+    """
+    commands = data.get("commands")
+    if len(commands) > config.MAX_COMMANDS:
+        return "external"
+
+    if decomposition is None:
+        total_steps = count_steps(commands)
+    else:
+        total_steps = decomposition.total_steps
+    if fits_bitmap(max_area(total_steps), len(commands)):
+        return "bitmap"
+
+    if decomposition is None:
+        bounds = bitmap.path_bounds(commands)
+    else:
+        bounds = decomposition.bounds
+    if fits_bitmap(bounds.area, len(commands)):
+        return "bitmap"
+
+    if decomposition is not None and decomposition.steps is not None:
+        # Read from the arrays of the validated commands.
+        commands = CommandList(decomposition.directions, decomposition.steps)
+    if periodic.split_path(commands) is not None:
+        return "periodic"
+    return "numpy"
+
+
+def calculate_unique_places_packed(path: PackedPath):
+    """
+    Same as `calculate_unique_places` for a binary upload.
+    """
+    return get_engine(choose_packed_engine(path), PACKED_ENGINES)(path)
+
+
+def choose_packed_engine(path: PackedPath) -> str:
+    """
+    Return the name of the engine computing the binary upload `path` the
+    fastest.
+    """
+    if fits_bitmap(max_area(path.total_steps), path.commands):
+        return "bitmap"
+
+    bounds = bitmap.array_bounds(path.directions, path.steps)
+    if fits_bitmap(bounds.area, path.commands):
+        return "bitmap"
+
+    return "numpy"
+
+
+def fits_bitmap(area: int, commands: int) -> bool:
+    """
+    Whether a grid of `area` places is cheaper than sorting the segments of
+    `commands` commands.
+    """
+    return area <= min(
+        config.BITMAP_MAX_CELLS, config.BITMAP_CELLS_PER_COMMAND * commands
+    )
+
+
+def max_area(total_steps: int) -> int:
+    """
+    Return the largest bounding box area of a path of `total_steps` steps,
+    whose width and height add up to at most `total_steps` + 2 places.
+    """
+    width = total_steps // 2 + 1
+    return width * (total_steps - width + 2)
+
+
+def count_steps(commands: typing.Sequence) -> int:
+    if hasattr(commands, "steps"):
+        # `CommandList`, summed without building the commands.
+        return sum(commands.steps)
+    return sum(command.get("steps") for command in commands)
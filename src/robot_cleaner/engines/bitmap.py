@@ -0,0 +1,177 @@
+"""
+Dense grid engine for paths that stay inside a small bounding box.
+
+Every cleaned place is marked in a boolean grid covering the bounding box of
+the path and the marked places are counted at once. Segments are marked
+through a difference grid: +1 where a segment starts and -1 past its end on
+its line, so a cumulative sum along the lines covers all of them in a single
+pass. The work depends on the commands and the box area, not on how much the
+path overlaps itself.
+
+Grids above `BITMAP_MAX_CELLS` places, for paths sent to this engine
+explicitly, are not allocated: their segments are counted by the numpy
+engine instead.
+"""
+
+import typing
+
+import numpy as np
+
+from robot_cleaner import config
+from robot_cleaner.api.clean import (
+    Bounds,
+    Decomposition,
+    Directions,
+    MOVE_MAP,
+    MovingPath,
+)
+from robot_cleaner.api.packed import PackedPath
+from robot_cleaner.engines import vectorized
+
+
+def calculate_unique_places(data: MovingPath):
+    """
+    Return the number of unique vertices the robot's path followed.
+    """
+    commands = data.get("commands")
+    codes = vectorized.DIRECTION_CODES
+    directions = np.fromiter(
+        (codes[command.get("direction")] for command in commands),
+        dtype=np.int8,
+        count=len(commands),
+    )
+    steps = np.fromiter(
+        (command.get("steps") for command in commands),
+        dtype=np.int64,
+        count=len(commands),
+    )
+    return calculate_unique_places_arrays(directions, steps)
+
+
+def calculate_unique_places_packed(path: PackedPath):
+    """
+    Same as `calculate_unique_places` for a binary upload.
+    """
+    return calculate_unique_places_arrays(path.directions, path.steps)
+
+
+def calculate_unique_places_arrays(directions: np.ndarray, steps: np.ndarray):
+    """
+    Same as `calculate_unique_places` for a path given as arrays of
+    direction codes and steps. The start does not change the result.
+    """
+    if len(directions) == 0:
+        return 1
+
+    horizontal, vertical = vectorized.divide_path(0, 0, directions, steps)
+
+    min_x = min(horizontal[1].min(initial=0), vertical[0].min(initial=0))
+    max_x = max(horizontal[2].max(initial=0), vertical[0].max(initial=0))
+    min_y = min(horizontal[0].min(initial=0), vertical[1].min(initial=0))
+    max_y = max(horizontal[0].max(initial=0), vertical[2].max(initial=0))
+    bounds = Bounds(min_x, max_x, min_y, max_y)
+    return count_places(horizontal, vertical, bounds)
+
+
+def calculate_unique_places_decomposed(decomposition: Decomposition):
+    """
+    Same as `calculate_unique_places` for the segments of validated request
+    data, read in place.
+    """
+    if decomposition.commands == 0:
+        return 1
+
+    return count_places(
+        vectorized.store_arrays(decomposition.horizontal),
+        vectorized.store_arrays(decomposition.vertical),
+        decomposition.bounds,
+    )
+
+
+def count_places(
+    horizontal: typing.Tuple[np.ndarray, np.ndarray, np.ndarray],
+    vertical: typing.Tuple[np.ndarray, np.ndarray, np.ndarray],
+    bounds: Bounds,
+) -> int:
+    """
+    Return the number of places covered by (fixed, low, high) segments
+    inside `bounds`.
+    """
+    if bounds.area > config.BITMAP_MAX_CELLS:
+        return vectorized.count_unique_places(horizontal, vertical)
+
+    min_x, max_x, min_y, max_y = (int(value) for value in bounds)
+    shape = (max_y - min_y + 1, max_x - min_x + 1)
+
+    grid = mark(shape, horizontal, (min_y, min_x), axis=1)
+    grid |= mark(shape, vertical, (min_x, min_y), axis=0)
+
+    return int(np.count_nonzero(grid))
+
+
+def mark(
+    shape: typing.Tuple[int, int],
+    segments: typing.Tuple[np.ndarray, np.ndarray, np.ndarray],
+    offsets: typing.Tuple[int, int],
+    axis: int,
+) -> np.ndarray:
+    """
+    Return a boolean grid of `shape` with the places covered by
+    (fixed, low, high) segments set. The segments run along `axis` and
+    their coordinates are shifted by `offsets` (fixed, low/high).
+    """
+    fixed, low, high = segments
+    fixed = fixed - offsets[0]
+    low = low - offsets[1]
+    high = high - offsets[1] + 1
+
+    diff_shape = list(shape)
+    diff_shape[axis] += 1
+    diff = np.zeros(diff_shape, dtype=np.int32)
+    if axis == 1:
+        np.add.at(diff, (fixed, low), 1)
+        np.add.at(diff, (fixed, high), -1)
+    else:
+        np.add.at(diff, (low, fixed), 1)
+        np.add.at(diff, (high, fixed), -1)
+
+    np.cumsum(diff, axis=axis, out=diff)
+    covered = diff[:, :-1] if axis == 1 else diff[:-1]
+    return covered > 0
+
+
+def path_bounds(commands: typing.List[Directions]) -> Bounds:
+    """
+    Return the bounding box of the path of `commands` starting at (0, 0).
+    """
+    x = y = min_x = max_x = min_y = max_y = 0
+    for command in commands:
+        dx, dy = MOVE_MAP[command.get("direction")]
+        steps = command.get("steps")
+        x += dx * steps
+        y += dy * steps
+        if x < min_x:
+            min_x = x
+        elif x > max_x:
+            max_x = x
+        if y < min_y:
+            min_y = y
+        elif y > max_y:
+            max_y = y
+
+    return Bounds(min_x, max_x, min_y, max_y)
+
+
+def array_bounds(directions: np.ndarray, steps: np.ndarray) -> Bounds:
+    """
+    Same as `path_bounds` for arrays of direction codes and steps.
+    """
+    steps = np.asarray(steps, dtype=np.int64)
+    xs = np.cumsum(vectorized.DX[directions] * steps)
+    ys = np.cumsum(vectorized.DY[directions] * steps)
+    return Bounds(
+        int(xs.min(initial=0)),
+        int(xs.max(initial=0)),
+        int(ys.min(initial=0)),
+        int(ys.max(initial=0)),
+    )
@@ -0,0 +1,152 @@
+"""
+Pure-Python engine working on columnar segment stores.
+
+Instead of `((x1, y1), (x2, y2))` tuples, every family of segments lives in
+three parallel typed arrays that are filled by the path decomposition and
+then merged and counted in place.
+"""
+
+from robot_cleaner.api.clean import (
+    Decomposition,
+    MOVE_MAP,
+    MovingPath,
+    SegmentStore,
+    fenwick_sweep,
+)
+
+
+def calculate_unique_places(data: MovingPath):
+    """
+    Return the number of unique vertices the robot's path followed.
+    """
+    if len(data.get("commands")) == 0:
+        return 1
+
+    horizontal, vertical = divide_path(data)
+    return count_unique_places(horizontal, vertical)
+
+
+def calculate_unique_places_decomposed(decomposition: Decomposition):
+    """
+    Same as `calculate_unique_places` for the segments of validated request
+    data, which are merged in place.
+    """
+    if decomposition.commands == 0:
+        return 1
+
+    return count_unique_places(
+        decomposition.horizontal,
+        decomposition.vertical,
+    )
+
+
+def count_unique_places(horizontal: SegmentStore, vertical: SegmentStore):
+    """
+    Merge the given segment stores in place and count their unique vertices.
+    """
+    merge_overlapping(horizontal)
+    merge_overlapping(vertical)
+
+    common = count_intersections(vertical, horizontal)
+    total = count_points(vertical) + count_points(horizontal)
+
+    return total - common
+
+
+def divide_path(data: MovingPath):
+    """
+    Divide given path into stores of horizontal and vertical segments.
+    """
+    horizontal = SegmentStore()
+    vertical = SegmentStore()
+
+    x = data.get("start").get("x")
+    y = data.get("start").get("y")
+
+    for command in data.get("commands"):
+        dx, dy = MOVE_MAP[command.get("direction")]
+        steps = command.get("steps")
+
+        if dx == 0:
+            y_next = y + dy * steps
+            vertical.append(x, y, y_next)
+            y = y_next
+        else:
+            x_next = x + dx * steps
+            horizontal.append(y, x, x_next)
+            x = x_next
+
+    return horizontal, vertical
+
+
+def merge_overlapping(store: SegmentStore):
+    """
+    Merge overlapping or continuous segments on the same line, in place.
+    Segments are left sorted by (fixed, low).
+    """
+    n = len(store)
+    if n == 0:
+        return store
+
+    fixed, low, high = store.fixed, store.low, store.high
+
+    # Sort by one packed integer key: ((fixed, low) rank, original index).
+    fixed_min = min(fixed)
+    low_min = min(low)
+    span = max(high) - low_min + 1
+    keys = [
+        ((f - fixed_min) * span + (lo - low_min)) * n + i
+        for i, (f, lo) in enumerate(zip(fixed, low))
+    ]
+    keys.sort()
+    # `high` is the only column that cannot be recovered from the keys, and
+    # it gets overwritten while merging.
+    original_high = high[:]
+
+    count = -1
+    for key in keys:
+        packed, i = divmod(key, n)
+        line, offset = divmod(packed, span)
+        f = line + fixed_min
+        lo = offset + low_min
+        hi = original_high[i]
+
+        if count >= 0 and fixed[count] == f and lo <= high[count]:
+            if hi > high[count]:
+                high[count] = hi
+            continue
+
+        count += 1
+        fixed[count] = f
+        low[count] = lo
+        high[count] = hi
+
+    size = count + 1
+    del fixed[size:]
+    del low[size:]
+    del high[size:]
+    return store
+
+
+def count_intersections(vertical: SegmentStore, horizontal: SegmentStore):
+    """
+    Count intersections between merged vertical and horizontal segments.
+    """
+    if len(vertical) == 0 or len(horizontal) == 0:
+        return 0
+
+    return fenwick_sweep(
+        vertical.fixed,
+        vertical.low,
+        vertical.high,
+        horizontal.fixed,
+        horizontal.low,
+        horizontal.high,
+    )
+
+
+def count_points(store: SegmentStore):
+    """
+    Count number of vertices of merged segments.
+    """
+    return sum(store.high) - sum(store.low) + len(store)
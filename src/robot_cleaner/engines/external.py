@@ -0,0 +1,202 @@
+"""
+Bounded-memory engine for very large paths.
+
+Segments are sorted externally: they are buffered in chunks that fit the
+memory budget, and each chunk is sorted and spilled to a temporary file as a
+sorted run. Runs are merged back as streams, so the merged segments, the
+point count and the intersection sweep never need the whole path in memory
+at once.
+"""
+
+import heapq
+import itertools
+import os
+import tempfile
+import typing
+
+from array import array
+
+from sortedcontainers import SortedList
+
+from robot_cleaner import config
+from robot_cleaner.api.clean import Directions, MOVE_MAP, MovingPath
+
+
+# Rough size of one buffered record: a tuple of three ints and its list slot.
+RECORD_SIZE = 150
+# Records read at once from every run while merging.
+READ_BLOCK = 4096
+
+H_START, VERTICAL, H_END = 0, 1, 2
+
+
+class ExternalSorter:
+    """
+    Sort fixed-width integer records that may not fit in memory.
+    Records are buffered up to `chunk_size` and spilled to sorted run files
+    in `directory`. `sorted()` streams all records back in order.
+    """
+
+    def __init__(self, directory: str, width: int, chunk_size: int):
+        self.directory = directory
+        self.width = width
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.runs = []
+
+    def add(self, record: typing.Tuple[int, ...]):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.chunk_size:
+            self._spill()
+
+    def sorted(self) -> typing.Iterator[typing.Tuple[int, ...]]:
+        if not self.runs:
+            self.buffer.sort()
+            return iter(self.buffer)
+
+        self._spill()
+        return heapq.merge(*(self._read(run) for run in self.runs))
+
+    def _spill(self):
+        if not self.buffer:
+            return
+
+        self.buffer.sort()
+        run = os.path.join(self.directory, f"run-{id(self)}-{len(self.runs)}")
+        with open(run, "wb") as f:
+            array("q", itertools.chain.from_iterable(self.buffer)).tofile(f)
+        self.runs.append(run)
+        self.buffer = []
+
+    def _read(self, run: str):
+        width = self.width
+        with open(run, "rb") as f:
+            while True:
+                block = array("q")
+                try:
+                    block.fromfile(f, READ_BLOCK * width)
+                except EOFError:
+                    pass
+                yield from zip(*[iter(block)] * width)
+                if len(block) < READ_BLOCK * width:
+                    return
+
+
+def calculate_unique_places(data: MovingPath, memory_budget=None):
+    """
+    Return the number of unique vertices the robot's path followed.
+    """
+    start = data.get("start")
+    return count_unique_places(
+        start.get("x"),
+        start.get("y"),
+        data.get("commands"),
+        memory_budget=memory_budget,
+    )
+
+
+def count_unique_places(
+    x: int,
+    y: int,
+    commands: typing.Iterable[Directions],
+    memory_budget: typing.Optional[int] = None,
+):
+    """
+    Same as `calculate_unique_places` for a start position and an iterable
+    of commands, which is only walked once.
+    `memory_budget` (bytes) defaults to the `LARGE_PATH_MEMORY_BUDGET` setting.
+    """
+    memory_budget = memory_budget or config.LARGE_PATH_MEMORY_BUDGET
+    # At most two sorters buffer records at the same time.
+    chunk_size = max(1024, memory_budget // 2 // RECORD_SIZE)
+
+    with tempfile.TemporaryDirectory(prefix="robot-cleaner-") as directory:
+        horizontal = ExternalSorter(directory, 3, chunk_size)
+        vertical = ExternalSorter(directory, 3, chunk_size)
+
+        has_commands = False
+        for command in commands:
+            has_commands = True
+            dx, dy = MOVE_MAP[command.get("direction")]
+            steps = command.get("steps")
+            if dx == 0:
+                y_next = y + dy * steps
+                vertical.add((x, min(y, y_next), max(y, y_next)))
+                y = y_next
+            else:
+                x_next = x + dx * steps
+                horizontal.add((y, min(x, x_next), max(x, x_next)))
+                x = x_next
+
+        if not has_commands:
+            return 1
+
+        total = 0
+
+        # Horizontal segments are needed again ordered by x for the sweep.
+        starts = ExternalSorter(directory, 2, chunk_size)
+        ends = ExternalSorter(directory, 2, chunk_size)
+        for row, low, high in merge_runs(horizontal.sorted()):
+            total += high - low + 1
+            starts.add((low, row))
+            ends.add((high, row))
+
+        # Merged vertical segments come out ordered by x already.
+        merged_vertical = ExternalSorter(directory, 3, chunk_size)
+        for column, low, high in merge_runs(vertical.sorted()):
+            total += high - low + 1
+            merged_vertical.add((column, low, high))
+
+        common = sweep(
+            starts.sorted(),
+            merged_vertical.sorted(),
+            ends.sorted(),
+        )
+
+    return total - common
+
+
+def merge_runs(segments: typing.Iterator[typing.Tuple[int, int, int]]):
+    """
+    Merge overlapping or continuous segments of a stream sorted by
+    (fixed, low).
+    """
+    current = None
+    for fixed, low, high in segments:
+        if current is not None and current[0] == fixed and low <= current[2]:
+            if high > current[2]:
+                current = (fixed, current[1], high)
+            continue
+        if current is not None:
+            yield current
+        current = (fixed, low, high)
+
+    if current is not None:
+        yield current
+
+
+def sweep(starts, verticals, ends):
+    """
+    Sweep Line Algorithm over streams of horizontal starts (x, y), vertical
+    segments (x, low, high) and horizontal ends (x, y), each sorted by x.
+    Only the horizontal segments crossing the sweep line are kept in memory.
+    """
+    events = heapq.merge(
+        ((x, H_START, y, y) for x, y in starts),
+        ((x, VERTICAL, low, high) for x, low, high in verticals),
+        ((x, H_END, y, y) for x, y in ends),
+    )
+
+    active = SortedList()
+    num_intersections = 0
+
+    for _, event_type, low, high in events:
+        if event_type == H_START:
+            active.add(low)
+        elif event_type == H_END:
+            active.remove(low)
+        else:
+            crossed = active.bisect_right(high) - active.bisect_left(low)
+            num_intersections += crossed
+
+    return num_intersections
@@ -0,0 +1,211 @@
+"""
+Incremental engine keeping a running unique places count.
+
+Commands are fed one at a time, e.g. while a robot reports its progress,
+and the count is always up to date without recomputing the whole path.
+"""
+
+import typing
+
+from sortedcontainers import SortedDict, SortedList
+
+from robot_cleaner.api.clean import Directions, MOVE_MAP, MovingPath
+
+
+class IntervalSet:
+    """
+    Disjoint integer intervals [low, high], kept sorted by their start.
+    Touching intervals are coalesced, so every line stays as compact as the
+    cells it covers allow.
+    """
+
+    def __init__(self):
+        self.intervals = SortedDict()
+
+    def __contains__(self, value: int):
+        index = self.intervals.bisect_right(value) - 1
+        if index < 0:
+            return False
+        low, high = self.intervals.peekitem(index)
+        return low <= value <= high
+
+    def add(self, low: int, high: int) -> typing.List[typing.Tuple[int, int]]:
+        """
+        Add [low, high] and return the sub-intervals that were not covered.
+        """
+        intervals = self.intervals
+        gaps = []
+        cursor = low
+
+        # Start from the interval touching `low` from the left, if any.
+        index = intervals.bisect_right(low) - 1
+        if index < 0 or intervals.peekitem(index)[1] < low - 1:
+            index += 1
+
+        new_low, new_high = low, high
+        while index < len(intervals):
+            start, end = intervals.peekitem(index)
+            if start > high + 1:
+                break
+            if start > cursor:
+                gaps.append((cursor, start - 1))
+            cursor = max(cursor, end + 1)
+            new_low = min(new_low, start)
+            new_high = max(new_high, end)
+            del intervals[start]
+
+        if cursor <= high:
+            gaps.append((cursor, high))
+
+        intervals[new_low] = new_high
+        return gaps
+
+
+class CoverageIndex:
+    """
+    Disjoint segments (fixed, low, high) counting the ones that cover a
+    given coordinate among the lines of a `fixed` range.
+
+    Lines are grouped in aligned blocks of 2 ** level lines, the nodes of an
+    implicit segment tree, and every block keeps the sorted ends of its
+    segments. A range of lines is made of a logarithmic number of blocks,
+    each answering with two bisections. Levels are added when a range wider
+    than the highest block is counted.
+    """
+
+    def __init__(self):
+        self.segments = []
+        self.blocks = []
+
+    def add(self, fixed: int, low: int, high: int):
+        self.segments.append((fixed, low, high))
+        for level, blocks in enumerate(self.blocks):
+            self._add_to_block(blocks, fixed >> level, low, high)
+
+    def count(self, low: int, high: int, value: int) -> int:
+        """
+        Return the number of segments on lines [low, high] covering
+        `value`.
+        """
+        total = 0
+        level = 0
+        while low <= high:
+            if level == len(self.blocks):
+                self._add_level()
+            blocks = self.blocks[level]
+            if low & 1:
+                total += self._count_in_block(blocks, low, value)
+                low += 1
+            if not high & 1:
+                total += self._count_in_block(blocks, high, value)
+                high -= 1
+            low >>= 1
+            high >>= 1
+            level += 1
+        return total
+
+    def _add_level(self):
+        level = len(self.blocks)
+        blocks = {}
+        for fixed, low, high in self.segments:
+            self._add_to_block(blocks, fixed >> level, low, high)
+        self.blocks.append(blocks)
+
+    @staticmethod
+    def _add_to_block(blocks: dict, key: int, low: int, high: int):
+        if key not in blocks:
+            blocks[key] = (SortedList(), SortedList())
+        lows, highs = blocks[key]
+        lows.add(low)
+        highs.add(high)
+
+    @staticmethod
+    def _count_in_block(blocks: dict, key: int, value: int) -> int:
+        if key not in blocks:
+            return 0
+        lows, highs = blocks[key]
+        # Segments starting at or before `value`, but not ending before it.
+        return lows.bisect_right(value) - highs.bisect_left(value)
+
+
+class IncrementalCleaner:
+    """
+    Running count of unique places for a path fed one command at a time.
+
+    Horizontal coverage is kept as an `IntervalSet` per row and vertical
+    coverage as one per column. A new segment only pays for the cells its
+    line did not cover yet: interval updates are logarithmic, and the new
+    cells already covered by perpendicular lines are counted by a
+    `CoverageIndex` of the cells each orientation added.
+    """
+
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+        self.commands = 0
+        self.unique_places = 0
+
+        self.rows = {}
+        self.columns = {}
+        self.row_index = CoverageIndex()
+        self.column_index = CoverageIndex()
+
+        self._cover(True, y, x, x)
+
+    @classmethod
+    def from_path(cls, data: MovingPath):
+        cleaner = cls(data.get("start").get("x"), data.get("start").get("y"))
+        for command in data.get("commands"):
+            cleaner.add(command)
+        return cleaner
+
+    def add(self, command: Directions) -> int:
+        """
+        Move the robot by `command` and return the updated count.
+        """
+        return self.move(command.get("direction"), command.get("steps"))
+
+    def move(self, direction: str, steps: int) -> int:
+        """
+        Move the robot `steps` places towards `direction`.
+        """
+        dx, dy = MOVE_MAP[direction]
+        x_next, y_next = self.x + dx * steps, self.y + dy * steps
+
+        if dx == 0:
+            low, high = sorted((self.y, y_next))
+            self._cover(False, self.x, low, high)
+        else:
+            low, high = sorted((self.x, x_next))
+            self._cover(True, self.y, low, high)
+
+        self.x, self.y = x_next, y_next
+        self.commands += 1
+        return self.unique_places
+
+    def _cover(self, horizontal: bool, fixed: int, low: int, high: int):
+        """
+        Cover [low, high] on row/column `fixed` and count the new cells,
+        skipping those already covered by a crossing column/row.
+        """
+        if horizontal:
+            lines, index = self.rows, self.row_index
+            crossing = self.column_index
+        else:
+            lines, index = self.columns, self.column_index
+            crossing = self.row_index
+
+        if fixed not in lines:
+            lines[fixed] = IntervalSet()
+
+        for gap_low, gap_high in lines[fixed].add(low, high):
+            covered = crossing.count(gap_low, gap_high, fixed)
+            self.unique_places += gap_high - gap_low + 1 - covered
+            index.add(fixed, gap_low, gap_high)
+
+
+def calculate_unique_places(data: MovingPath):
+    """
+    Return the number of unique vertices the robot's path followed.
+    """
+    return IncrementalCleaner.from_path(data).unique_places
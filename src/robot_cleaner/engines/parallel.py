@@ -0,0 +1,140 @@
+"""
+Columnar engine counting intersections on several cores.
+
+The plane is cut into vertical stripes holding about the same number of
+sweep events. Every stripe is swept in its own worker process and the counts
+are summed.
+"""
+
+import itertools
+import typing
+
+from bisect import bisect_right
+
+from robot_cleaner import config, workers
+from robot_cleaner.api.clean import (
+    Decomposition,
+    MovingPath,
+    SegmentStore,
+    fenwick_sweep,
+)
+from robot_cleaner.engines import columnar
+
+
+def calculate_unique_places(data: MovingPath):
+    """
+    Return the number of unique vertices the robot's path followed.
+    """
+    if len(data.get("commands")) == 0:
+        return 1
+
+    horizontal, vertical = columnar.divide_path(data)
+    return count_unique_places(horizontal, vertical)
+
+
+def calculate_unique_places_decomposed(decomposition: Decomposition):
+    """
+    Same as `calculate_unique_places` for the segments of validated request
+    data, which are merged in place.
+    """
+    if decomposition.commands == 0:
+        return 1
+
+    return count_unique_places(
+        decomposition.horizontal,
+        decomposition.vertical,
+    )
+
+
+def count_unique_places(horizontal: SegmentStore, vertical: SegmentStore):
+    """
+    Merge the given segment stores in place and count their unique vertices.
+    """
+    columnar.merge_overlapping(horizontal)
+    columnar.merge_overlapping(vertical)
+
+    common = count_intersections(vertical, horizontal)
+    total = columnar.count_points(vertical) + columnar.count_points(horizontal)
+
+    return total - common
+
+
+def count_intersections(
+    vertical: SegmentStore,
+    horizontal: SegmentStore,
+    stripes: typing.Optional[int] = None,
+):
+    """
+    Count intersections between merged vertical and horizontal segments,
+    sweeping `stripes` stripes of the plane in parallel.
+    Defaults to `PARALLEL_STRIPES`, or one stripe per pool worker.
+    Stripes are swept inline when the engine itself runs in a pool worker,
+    which it does not through the API, see `PARALLEL_ENGINES`.
+    """
+    if len(vertical) == 0 or len(horizontal) == 0:
+        return 0
+
+    stripes = stripes or config.PARALLEL_STRIPES or config.WORKER_POOL_SIZE
+    small = len(vertical) + len(horizontal) < config.PARALLEL_MIN_SEGMENTS
+    if stripes <= 1 or small or workers.in_worker():
+        return columnar.count_intersections(vertical, horizontal)
+
+    boundaries = stripe_boundaries(vertical, horizontal, stripes)
+    tasks = [
+        (
+            stripe_vertical.fixed,
+            stripe_vertical.low,
+            stripe_vertical.high,
+            stripe_horizontal.fixed,
+            stripe_horizontal.low,
+            stripe_horizontal.high,
+        )
+        for stripe_vertical, stripe_horizontal in split(
+            vertical, horizontal, boundaries
+        )
+        if len(stripe_vertical) > 0 and len(stripe_horizontal) > 0
+    ]
+    return sum(workers.submit_many(fenwick_sweep, tasks))
+
+
+def stripe_boundaries(
+    vertical: SegmentStore,
+    horizontal: SegmentStore,
+    stripes: int,
+) -> typing.List[int]:
+    """
+    Return the first x of every stripe but the first one, chosen so that
+    stripes hold about the same number of sweep events.
+    """
+    xs = sorted(
+        itertools.chain(vertical.fixed, horizontal.low, horizontal.high),
+    )
+    return sorted({xs[len(xs) * i // stripes] for i in range(1, stripes)})
+
+
+def split(
+    vertical: SegmentStore,
+    horizontal: SegmentStore,
+    boundaries: typing.List[int],
+) -> typing.List[typing.Tuple[SegmentStore, SegmentStore]]:
+    """
+    Split segments into the stripes delimited by `boundaries`.
+    Stripe i covers x in [boundaries[i - 1], boundaries[i] - 1], so every
+    vertical segment, and therefore every intersection, belongs to exactly
+    one stripe. Horizontal segments are clipped to each stripe they cross.
+    """
+    count = len(boundaries) + 1
+    stripes = [(SegmentStore(), SegmentStore()) for _ in range(count)]
+
+    for x, low, high in vertical:
+        stripes[bisect_right(boundaries, x)][0].append(x, low, high)
+
+    for y, low, high in horizontal:
+        first = bisect_right(boundaries, low)
+        last = bisect_right(boundaries, high)
+        for i in range(first, last + 1):
+            stripe_low = boundaries[i - 1] if i > first else low
+            stripe_high = boundaries[i] - 1 if i < last else high
+            stripes[i][1].append(y, stripe_low, stripe_high)
+
+    return stripes
@@ -0,0 +1,268 @@
+"""
+Engine for paths repeating the same block of commands.
+
+A path made of a short head, a block repeated K times and a tail (a prefix
+of the block) only needs a few repetitions to be computed: every block is a
+copy of the first one shifted by the block displacement d, so once the
+copies are far enough from the head and the tail, each extra copy adds the
+same number of new places.
+
+Validated json paths are split from their packed commands, without
+normalizing them, and computed by the numpy engine.
+"""
+
+import typing
+
+from array import array
+
+from robot_cleaner.api.clean import (
+    DIRECTIONS,
+    CommandList,
+    Decomposition,
+    Directions,
+    MOVE_MAP,
+    MovingPath,
+)
+from robot_cleaner.engines import columnar, vectorized
+
+
+# Commands before the repeated block that are tried, e.g. left over from
+# normalization merging the last command of a block with the first one.
+MAX_HEAD = 3
+# Fewer repetitions are computed as a plain path.
+MIN_REPEATS = 4
+# Paths are only extrapolated when the largest path computed instead, of
+# `first + 2` copies of the block, is at most this share of their commands.
+MAX_COMPUTED_SHARE = 0.25
+# Keys compared to find the candidate periods of a path.
+PREFIX_LENGTH = 16
+
+_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+
+class Period(typing.NamedTuple):
+    head: int
+    length: int
+    repeats: int
+
+
+class Split(typing.NamedTuple):
+    """
+    Commands of a path made of `head`, `block` repeated `repeats` times and
+    `tail`, extrapolated from `first` copies of the block on.
+    """
+
+    head: typing.List[Directions]
+    block: typing.List[Directions]
+    repeats: int
+    tail: typing.List[Directions]
+    first: int
+
+
+def calculate_unique_places(
+    data: MovingPath,
+    inner: typing.Callable = columnar.calculate_unique_places,
+):
+    """
+    Return the number of unique vertices the robot's path followed.
+    Repeated blocks are extrapolated, and paths computed with `inner`.
+    """
+    split = split_path(data.get("commands"))
+    result = None
+    if split is not None:
+        result = extrapolate(split, inner)
+    if result is None:
+        return inner(data)
+    return result
+
+
+def calculate_unique_places_decomposed(decomposition: Decomposition):
+    """
+    Same as `calculate_unique_places` for validated request data, split
+    from its packed commands and computed by the numpy engine.
+    """
+    split = split_path(
+        CommandList(decomposition.directions, decomposition.steps),
+    )
+    result = None
+    if split is not None:
+        result = extrapolate(split, vectorized.calculate_unique_places)
+    if result is None:
+        return vectorized.calculate_unique_places_decomposed(decomposition)
+    return result
+
+
+def extrapolate(split: Split, inner: typing.Callable) -> typing.Optional[int]:
+    """
+    Return the number of unique places of the path of `split`, computing
+    `first` to `first + 2` copies of its block with `inner`. None if the
+    copies do not add the same number of places.
+    """
+    head, block, repeats, tail, first = split
+
+    def places(copies):
+        # The start does not change the result.
+        return inner(
+            {
+                "start": {"x": 0, "y": 0},
+                "commands": head + block * copies + tail,
+            }
+        )
+
+    # Each extra copy adds the same number of places from `first` copies on.
+    # The third value guards that assumption.
+    counts = [places(copies) for copies in (first, first + 1, first + 2)]
+    added = counts[1] - counts[0]
+    if counts[2] - counts[1] != added:
+        return None
+
+    return counts[0] + (repeats - first) * added
+
+
+def split_path(
+    commands: typing.Sequence[Directions],
+) -> typing.Optional[Split]:
+    """
+    Return the split of `commands` into repeated blocks when extrapolating
+    them pays off: the copies computed instead, `first + 2` blocks, must be
+    at most `MAX_COMPUTED_SHARE` of the commands. None otherwise.
+    """
+    max_length = int(len(commands) * MAX_COMPUTED_SHARE) // 3
+    period = find_period(commands, max_length)
+    if period is None:
+        return None
+
+    block_start = period.head
+    block_end = block_start + period.length
+    head = commands[:block_start]
+    block = commands[block_start:block_end]
+    tail_start = period.head + period.length * period.repeats
+    tail = commands[tail_start:]
+
+    first = repeats_needed(head, block)
+    computed = (first + 2) * len(block)
+    if (
+        period.repeats < first + MIN_REPEATS
+        or computed > len(commands) * MAX_COMPUTED_SHARE
+    ):
+        # Three paths of about the same size would cost more than one.
+        return None
+    return Split(head, block, period.repeats, tail, first)
+
+
+def find_period(
+    commands: typing.Sequence[Directions],
+    max_length: typing.Optional[int] = None,
+) -> typing.Optional[Period]:
+    """
+    Return the head, length and repetitions of the most repeated block of
+    commands, where the commands after the head are the block repeated and
+    followed by a prefix of it. None if nothing repeats. Blocks longer than
+    `max_length` commands are not looked for.
+    """
+    keys = command_keys(commands)
+
+    best = None
+    for head in range(min(MAX_HEAD, len(keys)) + 1):
+        sequence = keys[head:]
+        if len(sequence) < 2:
+            break
+
+        length = smallest_period(sequence, max_length)
+        repeats = len(sequence) // length
+        if repeats > 1 and (best is None or repeats > best.repeats):
+            best = Period(head, length, repeats)
+
+    return best
+
+
+def command_keys(commands: typing.Sequence[Directions]) -> array:
+    """
+    Return one integer per command, equal for equal commands.
+    """
+    if hasattr(commands, "steps"):
+        # `CommandList`, read from its arrays.
+        pairs = zip(commands.directions, commands.steps)
+    else:
+        pairs = (
+            (_CODES[command.get("direction")], command.get("steps"))
+            for command in commands
+        )
+    return array("q", (steps * len(_CODES) + code for code, steps in pairs))
+
+
+def smallest_period(
+    keys: array,
+    max_length: typing.Optional[int] = None,
+) -> int:
+    """
+    Return the smallest p for which keys[i] == keys[i + p] for every i, or
+    len(keys) when there is none of at most half the keys (nor
+    `max_length`). Candidates are the next occurrences of the first keys,
+    checked by comparing the keys as bytes.
+    """
+    count = len(keys)
+    limit = count // 2
+    if max_length is not None:
+        limit = min(limit, max_length)
+    if limit < 1:
+        return count
+
+    data = keys.tobytes()
+    width = keys.itemsize
+    prefix = data[: width * min(PREFIX_LENGTH, count - limit)]
+    position = data.find(prefix, width)
+    while 0 <= position <= width * limit:
+        if position % width == 0:
+            if data[position:] == data[: len(data) - position]:
+                return position // width
+        position = data.find(prefix, position + 1)
+    return count
+
+
+def repeats_needed(
+    head: typing.List[Directions],
+    block: typing.List[Directions],
+) -> int:
+    """
+    Return a number of block copies after which every extra copy adds the
+    same number of places.
+
+    Places are projected on the block displacement d. Copies more than
+    `distance` blocks apart, and copies past the head's projection, cannot
+    share places, so extra copies in the middle of the path always meet the
+    same neighbours.
+    """
+    block_points = vertices(block)
+    dx, dy = block_points[-1]
+    norm = dx * dx + dy * dy
+    if norm == 0:
+        # Every copy covers the same places as the first one.
+        return 1
+
+    block_projection = [x * dx + y * dy for x, y in block_points]
+    block_low, block_high = min(block_projection), max(block_projection)
+    distance = (block_high - block_low) // norm + 1
+
+    # The head is placed so that it ends where the first copy starts.
+    head_points = vertices(head)
+    end_x, end_y = head_points[-1]
+    head_projection = [x * dx + y * dy for x, y in head_points]
+    head_high = max(head_projection) - (end_x * dx + end_y * dy)
+    head_reach = max(0, (head_high - block_low) // norm + 1)
+
+    return head_reach + 2 * distance
+
+
+def vertices(commands: typing.List[Directions]):
+    """
+    Return the vertices of the path of `commands` starting at (0, 0).
+    """
+    x = y = 0
+    points = [(x, y)]
+    for command in commands:
+        dx, dy = MOVE_MAP[command.get("direction")]
+        x += dx * command.get("steps")
+        y += dy * command.get("steps")
+        points.append((x, y))
+    return points
@@ -0,0 +1,280 @@
+"""
+NumPy implementation of `calculate_unique_places`.
+
+The path is kept as coordinate arrays for the whole computation instead of
+lists of segment tuples, so every stage runs as a handful of array
+operations.
+"""
+
+import numpy as np
+
+from robot_cleaner.api.clean import (
+    Decomposition,
+    MOVE_MAP,
+    MovingPath,
+    SegmentStore,
+)
+from robot_cleaner.api.packed import PackedPath
+
+
+DIRECTION_CODES = {direction: code for code, direction in enumerate(MOVE_MAP)}
+DX = np.array([MOVE_MAP[direction][0] for direction in MOVE_MAP])
+DY = np.array([MOVE_MAP[direction][1] for direction in MOVE_MAP])
+
+
+def calculate_unique_places(data: MovingPath):
+    """
+    Return the number of unique vertices the robot's path followed.
+    """
+    commands = data.get("commands")
+    if len(commands) == 0:
+        return 1
+
+    directions = np.fromiter(
+        (DIRECTION_CODES[command.get("direction")] for command in commands),
+        dtype=np.int8,
+        count=len(commands),
+    )
+    steps = np.fromiter(
+        (command.get("steps") for command in commands),
+        dtype=np.int64,
+        count=len(commands),
+    )
+    start = data.get("start")
+    return calculate_unique_places_arrays(
+        start.get("x"), start.get("y"), directions, steps
+    )
+
+
+def calculate_unique_places_packed(path: PackedPath):
+    """
+    Same as `calculate_unique_places` for a binary upload.
+    """
+    return calculate_unique_places_arrays(
+        path.x,
+        path.y,
+        path.directions,
+        path.steps,
+    )
+
+
+def calculate_unique_places_decomposed(decomposition: Decomposition):
+    """
+    Same as `calculate_unique_places` for the segments of validated request
+    data, read in place.
+    """
+    if decomposition.commands == 0:
+        return 1
+
+    return count_unique_places(
+        store_arrays(decomposition.horizontal),
+        store_arrays(decomposition.vertical),
+    )
+
+
+def store_arrays(store: SegmentStore):
+    """
+    Return the (fixed, low, high) arrays of `store`, without copying them.
+    """
+    return tuple(
+        np.frombuffer(column, dtype=np.int64)
+        for column in (store.fixed, store.low, store.high)
+    )
+
+
+def calculate_unique_places_arrays(
+    x: int,
+    y: int,
+    directions: np.ndarray,
+    steps: np.ndarray,
+):
+    """
+    Same as `calculate_unique_places` for a path given as arrays of
+    direction codes (see `DIRECTION_CODES`) and steps.
+    """
+    if len(directions) == 0:
+        return 1
+
+    horizontal, vertical = divide_path(x, y, directions, steps)
+    return count_unique_places(horizontal, vertical)
+
+
+def count_unique_places(horizontal, vertical):
+    """
+    Return the number of places covered by (fixed, low, high) horizontal
+    and vertical segments.
+    """
+    merged_vertical = merge_overlapping(*vertical)
+    merged_horizontal = merge_overlapping(*horizontal)
+
+    common = count_intersections(merged_vertical, merged_horizontal)
+    total = count_points(merged_vertical) + count_points(merged_horizontal)
+
+    return total - common
+
+
+def divide_path(x: int, y: int, directions: np.ndarray, steps: np.ndarray):
+    """
+    Divide given path into horizontal and vertical segments.
+    Each family is returned as (fixed, low, high) arrays, where `fixed` is
+    the shared coordinate (y for horizontal, x for vertical segments) and
+    [low, high] the covered range on the other axis.
+    """
+    steps = np.asarray(steps, dtype=np.int64)
+    dx = DX[directions] * steps
+    dy = DY[directions] * steps
+
+    xs = np.empty(len(steps) + 1, dtype=np.int64)
+    ys = np.empty(len(steps) + 1, dtype=np.int64)
+    xs[0], ys[0] = x, y
+    np.cumsum(dx, out=xs[1:])
+    np.cumsum(dy, out=ys[1:])
+    xs[1:] += x
+    ys[1:] += y
+
+    is_vertical = DX[directions] == 0
+    x1, x2 = xs[:-1], xs[1:]
+    y1, y2 = ys[:-1], ys[1:]
+
+    horizontal = (
+        y1[~is_vertical],
+        np.minimum(x1, x2)[~is_vertical],
+        np.maximum(x1, x2)[~is_vertical],
+    )
+    vertical = (
+        x1[is_vertical],
+        np.minimum(y1, y2)[is_vertical],
+        np.maximum(y1, y2)[is_vertical],
+    )
+    return horizontal, vertical
+
+
+def merge_overlapping(fixed: np.ndarray, low: np.ndarray, high: np.ndarray):
+    """
+    Merge overlapping or continuous segments on the same line.
+    """
+    if len(fixed) == 0:
+        return fixed, low, high
+
+    order = np.lexsort((low, fixed))
+    fixed, low, high = fixed[order], low[order], high[order]
+
+    # Running maximum of `high` within each line. Lines are made to occupy
+    # disjoint, increasing value ranges so a single accumulate does not leak
+    # across them.
+    new_line = np.empty(len(fixed), dtype=bool)
+    new_line[0] = True
+    np.not_equal(fixed[1:], fixed[:-1], out=new_line[1:])
+    line = np.cumsum(new_line) - 1
+    span = int(high.max() - low.min()) + 1
+    offset = line * span - int(low.min())
+    reach = np.maximum.accumulate(high + offset) - offset
+
+    starts = new_line.copy()
+    starts[1:] |= low[1:] > reach[:-1]
+    starts = np.flatnonzero(starts)
+
+    return fixed[starts], low[starts], np.maximum.reduceat(high, starts)
+
+
+def count_points(segments):
+    """
+    Count number of vertices of merged horizontal/vertical segments.
+    """
+    _, low, high = segments
+    return int((high - low + 1).sum())
+
+
+def count_intersections(vertical_segments, horizontal_segments):
+    """
+    Count intersections between merged vertical and horizontal segments.
+
+    A vertical (x, y1, y2) crosses a horizontal (y, x1, x2) when
+    x1 <= x <= x2 and y1 <= y <= y2. Splitting both ranges into prefix
+    conditions turns the count into weighted 2D dominance counts, which are
+    answered together by `_dominance_sum`.
+    """
+    v_x, v_low, v_high = vertical_segments
+    h_y, h_low, h_high = horizontal_segments
+    if len(v_x) == 0 or len(h_y) == 0:
+        return 0
+
+    # x1 <= x minus x2 + 1 <= x leaves the horizontals with x1 <= x <= x2.
+    points_x = np.concatenate((h_low, h_high + 1))
+    points_y = np.concatenate((h_y, h_y))
+    points_w = np.concatenate(
+        (np.ones(len(h_y), np.int64), np.full(len(h_y), -1, np.int64))
+    )
+    # y <= y2 minus y <= y1 - 1 leaves the horizontals with y1 <= y <= y2.
+    queries_x = np.concatenate((v_x, v_x))
+    queries_y = np.concatenate((v_high, v_low - 1))
+    queries_w = np.concatenate(
+        (np.ones(len(v_x), np.int64), np.full(len(v_x), -1, np.int64))
+    )
+
+    return _dominance_sum(
+        (points_x, points_y, points_w),
+        (queries_x, queries_y, queries_w),
+    )
+
+
+def _dominance_sum(points, queries):
+    """
+    Return sum(qw * pw) over all pairs with px <= qx and py <= qy, given
+    the (x, y, w) arrays of the points and of the queries.
+
+    Points and queries are laid out in one sequence ordered by x, so every
+    point a query dominates comes before it. A bottom-up merge over that
+    sequence pairs each query with the points of its sibling block on the
+    left at exactly one level, and within a level all blocks are searched at
+    once by prefixing the y rank with the block number.
+    """
+    points_x, points_y, points_w = points
+    queries_x, queries_y, queries_w = queries
+    n_points = len(points_x)
+    xs = np.concatenate((points_x, queries_x))
+    is_query = np.concatenate(
+        (np.zeros(n_points, bool), np.ones(len(queries_x), bool)),
+    )
+    # A query matches points with py <= qy, i.e. a y rank <= its own.
+    ys_sorted = np.unique(points_y)
+    ranks = np.concatenate(
+        (
+            np.searchsorted(ys_sorted, points_y),
+            np.searchsorted(ys_sorted, queries_y, side="right") - 1,
+        )
+    )
+    weights = np.concatenate((points_w, queries_w))
+
+    # On equal x points go first, as px <= qx is inclusive.
+    order = np.lexsort((is_query, xs))
+    is_query, ranks, weights = is_query[order], ranks[order], weights[order]
+
+    position = np.arange(len(xs), dtype=np.int64)
+    width = len(ys_sorted) + 1
+    point_rank, point_weight = ranks[~is_query], weights[~is_query]
+    point_position = position[~is_query]
+    query_rank, query_weight = ranks[is_query], weights[is_query]
+    query_position = position[is_query]
+
+    total = 0
+    level = 0
+    while (1 << level) < len(xs):
+        point_block = point_position >> level
+        query_block = query_position >> level
+
+        left = point_block % 2 == 0
+        keys = point_block[left] * width + point_rank[left]
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        prefix = np.concatenate(([0], np.cumsum(point_weight[left][order])))
+
+        right = query_block % 2 == 1
+        sibling = (query_block[right] - 1) * width
+        first = np.searchsorted(keys, sibling, side="left")
+        last = np.searchsorted(keys, sibling + query_rank[right], side="right")
+        matched = prefix[last] - prefix[first]
+        total += int((query_weight[right] * matched).sum())
+        level += 1
+
+    return total
@@ -0,0 +1,112 @@
+import queue
+import threading
+import typing
+
+import structlog
+
+from robot_cleaner import metrics
+
+
+logger = structlog.get_logger()
+
+
+class JobQueue:
+    """
+    Bounded queue of job ids processed by `threads` daemon threads calling
+    `handler(job_id)`. Threads start on first use, so that they are started
+    in every (forked) web server process, and enqueue the ids returned by
+    `recover` first. Queue depth and job counts are exposed under `name`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: typing.Callable[[int], None],
+        maxsize: int,
+        threads: int,
+        recover: typing.Optional[typing.Callable[[], typing.List[int]]] = None,
+    ):
+        self.handler = handler
+        self.recover = recover
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.threads = threads
+        self.started = False
+        self.recovery = None
+        self.lock = threading.Lock()
+        self.counts = dict.fromkeys(
+            ("submitted", "rejected", "completed", "failed"),
+            0,
+        )
+        metrics.register(name, self.stats)
+
+    def start(self):
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+
+        for _ in range(self.threads):
+            threading.Thread(target=self._work, daemon=True).start()
+        if self.recover is not None:
+            self.recovery = threading.Thread(target=self._recover, daemon=True)
+            self.recovery.start()
+
+    def submit(self, job_id: int):
+        """
+        Enqueue `job_id`. Raises `queue.Full` when the queue is full.
+        """
+        self.start()
+        try:
+            self.queue.put_nowait(job_id)
+        except queue.Full:
+            self._count("rejected")
+            raise
+        self._count("submitted")
+
+    def join(self):
+        """
+        Wait until every recovered and enqueued job is processed.
+        """
+        if self.recovery is not None:
+            self.recovery.join()
+        self.queue.join()
+
+    def stats(self) -> dict:
+        with self.lock:
+            counts = dict(self.counts)
+        return {
+            "depth": self.queue.qsize(),
+            "maxsize": self.queue.maxsize,
+            "threads": self.threads if self.started else 0,
+            **counts,
+        }
+
+    def _count(self, key: str):
+        with self.lock:
+            self.counts[key] += 1
+
+    def _work(self):
+        while True:
+            job_id = self.queue.get()
+            try:
+                self.handler(job_id)
+                self._count("completed")
+            except Exception:
+                self._count("failed")
+                logger.exception("Job failed", job_id=job_id)
+            finally:
+                self.queue.task_done()
+
+    def _recover(self):
+        try:
+            job_ids = self.recover()
+        except Exception:
+            logger.exception("Job recovery failed")
+            return
+
+        if job_ids:
+            logger.info("Recovering jobs", jobs=len(job_ids))
+        for job_id in job_ids:
+            # Blocks while the queue is full, unlike `submit`.
+            self.queue.put(job_id)
+            self._count("submitted")
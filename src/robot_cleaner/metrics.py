@@ -0,0 +1,42 @@
+import threading
+import typing
+
+
+_collectors: typing.Dict[str, typing.Callable[[], dict]] = {}
+_lock = threading.Lock()
+
+
+def register(name: str, collector: typing.Callable[[], dict]):
+    """
+    Expose the stats returned by `collector` under `name`.
+    """
+    with _lock:
+        _collectors[name] = collector
+
+
+def collect() -> dict:
+    """
+    Return the current stats of every registered collector.
+    """
+    with _lock:
+        collectors = dict(_collectors)
+    return {name: collector() for name, collector in collectors.items()}
+
+
+class Counters:
+    """
+    Thread-safe named counters, exposed under `name`.
+    """
+
+    def __init__(self, name: str, *keys: str):
+        self.values = dict.fromkeys(keys, 0)
+        self.lock = threading.Lock()
+        register(name, self.snapshot)
+
+    def inc(self, key: str, value: typing.Union[int, float] = 1):
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.values)
@@ -1,10 +1,30 @@
 import sqlalchemy as sa
+import typing
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer
 from datetime import datetime, timezone
 
 from robot_cleaner.models.base import Base
 
+if typing.TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Execution statuses. Synchronous executions are created done, asynchronous
+# ones pending until a job worker claims (running) and computes them.
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def utcnow() -> datetime:
+    """
+    Current UTC time, naive like the timestamp columns, which asyncpg
+    requires.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 class Execution(Base):
     """
@@ -12,34 +32,274 @@ class Execution(Base):
     """
 
     __tablename__ = "executions"
+    __table_args__ = (
+        sa.Index("ix_executions_timestamp_id", "timestamp", "id"),
+        sa.Index(
+            "ix_executions_result_timestamp_id",
+            "result",
+            "timestamp",
+            "id",
+        ),
+        sa.Index(
+            "ix_executions_commands_timestamp_id",
+            "commands",
+            "timestamp",
+            "id",
+        ),
+        sa.Index(
+            "ix_executions_unfinished",
+            "id",
+            postgresql_where=sa.text("status IN ('pending', 'running')"),
+        ),
+    )
 
     id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
     commands = sa.Column(sa.Integer)
-    result = sa.Column(sa.Integer, nullable=False)
+    result = sa.Column(sa.Integer)
     duration = sa.Column(sa.Float)
-    timestamp = sa.Column(sa.DateTime, default=datetime.now(timezone.utc))
+    # UTC, see `utcnow`.
+    timestamp = sa.Column(sa.DateTime, default=utcnow)
+    engine = sa.Column(sa.String(32))
+    status = sa.Column(
+        sa.String(16),
+        nullable=False,
+        default=DONE,
+        server_default=DONE,
+    )
+    # Path of pending executions, cleared once computed.
+    path = sa.Column(sa.JSON(none_as_null=True))
+    started_at = sa.Column(sa.DateTime)
+
+
+# Columns read back by inserts: every serialized column. Rows are returned
+# as plain rows, which unlike ORM instances need no identity map and are
+# not expired (and reloaded one by one) by the commit.
+RETURNED_COLUMNS = (
+    Execution.id,
+    Execution.commands,
+    Execution.result,
+    Execution.duration,
+    Execution.timestamp,
+    Execution.engine,
+    Execution.status,
+)
 
 
 def add_execution(
     session: Session,
     commands: int,
-    result: int,
-    duration: float,
-) -> Execution:
-    execution = Execution(commands=commands, result=result, duration=duration)
-    session.add(execution)
+    result: typing.Optional[int],
+    duration: typing.Optional[float],
+    engine: typing.Optional[str] = None,
+    status: str = DONE,
+    path: typing.Optional[dict] = None,
+) -> sa.Row:
+    """
+    Insert an execution and return its serialized columns, read back by
+    the same INSERT ... RETURNING statement.
+    """
+    execution = session.execute(
+        _insert_execution(commands, result, duration, engine, status, path)
+    ).one()
     session.commit()
-    return fetch_execution(session, execution)
+    return execution
 
 
-def fetch_execution(
-    session: Session,
-    execution: Execution,
-) -> Execution:
+async def async_add_execution(
+    session: "AsyncSession",
+    commands: int,
+    result: typing.Optional[int],
+    duration: typing.Optional[float],
+    engine: typing.Optional[str] = None,
+    status: str = DONE,
+    path: typing.Optional[dict] = None,
+) -> sa.Row:
+    """
+    `add_execution` with an asyncio session.
+    """
+    execution = (
+        await session.execute(
+            _insert_execution(commands, result, duration, engine, status, path)
+        )
+    ).one()
+    await session.commit()
+    return execution
+
+
+def _insert_execution(
+    commands: int,
+    result: typing.Optional[int],
+    duration: typing.Optional[float],
+    engine: typing.Optional[str],
+    status: str,
+    path: typing.Optional[dict],
+) -> sa.Insert:
     return (
-        session.query(Execution)
-        .filter(
-            Execution.id == execution.id,
+        sa.insert(Execution)
+        .values(
+            commands=commands,
+            result=result,
+            duration=duration,
+            engine=engine,
+            status=status,
+            path=path,
+        )
+        .returning(*RETURNED_COLUMNS)
+    )
+
+
+def add_executions(
+    session: Session,
+    rows: typing.List[dict],
+) -> typing.List[sa.Row]:
+    """
+    Insert executions given as dicts of column values with a single
+    multi-row INSERT ... RETURNING, in the order of `rows`.
+    """
+    if not rows:
+        return []
+
+    executions = session.execute(
+        sa.insert(Execution).returning(
+            *RETURNED_COLUMNS,
+            sort_by_parameter_order=True,
+        ),
+        rows,
+    ).all()
+    session.commit()
+    return executions
+
+
+def get_execution(
+    session: Session,
+    execution_id: int,
+) -> typing.Optional[Execution]:
+    return session.get(Execution, execution_id)
+
+
+def id_allocated(session: Session, execution_id: int) -> bool:
+    """
+    Whether `execution_id` was taken from the id sequence, by an insert or
+    by the recorder of any process (see `robot_cleaner.recorder`).
+    """
+    sequence = sa.func.to_regclass(
+        sa.func.pg_get_serial_sequence(
+            Execution.__tablename__,
+            Execution.id.name,
+        )
+    )
+    query = sa.select(sa.func.pg_sequence_last_value(sequence))
+    last_value = session.scalar(query)
+    return last_value is not None and execution_id <= last_value
+
+
+def delete_execution(session: Session, execution_id: int):
+    session.execute(sa.delete(Execution).where(Execution.id == execution_id))
+    session.commit()
+
+
+async def async_delete_execution(session: "AsyncSession", execution_id: int):
+    statement = sa.delete(Execution).where(Execution.id == execution_id)
+    await session.execute(statement)
+    await session.commit()
+
+
+def claim_execution(
+    session: Session,
+    execution_id: int,
+    stale_before: datetime,
+) -> typing.Optional[Execution]:
+    """
+    Mark a pending execution as running and return it, unless it is
+    already claimed. Executions left running since `stale_before` (their
+    worker died) can be claimed again.
+    """
+    claimed = session.execute(
+        sa.update(Execution)
+        .where(Execution.id == execution_id, _claimable(stale_before))
+        .values(status=RUNNING, started_at=utcnow())
+    ).rowcount
+    session.commit()
+    if not claimed:
+        return None
+    return get_execution(session, execution_id)
+
+
+def finish_execution(session: Session, execution_id: int, **values):
+    """
+    Store the outcome `values` of a claimed execution and drop its path.
+    """
+    session.execute(
+        sa.update(Execution)
+        .where(Execution.id == execution_id)
+        .values(path=None, **values)
+    )
+    session.commit()
+
+
+def claimable_execution_ids(
+    session: Session,
+    stale_before: datetime,
+) -> typing.List[int]:
+    """
+    Return the ids of the executions waiting for a job worker.
+    """
+    return list(
+        session.scalars(
+            sa.select(Execution.id)
+            .where(_claimable(stale_before))
+            .order_by(Execution.id)
         )
-        .first()
     )
+
+
+def _claimable(stale_before: datetime):
+    return sa.or_(
+        Execution.status == PENDING,
+        sa.and_(
+            Execution.status == RUNNING,
+            Execution.started_at < stale_before,
+        ),
+    )
+
+
+def list_executions(
+    session: Session,
+    limit: int,
+    before: typing.Optional[typing.Tuple[datetime, int]] = None,
+    since: typing.Optional[datetime] = None,
+    until: typing.Optional[datetime] = None,
+    min_result: typing.Optional[int] = None,
+    max_result: typing.Optional[int] = None,
+    min_commands: typing.Optional[int] = None,
+    max_commands: typing.Optional[int] = None,
+) -> typing.List[Execution]:
+    """
+    Return up to `limit` executions, newest first, filtered by inclusive
+    ranges. Pages are chained with keyset pagination: `before` is the
+    (timestamp, id) of the last execution of the previous page, so pages
+    of the listing filtered by time only are read from the (timestamp, id)
+    index, however deep they are. Result and commands ranges cannot use
+    that order: narrow ones are read from their own index and sorted, wide
+    ones filter the (timestamp, id) index, which can read many rows per
+    page when few executions match.
+    """
+    query = sa.select(Execution).options(defer(Execution.path))
+    if before is not None:
+        query = query.where(
+            sa.tuple_(Execution.timestamp, Execution.id) < sa.tuple_(*before)
+        )
+
+    for column, low, high in (
+        (Execution.timestamp, since, until),
+        (Execution.result, min_result, max_result),
+        (Execution.commands, min_commands, max_commands),
+    ):
+        if low is not None:
+            query = query.where(column >= low)
+        if high is not None:
+            query = query.where(column <= high)
+
+    query = query.order_by(Execution.timestamp.desc(), Execution.id.desc())
+    query = query.limit(limit)
+    return list(session.scalars(query))
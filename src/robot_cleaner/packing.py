@@ -0,0 +1,91 @@
+"""
+Binary path format of the enter-path endpoint, for the server and its
+clients. Only the standard library is imported, the server reads the
+commands in place with numpy, see `robot_cleaner.api.packed`.
+
+A path sent with the `CONTENT_TYPE` content type is a little-endian header
+followed by one fixed-width record per command:
+
+    header:  magic b"RCP1", start x (int32), start y (int32),
+             number of commands (uint32)
+    command: direction code (uint8, see `DIRECTIONS`), steps (uint32)
+"""
+
+import struct
+import typing
+
+
+CONTENT_TYPE = "application/vnd.robot-cleaner.path"
+MAGIC = b"RCP1"
+HEADER = struct.Struct("<4siiI")
+COMMAND = struct.Struct("<BI")
+
+# Direction of each direction code.
+DIRECTIONS = ("north", "south", "east", "west")
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+
+
+def encode_path(data: dict) -> bytes:
+    """
+    Return the binary path of a path in the json form of the API, e.g. for
+    clients:
+
+        requests.post(
+            url,
+            data=encode_path(data),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
+    """
+    commands = data["commands"]
+    start = data["start"]
+    header = HEADER.pack(MAGIC, start["x"], start["y"], len(commands))
+    return header + b"".join(
+        COMMAND.pack(DIRECTION_CODES[command["direction"]], command["steps"])
+        for command in commands
+    )
+
+
+def decode_header(body: bytes) -> typing.Tuple[int, int, int]:
+    """
+    Return the start x, start y and number of commands of a binary path.
+    Raises ValueError if `body` does not start with a header.
+    """
+    if len(body) < HEADER.size:
+        raise ValueError(f"Invalid path: {len(body)} bytes header.")
+
+    magic, x, y, count = HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise ValueError(f"Invalid path: unknown format {magic!r}.")
+    return x, y, count
+
+
+def check_size(body: bytes, count: int):
+    """
+    Raises ValueError if `body` is not the size of a binary path of `count`
+    commands.
+    """
+    size = HEADER.size + count * COMMAND.size
+    if len(body) != size:
+        raise ValueError(
+            f"Invalid path: {count} commands take {size} bytes, got {len(body)}."  # noqa
+        )
+
+
+def decode_path(body: bytes) -> dict:
+    """
+    Return the json form of a binary path. Raises ValueError if `body` is
+    not one.
+    """
+    x, y, count = decode_header(body)
+    check_size(body, count)
+    offset = HEADER.size
+    commands = []
+    for index, (code, steps) in enumerate(
+        COMMAND.iter_unpack(memoryview(body)[offset:])
+    ):
+        if code >= len(DIRECTIONS):
+            raise ValueError(
+                f"Direction code of command {index} should be one of: {tuple(range(len(DIRECTIONS)))}"  # noqa
+            )
+        commands.append({"direction": DIRECTIONS[code], "steps": steps})
+    return {"start": {"x": x, "y": y}, "commands": commands}
@@ -0,0 +1,251 @@
+import atexit
+import queue
+import threading
+import time
+import typing
+
+import sqlalchemy as sa
+import structlog
+
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from werkzeug.exceptions import ServiceUnavailable
+
+from robot_cleaner import config, metrics
+from robot_cleaner.db import db_session
+from robot_cleaner.models.execution import DONE, Execution, utcnow
+
+
+logger = structlog.get_logger()
+
+
+class Record(typing.NamedTuple):
+    """
+    Execution waiting to be written, with the serialized columns.
+    """
+
+    id: int
+    commands: int
+    result: int
+    duration: float
+    timestamp: datetime
+    engine: typing.Optional[str]
+    status: str
+
+
+class ExecutionRecorder:
+    """
+    Write-behind recorder of executions.
+
+    Executions get their id from the database sequence, in blocks of
+    `id_block`, and are queued. A background thread writes them with
+    multi-row inserts of up to `batch_size` executions, at most `max_age`
+    seconds after the first one of a batch was queued. When the queue is
+    full, `record` waits up to `put_timeout` seconds before giving up.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        batch_size: int,
+        max_age: float,
+        put_timeout: float,
+        id_block: int,
+    ):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.put_timeout = put_timeout
+        self.id_block = id_block
+        self.ids = []
+        self.pending = {}
+        self.flusher = None
+        self.closing = False
+        self.lock = threading.Lock()
+        self.id_lock = threading.Lock()
+        self.counts = dict.fromkeys(
+            (
+                "recorded",
+                "rejected",
+                "flushed",
+                "dropped",
+                "flushes",
+                "failed_flushes",
+            ),
+            0,
+        )
+        self.flush_time = 0.0
+        self.max_flush_time = 0.0
+
+    def record(
+        self,
+        commands: int,
+        result: int,
+        duration: float,
+        engine: typing.Optional[str] = None,
+    ) -> Record:
+        """
+        Queue an execution and return it, with its final id.
+        Raises `ServiceUnavailable` if the queue stays full.
+        """
+        self.start()
+        record = Record(
+            id=self._next_id(),
+            commands=commands,
+            result=result,
+            duration=duration,
+            timestamp=utcnow(),
+            engine=engine,
+            status=DONE,
+        )
+        with self.lock:
+            self.pending[record.id] = record
+
+        try:
+            self.queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            with self.lock:
+                del self.pending[record.id]
+            self._count("rejected")
+            raise ServiceUnavailable("Too many executions to record.")
+
+        self._count("recorded")
+        return record
+
+    def get(self, execution_id: int) -> typing.Optional[Record]:
+        """
+        Return the execution `execution_id` if it is not written yet by this
+        recorder. Recorders of other processes write theirs within
+        `max_age` seconds, or once the database is back.
+        """
+        with self.lock:
+            return self.pending.get(execution_id)
+
+    def start(self):
+        with self.lock:
+            if self.flusher is not None:
+                return
+            self.flusher = threading.Thread(target=self._flush_loop)
+            self.flusher.daemon = True
+            self.flusher.start()
+
+    def close(self, timeout: typing.Optional[float] = None):
+        """
+        Write the queued executions and stop the flusher thread.
+        """
+        with self.lock:
+            flusher = self.flusher
+            self.flusher = None
+        if flusher is None:
+            return
+
+        self.closing = True
+        self.queue.put(None)
+        flusher.join(timeout)
+        self.closing = False
+
+    def stats(self) -> dict:
+        with self.lock:
+            counts = dict(self.counts)
+            flushes = counts["flushes"]
+            return {
+                "depth": self.queue.qsize(),
+                "maxsize": self.queue.maxsize,
+                **counts,
+                "avg_flush_time": self.flush_time / flushes if flushes else 0,
+                "max_flush_time": self.max_flush_time,
+            }
+
+    def _count(self, key: str, value: int = 1):
+        with self.lock:
+            self.counts[key] += value
+
+    def _next_id(self) -> int:
+        with self.id_lock:
+            if not self.ids:
+                self.ids = sorted(allocate_ids(self.id_block), reverse=True)
+            return self.ids.pop()
+
+    def _flush_loop(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_age
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    timeout = max(0, deadline - time.monotonic())
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if record is not None]
+            if records:
+                self._flush(records)
+            if batch[-1] is None:
+                return
+
+    def _flush(self, records: typing.List[Record]):
+        while True:
+            started = time.monotonic()
+            try:
+                insert_records([record._asdict() for record in records])
+                break
+            except Exception:
+                self._count("failed_flushes")
+                logger.exception("Recording executions failed")
+                if self.closing:
+                    logger.error(
+                        "Dropping executions",
+                        executions=len(records),
+                    )
+                    self._release(records, "dropped")
+                    return
+                time.sleep(max(self.max_age, 1))
+
+        elapsed = time.monotonic() - started
+        self._release(records, "flushed")
+        with self.lock:
+            self.counts["flushes"] += 1
+            self.flush_time += elapsed
+            self.max_flush_time = max(self.max_flush_time, elapsed)
+
+    def _release(self, records: typing.List[Record], key: str):
+        with self.lock:
+            for record in records:
+                self.pending.pop(record.id, None)
+            self.counts[key] += len(records)
+
+
+@db_session
+def allocate_ids(count: int, session: Session) -> typing.List[int]:
+    """
+    Return `count` new execution ids from the id sequence.
+    """
+    sequence = sa.func.pg_get_serial_sequence(
+        Execution.__tablename__, Execution.id.name
+    )
+    return list(
+        session.scalars(
+            sa.select(sa.func.nextval(sequence)).select_from(
+                sa.func.generate_series(1, count)
+            )
+        )
+    )
+
+
+@db_session(persist=True)
+def insert_records(rows: typing.List[dict], session: Session):
+    # Executions of a retried insert may have been written already.
+    session.execute(insert(Execution).on_conflict_do_nothing(), rows)
+    session.commit()
+
+
+recorder = ExecutionRecorder(
+    maxsize=config.RECORDER_QUEUE_SIZE,
+    batch_size=config.RECORDER_BATCH_SIZE,
+    max_age=config.RECORDER_MAX_AGE,
+    put_timeout=config.RECORDER_PUT_TIMEOUT,
+    id_block=config.RECORDER_ID_BLOCK,
+)
+metrics.register("recorder", recorder.stats)
+atexit.register(recorder.close, config.RECORDER_SHUTDOWN_TIMEOUT)
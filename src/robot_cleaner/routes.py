@@ -1,5 +1,6 @@
 import flask
 
+from robot_cleaner import metrics
 from robot_cleaner.api import clean
 
 
@@ -7,13 +8,51 @@ def _health():
     return "OK", 200
 
 
+def _metrics():
+    return flask.jsonify(metrics.collect()), 200
+
+
 def register_routes(app: flask.Flask):
+    # asynchronous executions, started in every web server process
+    app.before_request(clean.get_job_queue().start)
+
     # health endpoint
     app.add_url_rule("/_health", view_func=_health)
 
+    # metrics endpoint
+    app.add_url_rule("/_metrics", view_func=_metrics)
+
     # clean endpoint
     app.add_url_rule(
         "/tibber-developer-test/enter-path",
         view_func=clean.execute_cleaning,
         methods=["POST"],
     )
+
+    # clean executions listing endpoint
+    app.add_url_rule(
+        "/tibber-developer-test/enter-path",
+        view_func=clean.list_cleanings,
+        methods=["GET"],
+    )
+
+    # clean execution endpoint
+    app.add_url_rule(
+        "/tibber-developer-test/enter-path/<int:execution_id>",
+        view_func=clean.get_cleaning,
+        methods=["GET"],
+    )
+
+    # batch clean endpoint
+    app.add_url_rule(
+        "/tibber-developer-test/enter-paths",
+        view_func=clean.execute_cleaning_batch,
+        methods=["POST"],
+    )
+
+    # streaming clean endpoint
+    app.add_url_rule(
+        "/tibber-developer-test/enter-paths/stream",
+        view_func=clean.execute_cleaning_stream,
+        methods=["POST"],
+    )
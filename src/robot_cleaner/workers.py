@@ -0,0 +1,209 @@
+import atexit
+import multiprocessing
+import threading
+import time
+import typing
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.exceptions import GatewayTimeout, ServiceUnavailable
+
+from robot_cleaner import config
+
+
+_pool: typing.Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Return the process pool of this (web server) process, creating it on
+    first use so that it is never shared across forked workers.
+    """
+    global _pool
+
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=config.WORKER_POOL_SIZE,
+                # Workers are recycled, which requires a non-fork context.
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=config.WORKER_MAX_TASKS_PER_CHILD,
+            )
+        return _pool
+
+
+def shutdown():
+    """
+    Shut the process pool down, cancelling tasks that did not start yet.
+    """
+    global _pool
+
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown)
+
+
+def terminate():
+    """
+    Kill the pool workers, including the ones still running a task, and
+    drop the pool. Tasks of other requests in that pool fail with
+    `ServiceUnavailable`.
+    """
+    global _pool
+
+    with _lock:
+        if _pool is not None:
+            # ProcessPoolExecutor cannot stop running tasks by itself.
+            processes = list((_pool._processes or {}).values())
+            _pool.shutdown(wait=False, cancel_futures=True)
+            for process in processes:
+                process.terminate()
+                process.join()
+            _pool = None
+
+
+def in_worker() -> bool:
+    """
+    Whether this process is a pool worker, which must not start a pool of
+    its own: nested pools are never shut down and hang `shutdown`.
+    """
+    return multiprocessing.parent_process() is not None
+
+
+def estimate_cost(data: dict) -> int:
+    """
+    Cheap estimate of the work needed to compute `data` (a json, validated
+    or packed path), in command units.
+    Every command counts as one unit and long moves add one unit per
+    `WORKER_STEPS_PER_UNIT` steps. Only json commands that are not packed
+    in a `CommandList` are walked.
+    """
+    if isinstance(data, dict):
+        commands = data.get("commands")
+        if hasattr(commands, "steps"):
+            # `CommandList`, summed without building the commands.
+            steps = sum(commands.steps)
+        else:
+            steps = sum(command.get("steps") for command in commands)
+        commands = len(commands)
+    else:
+        # Validated (`Decomposition`) or binary (`PackedPath`) paths.
+        commands, steps = data.commands, data.total_steps
+    return commands + steps // config.WORKER_STEPS_PER_UNIT
+
+
+def offload(data: dict, cost: typing.Optional[int] = None) -> bool:
+    """
+    Whether `data` is expensive enough to be computed in the process pool.
+    `cost` is its `estimate_cost`, when known already.
+    """
+    if config.WORKER_POOL_SIZE <= 0:
+        return False
+    if cost is None:
+        cost = estimate_cost(data)
+    return cost >= config.WORKER_MIN_COST
+
+
+def run(
+    calculate: typing.Callable,
+    data: dict,
+    timeout: typing.Optional[float] = None,
+    cost: typing.Optional[int] = None,
+):
+    """
+    Return `calculate(data)`, computed in the process pool for paths whose
+    estimated cost reaches `WORKER_MIN_COST`, and inline otherwise.
+    Pooled tasks wait for `timeout` seconds, `WORKER_TASK_TIMEOUT` by
+    default. `cost` saves estimating it again, e.g. from the
+    `Decomposition` of `data`.
+    """
+    if not offload(data, cost):
+        return calculate(data)
+
+    return submit(calculate, data, timeout=timeout)
+
+
+def run_many(
+    tasks: typing.Sequence[typing.Tuple[typing.Callable, dict]],
+    timeout: typing.Optional[float] = None,
+):
+    """
+    Return `[calculate(data) for calculate, data in tasks]`. Expensive
+    tasks are submitted to the process pool first, so they run while the
+    cheap ones are computed inline.
+    """
+    pooled = [i for i, (_, data) in enumerate(tasks) if offload(data)]
+    futures = _submit([(tasks[i][0], (tasks[i][1],)) for i in pooled])
+
+    in_pool = set(pooled)
+    results = [
+        None if i in in_pool else calculate(data)
+        for i, (calculate, data) in enumerate(tasks)
+    ]
+    for i, result in zip(pooled, _wait(futures, timeout)):
+        results[i] = result
+    return results
+
+
+def submit(
+    calculate: typing.Callable,
+    *args,
+    timeout: typing.Optional[float] = None,
+):
+    """
+    Return `calculate(*args)` computed in the process pool, waiting for at
+    most `timeout` seconds, `WORKER_TASK_TIMEOUT` by default.
+    """
+    return submit_many(calculate, [args], timeout)[0]
+
+
+def submit_many(
+    calculate: typing.Callable,
+    args_list: typing.Sequence[tuple],
+    timeout: typing.Optional[float] = None,
+) -> list:
+    """
+    Return `[calculate(*args) for args in args_list]`, computed concurrently
+    in the process pool. All tasks share one `timeout` deadline, see
+    `submit`.
+    """
+    futures = _submit([(calculate, args) for args in args_list])
+    return _wait(futures, timeout)
+
+
+def _submit(calls: typing.Sequence[typing.Tuple[typing.Callable, tuple]]):
+    if not calls:
+        return []
+
+    try:
+        return [get_pool().submit(call, *args) for call, args in calls]
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM killed). Start over with a new pool.
+        shutdown()
+        return [get_pool().submit(call, *args) for call, args in calls]
+
+
+def _wait(futures: list, timeout: typing.Optional[float] = None) -> list:
+    if timeout is None:
+        timeout = config.WORKER_TASK_TIMEOUT
+    deadline = time.monotonic() + timeout
+    try:
+        return [
+            future.result(timeout=max(0, deadline - time.monotonic()))
+            for future in futures
+        ]
+    except TimeoutError:
+        running = [future for future in futures if not future.cancel()]
+        if any(not future.done() for future in running):
+            # Running tasks would keep their worker busy and make the next
+            # requests time out too.
+            terminate()
+        raise GatewayTimeout("Path calculation timed out.")
+    except BrokenProcessPool:
+        shutdown()
+        raise ServiceUnavailable("Path calculation worker crashed.")
@@ -0,0 +1,18 @@
+"""
+WSGI entry point, the application is built when the server loads it.
+"""
+
+from robot_cleaner.app import get_app, shutdown
+
+try:
+    import uwsgi
+except ImportError:
+    # Served by another server, e.g. the flask development server.
+    uwsgi = None
+
+
+application = get_app()
+
+if uwsgi is not None:
+    # Run when a uwsgi worker exits, including reloads.
+    uwsgi.atexit = shutdown
@@ -1,4 +1,5 @@
 import pytest
+import random
 
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -8,8 +9,9 @@ with pytest.MonkeyPatch.context() as monkeypatch:
     # random api token in the test environment to test authentication
     monkeypatch.setenv("AUTH_API_KEY", "random-test-token")
 
-    from robot_cleaner import db
+    from robot_cleaner import cache, db
     from robot_cleaner.app import create_app
+    from robot_cleaner.api.clean import MOVE_MAP
     from robot_cleaner.models import (
         Base,
         Execution,
@@ -24,6 +26,9 @@ def init_db(monkeypatch):
     """
     Base.metadata.drop_all(bind=db.engine)
     Base.metadata.create_all(bind=db.engine)
+    # ids are reused by the new tables
+    cache.executions.clear()
+    cache.unwritten.clear()
     yield
     Base.metadata.drop_all(bind=db.engine)
 
@@ -34,6 +39,19 @@ def app(monkeypatch):
     yield app
 
 
+@pytest.fixture
+def asgi_client(monkeypatch):
+    """
+    Client of the ASGI app, its lifespan spans the test.
+    """
+    from starlette.testclient import TestClient
+
+    from robot_cleaner import asgi
+
+    with TestClient(asgi.create_app()) as client:
+        yield client
+
+
 @pytest.fixture
 def auth_app(monkeypatch):
     monkeypatch.setenv("IS_PRODUCTION", "True")
@@ -59,3 +77,27 @@ def database(init_db):
         session.add(execution_1)
         session.commit()
         session.refresh(execution_1)
+
+
+@pytest.fixture
+def random_path():
+    """
+    Factory of reproducible random moving paths.
+    Small `spread` values keep the robot close to its start, which produces
+    plenty of overlaps and crossings.
+    """
+
+    def _random_path(seed, commands=200, spread=10, x=0, y=0):
+        rng = random.Random(seed)
+        return {
+            "start": {"x": x, "y": y},
+            "commands": [
+                {
+                    "direction": rng.choice(tuple(MOVE_MAP)),
+                    "steps": rng.randint(1, spread),
+                }
+                for _ in range(commands)
+            ],
+        }
+
+    return _random_path
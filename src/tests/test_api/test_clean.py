@@ -1,11 +1,26 @@
+import json
+import threading
+import time
+
+import pytest
+
+from datetime import datetime, timedelta
+from mock import patch
+
+from robot_cleaner import cache, config, jobs
+from robot_cleaner.api import clean
+from robot_cleaner.recorder import ExecutionRecorder, recorder
 from robot_cleaner.db import Session
 from robot_cleaner.models import Execution
+from robot_cleaner.models.execution import add_executions, utcnow
 from robot_cleaner.api.clean import (
     calculate_unique_places,
     merge_overlapping,
     count_intersections,
+    count_intersections_fenwick,
     count_segment_points,
     divide_path,
+    normalize_commands,
 )
 
 
@@ -134,6 +149,553 @@ def test_execute_cleaning_repeat_path(app, database):
     assert response.json["commands"] == len(request_body["commands"])
 
 
+def test_execute_cleaning_engine(app, database):
+    """
+    Test the engine used for the calculation is recorded.
+    """
+    request_body = {
+        "start": {"x": 0, "y": 0},
+        "commands": [
+            {"direction": "east", "steps": 2},
+            {"direction": "north", "steps": 1},
+        ],
+    }
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path", json=request_body
+    )
+    assert response.status_code == 200
+    assert response.json["engine"] == "bitmap"
+
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path?engine=columnar", json=request_body
+    )
+    assert response.status_code == 200
+    assert response.json["result"] == 4
+    assert response.json["engine"] == "columnar"
+
+    with Session() as session:
+        executions = session.query(Execution).order_by(Execution.id).all()
+        assert [execution.engine for execution in executions] == [
+            None,
+            "bitmap",
+            "columnar",
+        ]
+
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path?engine=unknown", json=request_body
+    )
+    assert response.status_code == 400
+
+
+def test_execute_cleaning_write_behind(app, database, monkeypatch):
+    """
+    Test executions recorded after the response keep a valid uri.
+    """
+    monkeypatch.setattr(config, "WRITE_BEHIND", True)
+    request_body = {
+        "start": {"x": 10, "y": 22},
+        "commands": [
+            {"direction": "east", "steps": 2},
+            {"direction": "north", "steps": 1},
+        ],
+    }
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path", json=request_body
+    )
+    assert response.status_code == 200
+    assert response.json["result"] == 4
+    uri = response.json["uri"]
+
+    # served while or after being written
+    response = app.test_client().get(uri)
+    assert response.status_code == 200
+    assert response.json["result"] == 4
+
+    recorder.close()
+    with Session() as session:
+        execution = session.get(Execution, int(uri.rsplit("/", 1)[1]))
+        assert execution.result == 4
+
+
+def test_get_cleaning_write_behind_other_process(app, database, monkeypatch):
+    """
+    Test executions pending in the recorder of another process are polled
+    with 202 until they are written.
+    """
+    monkeypatch.setattr(config, "WRITE_BEHIND", True)
+    other_recorder = ExecutionRecorder(
+        maxsize=10, batch_size=10, max_age=60, put_timeout=1, id_block=10
+    )
+    record = other_recorder.record(commands=2, result=4, duration=0.1)
+    assert record.timestamp.tzinfo is None
+    uri = f"tibber-developer-test/enter-path/{record.id}"
+
+    response = app.test_client().get(uri)
+    assert response.status_code == 202
+    assert response.headers["Retry-After"] == "1"
+    assert response.json["uri"] == f"/{uri}"
+
+    other_recorder.close()
+    response = app.test_client().get(uri)
+    assert response.status_code == 200
+    assert response.json["result"] == 4
+
+    # ids not taken from the sequence yet
+    response = app.test_client().get(
+        f"tibber-developer-test/enter-path/{record.id + 100}"
+    )
+    assert response.status_code == 404
+
+
+def test_get_cleaning_never_written(app, database, monkeypatch):
+    """
+    Test ids taken from the sequence but never written, like the rest of an
+    id block, are polled with 202 for `RECORDER_MAX_DELAY` seconds only.
+    """
+    monkeypatch.setattr(config, "WRITE_BEHIND", True)
+    other_recorder = ExecutionRecorder(
+        maxsize=10, batch_size=10, max_age=60, put_timeout=1, id_block=10
+    )
+    record = other_recorder.record(commands=2, result=4, duration=0.1)
+    other_recorder.close()
+    uri = f"tibber-developer-test/enter-path/{record.id + 1}"
+
+    response = app.test_client().get(uri)
+    assert response.status_code == 202
+
+    monkeypatch.setattr(config, "RECORDER_MAX_DELAY", 0)
+    response = app.test_client().get(uri)
+    assert response.status_code == 404
+
+
+def test_execute_cleaning_async(app, database):
+    """
+    Test asynchronous executions are queued and polled.
+    """
+    request_body = {
+        "start": {"x": 10, "y": 22},
+        "commands": [
+            {"direction": "east", "steps": 2},
+            {"direction": "north", "steps": 1},
+        ],
+    }
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path?mode=async", json=request_body
+    )
+
+    assert response.status_code == 202
+    assert response.json["status"] in ("pending", "running", "done")
+    assert response.json["uri"] == "/tibber-developer-test/enter-path/2"
+    assert response.headers["Location"] == response.json["uri"]
+
+    clean.job_queue.join()
+    response = app.test_client().get(response.json["uri"])
+    assert response.status_code == 200
+    assert response.json["status"] == "done"
+    assert response.json["result"] == 4
+    assert response.json["engine"] == "bitmap"
+
+    with Session() as session:
+        assert session.get(Execution, 2).path is None
+
+    response = app.test_client().get("tibber-developer-test/enter-path/10")
+    assert response.status_code == 404
+
+
+def test_list_cleanings(app, init_db):
+    """
+    Test executions are listed newest first, in chained pages.
+    """
+    with Session() as session:
+        session.add_all(
+            [
+                Execution(
+                    commands=i,
+                    result=i * 10,
+                    duration=0.1,
+                    timestamp=datetime(2024, 1, 1 + i % 3),
+                )
+                for i in range(10)
+            ]
+        )
+        session.commit()
+
+    ids = []
+    url = "tibber-developer-test/enter-path?limit=4"
+    while True:
+        response = app.test_client().get(url)
+        assert response.status_code == 200
+        executions = response.json["executions"]
+        assert len(executions) <= 4
+        ids += [int(e["uri"].rsplit("/", 1)[1]) for e in executions]
+        if response.json["next"] is None:
+            break
+        url = "tibber-developer-test/enter-path?limit=4&cursor="
+        url += response.json["next"]
+
+    # day 3 (ids 3, 6, 9), then day 2 (2, 5, 8), then day 1 (1, 4, 7, 10)
+    assert ids == [9, 6, 3, 8, 5, 2, 10, 7, 4, 1]
+
+    # filters
+    response = app.test_client().get(
+        "tibber-developer-test/enter-path?min_result=20&max_result=60"
+        "&min_commands=3&since=2024-01-02T00:00:00"
+    )
+    assert [e["result"] for e in response.json["executions"]] == [50, 40]
+    assert response.json["next"] is None
+
+    response = app.test_client().get(
+        "tibber-developer-test/enter-path?until=2024-01-01T12:00:00"
+    )
+    assert len(response.json["executions"]) == 4
+
+    for query in ("limit=0", "limit=x", "cursor=abc", "since=yesterday"):
+        response = app.test_client().get(
+            f"tibber-developer-test/enter-path?{query}",
+        )
+        assert response.status_code == 400
+
+
+def test_get_cleaning_cache(app, database):
+    """
+    Test finished executions are cached and revalidated with ETags.
+    """
+    response = app.test_client().get("tibber-developer-test/enter-path/1")
+    assert response.status_code == 200
+    assert response.json["result"] == 4
+    etag = response.headers["ETag"]
+    assert not etag.startswith("W/")
+
+    with patch("robot_cleaner.api.clean.get_execution") as m_get_execution:
+        response = app.test_client().get("tibber-developer-test/enter-path/1")
+        assert response.status_code == 200
+        assert response.headers["ETag"] == etag
+        assert response.json["result"] == 4
+
+        response = app.test_client().get(
+            "tibber-developer-test/enter-path/1",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert response.data == b""
+
+        response = app.test_client().get(
+            "tibber-developer-test/enter-path/1",
+            headers={"If-None-Match": '"other"'},
+        )
+        assert response.status_code == 200
+    m_get_execution.assert_not_called()
+
+    # pending executions are not cached
+    with Session() as session:
+        session.add(Execution(commands=0, status="pending"))
+        session.commit()
+
+    for _ in range(2):
+        response = app.test_client().get("tibber-developer-test/enter-path/2")
+        assert response.json["status"] == "pending"
+    assert len(cache.executions) == 1
+
+
+def test_execute_cleaning_async_queue_full(app, database, monkeypatch):
+    """
+    Test asynchronous executions are rejected when the queue is full.
+    """
+    job_queue = jobs.JobQueue("test_jobs", print, maxsize=1, threads=0)
+    job_queue.submit(1)
+    monkeypatch.setattr(clean, "get_job_queue", lambda: job_queue)
+
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path?mode=async",
+        json={"start": {"x": 0, "y": 0}, "commands": []},
+    )
+    assert response.status_code == 503
+
+    with Session() as session:
+        assert session.query(Execution).count() == 1
+
+
+def test_execute_cleaning_async_min_cost(app, database, monkeypatch):
+    """
+    Test expensive paths are always computed asynchronously.
+    """
+    monkeypatch.setattr(config, "ASYNC_MIN_COST", 2)
+    request_body = {
+        "start": {"x": 0, "y": 0},
+        "commands": [{"direction": "east", "steps": 2}],
+    }
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path", json=request_body
+    )
+    assert response.status_code == 200
+
+    request_body["commands"] *= 2
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path", json=request_body
+    )
+    assert response.status_code == 202
+    clean.job_queue.join()
+
+
+def test_recover_jobs(database):
+    """
+    Test pending and stale executions are recovered and computed once.
+    """
+    path = {
+        "start": {"x": 0, "y": 0},
+        "commands": [{"direction": "east", "steps": 2}],
+    }
+    with Session() as session:
+        session.add_all(
+            [
+                Execution(commands=1, status="pending", path=path),
+                Execution(
+                    commands=1,
+                    status="running",
+                    path=path,
+                    started_at=utcnow(),
+                ),
+                Execution(
+                    commands=1,
+                    status="running",
+                    path=path,
+                    started_at=datetime(2000, 1, 1),
+                ),
+            ]
+        )
+        session.commit()
+
+    assert clean.recover_jobs() == [2, 4]
+
+    clean.run_job(2)
+    clean.run_job(2)
+    clean.run_job(3)
+    assert clean.recover_jobs() == [4]
+
+    with Session() as session:
+        executions = session.query(Execution).order_by(Execution.id).all()
+        assert [execution.status for execution in executions] == [
+            "done",
+            "done",
+            "running",
+            "running",
+        ]
+        assert executions[1].result == 3
+        # naive UTC, like the other timestamps
+        started_at = executions[1].started_at
+        assert abs(utcnow() - started_at) < timedelta(minutes=1)
+
+
+def test_execute_cleaning_batch(app, database):
+    """
+    Test a batch of paths with invalid items.
+    """
+    path = {
+        "start": {"x": 10, "y": 22},
+        "commands": [
+            {"direction": "east", "steps": 2},
+            {"direction": "north", "steps": 1},
+        ],
+    }
+    request_body = [
+        path,
+        {"start": {"x": 200000, "y": 22}, "commands": []},
+        {
+            "start": {"x": -202, "y": -400},
+            "commands": [
+                {"direction": "south", "steps": 100},
+                {"direction": "north", "steps": 50},
+                {"direction": "east", "steps": 7},
+                {"direction": "west", "steps": 14},
+            ],
+        },
+        {"commands": []},
+        path,
+    ]
+    response = app.test_client().post(
+        "tibber-developer-test/enter-paths", json=request_body
+    )
+
+    assert response.status_code == 200
+    executions = response.json["executions"]
+    assert len(executions) == 5
+    assert [execution.get("result") for execution in executions] == [
+        4,
+        None,
+        115,
+        None,
+        4,
+    ]
+    assert executions[1]["error"] == "x value out of bounds: 200000"
+    assert executions[3]["error"].startswith("Invalid start: None.")
+    assert [execution.get("uri") for execution in executions] == [
+        "/tibber-developer-test/enter-path/2",
+        None,
+        "/tibber-developer-test/enter-path/3",
+        None,
+        "/tibber-developer-test/enter-path/4",
+    ]
+
+    with Session() as session:
+        assert session.query(Execution).count() == 4
+
+
+def test_execute_cleaning_batch_bad_request(app, database, monkeypatch):
+    """
+    Test invalid batches.
+    """
+    path = {
+        "start": {"x": 0, "y": 0},
+        "commands": [{"direction": "east", "steps": 2}],
+    }
+    response = app.test_client().post(
+        "tibber-developer-test/enter-paths",
+        json=path,
+    )
+    assert response.status_code == 400
+
+    monkeypatch.setattr(config, "MAX_BATCH_PATHS", 2)
+    response = app.test_client().post(
+        "tibber-developer-test/enter-paths", json=[path] * 3
+    )
+    assert response.status_code == 400
+
+    monkeypatch.setattr(config, "MAX_BATCH_COMMANDS", 1)
+    response = app.test_client().post(
+        "tibber-developer-test/enter-paths", json=[path] * 2
+    )
+    assert response.status_code == 400
+
+    response = app.test_client().post(
+        "tibber-developer-test/enter-paths?engine=unknown", json=[path]
+    )
+    assert response.status_code == 400
+
+    # empty batch
+    response = app.test_client().post(
+        "tibber-developer-test/enter-paths",
+        json=[],
+    )
+    assert response.status_code == 200
+    assert response.json["executions"] == []
+
+
+def test_execute_cleaning_stream(app, database, monkeypatch):
+    """
+    Test newline-delimited paths are answered line by line, in order.
+    """
+    monkeypatch.setattr(config, "STREAM_FLUSH_SIZE", 2)
+    paths = [
+        {
+            "start": {"x": 10, "y": 22},
+            "commands": [
+                {"direction": "east", "steps": 2},
+                {"direction": "north", "steps": 1},
+            ],
+        },
+        {"start": {"x": 200000, "y": 22}, "commands": []},
+        {
+            "start": {"x": 1, "y": 2},
+            "commands": [
+                {"direction": "south", "steps": 2},
+                {"direction": "north", "steps": 2},
+            ],
+        },
+    ]
+    request_body = "\n".join(json.dumps(path) for path in paths)
+    request_body += "\nnot json\n\n"
+
+    with patch(
+        "robot_cleaner.api.clean.add_executions", wraps=add_executions
+    ) as m_add_executions:
+        response = app.test_client().post(
+            "tibber-developer-test/enter-paths/stream",
+            data=request_body,
+            content_type="application/x-ndjson",
+        )
+        lines = response.data.decode().splitlines()
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    results = [json.loads(line) for line in lines]
+    assert [result.get("result") for result in results] == [4, None, 3, None]
+    assert results[1]["error"] == "x value out of bounds: 200000"
+    assert results[3]["error"] == "Invalid path: not json\n"
+    assert results[2]["uri"] == "/tibber-developer-test/enter-path/3"
+
+    # flushed every 2 lines
+    assert [len(c.args[1]) for c in m_add_executions.call_args_list] == [1, 1]
+
+    response = app.test_client().post(
+        "tibber-developer-test/enter-paths/stream?engine=unknown",
+        data=request_body,
+    )
+    assert response.status_code == 400
+
+
+def test_stream_executions_flush_interval(app, database, monkeypatch):
+    """
+    Test pending results are sent after `STREAM_FLUSH_INTERVAL` seconds
+    while the next line is not received yet.
+    """
+    monkeypatch.setattr(config, "STREAM_FLUSH_SIZE", 10)
+    monkeypatch.setattr(config, "STREAM_FLUSH_INTERVAL", 0.5)
+    path = {"start": {"x": 0, "y": 0}, "commands": []}
+    sent = threading.Event()
+
+    def lines():
+        yield json.dumps(path).encode()
+        assert sent.wait(5), "No result sent before the next line"
+        yield json.dumps(path).encode()
+
+    with app.app_context():
+        results = clean.stream_executions(lines(), None)
+        assert json.loads(next(results))["result"] == 1
+        sent.set()
+        assert [json.loads(line)["result"] for line in results] == [1]
+
+    def failing_lines():
+        yield b"not json"
+        raise ValueError("Disconnected")
+
+    with app.app_context():
+        results = clean.stream_executions(failing_lines(), None)
+        with pytest.raises(ValueError, match="Disconnected"):
+            list(results)
+
+
+def test_stream_executions_aborted(app, database, monkeypatch):
+    """
+    Test the input is no longer read once the generator is closed early.
+    """
+    readers = []
+
+    class LineReader(clean.LineReader):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            readers.append(self)
+
+    monkeypatch.setattr(clean, "LineReader", LineReader)
+    monkeypatch.setattr(config, "STREAM_FLUSH_SIZE", 1)
+    path = json.dumps({"start": {"x": 0, "y": 0}, "commands": []})
+    read = []
+
+    def lines():
+        while True:
+            read.append(path)
+            yield path.encode()
+
+    with app.app_context():
+        results = clean.stream_executions(lines(), None)
+        assert json.loads(next(results))["result"] == 1
+        results.close()
+
+    assert not readers[0].thread.is_alive()
+    count = len(read)
+    time.sleep(0.2)
+    assert len(read) == count
+
+
 def test_execute_cleaning_negative_input(app, database):
     """
     Test negative starting coordinates.
@@ -220,6 +782,120 @@ def test_execute_cleaning_bad_request_data(app, database):
     assert response.status_code == 400
 
 
+def test_execute_cleaning_malformed_data(app, database):
+    """
+    Test malformed paths are rejected with the index of the first invalid
+    command.
+    """
+    east = {"direction": "east", "steps": 2}
+    cases = [
+        ({"commands": []}, "Invalid start: None. Should be an object."),
+        (
+            {"start": {"x": "1", "y": 0}, "commands": []},
+            "x value should be an integer: 1",
+        ),
+        (
+            {"start": {"x": 0, "y": 0}, "commands": {}},
+            "Invalid commands: {}. Should be a list.",
+        ),
+        (
+            {"start": {"x": 0, "y": 0}, "commands": [east, "east"]},
+            "Command 1 should be an object: east",
+        ),
+        (
+            {
+                "start": {"x": 0, "y": 0},
+                "commands": [east, east, {"direction": "up", "steps": 1}],
+            },
+            "Direction value of command 2 should be one of: (north, south, east, west)",  # noqa
+        ),
+        (
+            {
+                "start": {"x": 0, "y": 0},
+                "commands": [east, {"direction": "west", "steps": 1.5}],
+            },
+            "Steps value of command 1 should be an integer: 1.5",
+        ),
+        (
+            {
+                "start": {"x": 0, "y": 0},
+                "commands": [{"direction": "west", "steps": True}],
+            },
+            "Steps value of command 0 should be an integer: True",
+        ),
+        (
+            {
+                "start": {"x": 0, "y": 0},
+                "commands": [east, {"direction": "west", "steps": 0}],
+            },
+            "Steps value of command 1 is out of bounds: 0",
+        ),
+    ]
+    for request_body, message in cases:
+        response = app.test_client().post(
+            "tibber-developer-test/enter-path", json=request_body
+        )
+        assert response.status_code == 400
+        assert message in response.text
+
+
+def test_execute_cleaning_decomposed(app, database, monkeypatch):
+    """
+    Test decomposed engines compute the segments of the validation pass,
+    without walking the commands again.
+    """
+    request_body = {
+        "start": {"x": -202, "y": -400},
+        "commands": [
+            {"direction": "south", "steps": 100},
+            {"direction": "north", "steps": 50},
+            {"direction": "east", "steps": 7},
+            {"direction": "west", "steps": 14},
+        ],
+    }
+    monkeypatch.setattr(cache, "results", cache.LRUCache(maxsize=0))
+    for engine in ("columnar", "bitmap", "parallel"):
+        with patch.object(clean, "prepare_path", side_effect=AssertionError):
+            response = app.test_client().post(
+                f"tibber-developer-test/enter-path?engine={engine}",
+                json=request_body,
+            )
+        assert response.status_code == 200
+        assert response.json["result"] == 115
+        assert response.json["engine"] == engine
+
+
+def test_validate_request_data(random_path):
+    data = random_path(3, commands=100, x=7, y=-5)
+    decomposition = clean.validate_request_data(data)
+
+    horizontal, vertical = divide_path(data)
+    assert list(decomposition.horizontal) == [
+        (y, min(x1, x2), max(x1, x2)) for (x1, y), (x2, _) in horizontal
+    ]
+    assert list(decomposition.vertical) == [
+        (x, min(y1, y2), max(y1, y2)) for (x, y1), (_, y2) in vertical
+    ]
+    assert decomposition.commands == len(data["commands"])
+    assert decomposition.total_steps == sum(
+        command["steps"] for command in data["commands"]
+    )
+    points = [point for segment in horizontal + vertical for point in segment]
+    assert decomposition.bounds == (
+        min(x for x, _ in points),
+        max(x for x, _ in points),
+        min(y for _, y in points),
+        max(y for _, y in points),
+    )
+    assert list(decomposition.steps) == [
+        command["steps"] for command in data["commands"]
+    ]
+
+    decomposition = clean.validate_request_data(data, decompose=False)
+    assert decomposition.horizontal is None
+    assert decomposition.commands == len(data["commands"])
+
+
 def test_execute_cleaning_bad_request_body(app, database):
     """
     Test invalid headers/request body.
@@ -525,6 +1201,40 @@ def test_count_intersections():
     assert count == 4
 
 
+def test_count_intersections_fenwick(random_path):
+    # test single intersection
+    vertical_segments = [((1, 0), (1, 2))]
+    horizontal_segments = [((0, 1), (2, 1))]
+    count = count_intersections_fenwick(vertical_segments, horizontal_segments)
+    assert count == 1
+
+    # test multiple intersections, including segment endpoints
+    vertical_segments = [
+        ((1, 0), (1, 3)),
+        ((3, 0), (3, 3)),
+        ((4, 1), (4, 2)),
+    ]
+    horizontal_segments = [
+        ((0, 1), (4, 1)),
+        ((0, 2), (4, 2)),
+        ((3, 3), (4, 3)),
+    ]
+    count = count_intersections_fenwick(vertical_segments, horizontal_segments)
+    assert count == 7
+
+    # test no vertical/horizontal segments
+    assert count_intersections_fenwick([], [((0, 2), (5, 2))]) == 0
+    assert count_intersections_fenwick([((2, 1), (2, 3))], []) == 0
+
+    # test same result as the sorted list sweep on merged random paths
+    for seed in range(20):
+        horizontal, vertical = divide_path(random_path(seed, spread=5))
+        vertical = merge_overlapping(vertical, axis=0)
+        horizontal = merge_overlapping(horizontal, axis=1)
+        expected = count_intersections(vertical, horizontal)
+        assert count_intersections_fenwick(vertical, horizontal) == expected
+
+
 def test_count_segment_points():
     # test vertical positive pointd
     assert count_segment_points((0, 0), (0, 5)) == 6
@@ -549,6 +1259,88 @@ def test_count_segment_points():
     assert count_segment_points((5, 0), (0, 0)) == 6
     assert count_segment_points((0, 0), (5, 0)) == 6
 
+    # test segments crossing an axis
+    assert count_segment_points((0, -2), (0, 3)) == 6
+    assert count_segment_points((-3, 4), (3, 4)) == 7
+
     # test non aligned points
     assert count_segment_points((0, 0), (5, 5)) == 0
     assert count_segment_points((3, 4), (7, 8)) == 0
+
+
+def test_normalize_commands(random_path):
+    # coalesce same direction commands
+    commands = [
+        {"direction": "east", "steps": 3},
+        {"direction": "east", "steps": 5},
+        {"direction": "east", "steps": 2},
+    ]
+    normalized = normalize_commands(commands)
+    assert list(normalized) == [{"direction": "east", "steps": 10}]
+
+    # fold back-and-forth moves, keeping the end position
+    commands = [
+        {"direction": "north", "steps": 5},
+        {"direction": "south", "steps": 2},
+        {"direction": "north", "steps": 1},
+        {"direction": "south", "steps": 7},
+        {"direction": "north", "steps": 3},
+        {"direction": "east", "steps": 0},
+        {"direction": "west", "steps": 1},
+    ]
+    assert list(normalize_commands(commands)) == [
+        {"direction": "south", "steps": 3},
+        {"direction": "north", "steps": 8},
+        {"direction": "south", "steps": 5},
+        {"direction": "west", "steps": 1},
+    ]
+
+    # zero steps only
+    assert list(normalize_commands([{"direction": "east", "steps": 0}])) == []
+
+    # same result
+    for seed in range(30):
+        data = random_path(seed, commands=seed * 10, spread=seed % 5 + 1)
+        normalized = list(normalize_commands(data["commands"]))
+        assert calculate_unique_places(
+            {"start": data["start"], "commands": normalized}
+        ) == calculate_unique_places(data)
+
+
+def test_prepare_path(monkeypatch, random_path):
+    """
+    Test normalized commands are packed and keyed like a command list.
+    """
+    data = random_path(5, commands=200, spread=3, x=4)
+    normalized = list(normalize_commands(data["commands"]))
+
+    path, key = clean.prepare_path(data)
+    assert path["start"] == data["start"]
+    assert isinstance(path["commands"], clean.CommandList)
+    assert list(path["commands"]) == normalized
+    assert key == cache.path_key({"commands": normalized})
+
+    monkeypatch.setattr(config, "NORMALIZE_COMMANDS", False)
+    path, key = clean.prepare_path(data)
+    assert path is data
+    assert key == cache.path_key(data)
+
+    packed = {**data, "commands": clean.CommandList.pack(data["commands"])}
+    assert clean.prepare_path(packed) == (packed, key)
+
+
+def test_compute_path_external(monkeypatch, random_path):
+    """
+    Test paths computed by the external engine are neither normalized nor
+    cached.
+    """
+    monkeypatch.setattr(config, "MAX_COMMANDS", 50)
+    data = random_path(6, commands=100, spread=3)
+    decomposition = clean.validate_request_data(data)
+    cache.results.clear()
+
+    with patch.object(clean, "prepare_path", side_effect=AssertionError):
+        engine, result = clean.compute_path(data, None, decomposition)
+    assert engine == "external"
+    assert result == calculate_unique_places(data)
+    assert len(cache.results) == 0
@@ -0,0 +1,162 @@
+import asyncio
+
+from mock import patch
+
+from robot_cleaner import jobs
+from robot_cleaner.api import clean
+from robot_cleaner.db import Session
+from robot_cleaner.models import Execution
+
+
+REQUEST_BODY = {
+    "start": {"x": 10, "y": 22},
+    "commands": [
+        {"direction": "east", "steps": 2},
+        {"direction": "north", "steps": 1},
+    ],
+}
+JSON_HEADERS = {"Content-Type": "application/json"}
+TEXT_HEADERS = {"Content-Type": "text/plain"}
+
+
+def test_execute_cleaning(app, asgi_client, database):
+    """
+    Test the asyncio view responds like the WSGI one.
+    """
+    response = asgi_client.post(
+        "/tibber-developer-test/enter-path",
+        json=REQUEST_BODY,
+    )
+    expected = app.test_client().post(
+        "/tibber-developer-test/enter-path", json=REQUEST_BODY
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == expected.content_type
+    assert response.json()["uri"] == "/tibber-developer-test/enter-path/2"
+    assert response.json().keys() == expected.json.keys()
+    for key in ("commands", "result", "engine", "status"):
+        assert response.json()[key] == expected.json[key]
+
+    # The timestamp is encoded like Flask does.
+    with Session() as session:
+        execution = session.get(Execution, 2)
+        assert execution.result == 4
+        assert response.json()["timestamp"] == app.json.dumps(
+            execution.timestamp
+        ).strip('"')
+
+
+def test_execute_cleaning_errors(app, asgi_client, database):
+    """
+    Test the asyncio view fails like the WSGI one.
+    """
+    for body, kwargs in (
+        ({"start": {"x": 0, "y": 0}, "commands": [{"steps": 1}]}, {}),
+        (None, {"content": b"{", "headers": JSON_HEADERS}),
+        (None, {"content": b"{}", "headers": TEXT_HEADERS}),
+        ({"start": {"x": 0, "y": None}, "commands": []}, {}),
+    ):
+        if body is not None:
+            kwargs = {"json": body}
+        response = asgi_client.post(
+            "/tibber-developer-test/enter-path",
+            **kwargs,
+        )
+        if "json" not in kwargs:
+            kwargs["data"] = kwargs.pop("content")
+        expected = app.test_client().post(
+            "/tibber-developer-test/enter-path",
+            **kwargs,
+        )
+
+        assert response.status_code == expected.status_code
+        assert response.content == expected.data
+
+    with Session() as session:
+        assert session.query(Execution).count() == 1
+
+
+def test_execute_cleaning_off_event_loop(asgi_client, database):
+    """
+    Test paths are computed outside of the event loop thread.
+    """
+
+    def compute_path(data, engine_name, decomposition):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return "python", 4
+        raise AssertionError("Computed in the event loop thread")
+
+    with patch.object(clean, "compute_path", side_effect=compute_path):
+        response = asgi_client.post(
+            "/tibber-developer-test/enter-path", json=REQUEST_BODY
+        )
+
+    assert response.status_code == 200
+    assert response.json()["result"] == 4
+
+
+def test_execute_cleaning_async(asgi_client, database):
+    """
+    Test asynchronous executions are queued and polled through the WSGI app.
+    """
+    response = asgi_client.post(
+        "/tibber-developer-test/enter-path?mode=async", json=REQUEST_BODY
+    )
+
+    assert response.status_code == 202
+    assert response.json()["uri"] == "/tibber-developer-test/enter-path/2"
+    assert response.headers["Location"] == response.json()["uri"]
+
+    clean.job_queue.join()
+    response = asgi_client.get(response.json()["uri"])
+    assert response.status_code == 200
+    assert response.json()["status"] == "done"
+    assert response.json()["result"] == 4
+
+    response = asgi_client.get("/tibber-developer-test/enter-path")
+    assert response.status_code == 200
+    assert len(response.json()["executions"]) == 2
+
+
+def test_execute_cleaning_async_queue_full(asgi_client, database, monkeypatch):
+    """
+    Test asynchronous executions are rejected when the queue is full.
+    """
+    job_queue = jobs.JobQueue("test_jobs", print, maxsize=1, threads=0)
+    job_queue.submit(1)
+    monkeypatch.setattr(clean, "get_job_queue", lambda: job_queue)
+
+    response = asgi_client.post(
+        "/tibber-developer-test/enter-path?mode=async",
+        json={"start": {"x": 0, "y": 0}, "commands": []},
+    )
+    assert response.status_code == 503
+
+    with Session() as session:
+        assert session.query(Execution).count() == 1
+
+
+def test_execute_cleaning_unauthorized(monkeypatch, database):
+    """
+    Test the asyncio view checks the API token.
+    """
+    from starlette.testclient import TestClient
+
+    from robot_cleaner import asgi
+
+    with TestClient(asgi.create_app(is_production=True)) as client:
+        response = client.post(
+            "/tibber-developer-test/enter-path",
+            json=REQUEST_BODY,
+        )
+        assert response.status_code == 401
+
+        response = client.post(
+            "/tibber-developer-test/enter-path",
+            json=REQUEST_BODY,
+            headers={"Authorization": "Bearer random-test-token"},
+        )
+        assert response.status_code == 200
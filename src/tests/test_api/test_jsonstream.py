@@ -0,0 +1,229 @@
+import io
+import json
+
+import pytest
+
+from werkzeug.exceptions import BadRequest
+
+from robot_cleaner import cache, config
+from robot_cleaner.api import clean, jsonstream
+from robot_cleaner.api.jsonstream import CommandList, parse_path
+
+
+class ChunkedBody:
+    """
+    Body read in small chunks, which fails when read past `limit` bytes.
+    """
+
+    def __init__(self, body: bytes, limit: int):
+        self.body = io.BytesIO(body)
+        self.limit = limit
+
+    def read(self, size=-1):
+        if self.body.tell() >= self.limit:
+            raise AssertionError("Read past the invalid command")
+        return self.body.read(min(size, 16))
+
+
+def test_parse_path(random_path):
+    """
+    Test incrementally parsed paths are validated and divided like buffered
+    ones, from (0, 0).
+    """
+    for seed in range(10):
+        data = random_path(
+            seed,
+            commands=seed * 20,
+            x=seed,
+            y=-seed,
+        )
+        body = json.dumps(data).encode()
+        parsed, decomposition = parse_path(io.BytesIO(body))
+
+        assert parsed["start"] == data["start"]
+        assert isinstance(parsed["commands"], CommandList)
+        assert list(parsed["commands"]) == data["commands"]
+        assert parsed["commands"][1:3] == data["commands"][1:3]
+
+        expected = clean.decompose_commands(0, 0, data["commands"])
+        assert decomposition.commands == expected.commands
+        assert decomposition.total_steps == expected.total_steps
+        assert decomposition.bounds == expected.bounds
+        assert list(decomposition.horizontal) == list(expected.horizontal)
+        assert list(decomposition.vertical) == list(expected.vertical)
+
+
+def test_parse_path_large_path(monkeypatch, random_path):
+    """
+    Test no segments are built past `MAX_COMMANDS` commands.
+    """
+    monkeypatch.setattr(config, "MAX_COMMANDS", 50)
+    appended = []
+    monkeypatch.setattr(
+        clean.SegmentStore,
+        "append",
+        lambda self, *segment: appended.append(segment),
+    )
+    data = random_path(2, commands=120)
+    parsed, decomposition = parse_path(io.BytesIO(json.dumps(data).encode()))
+
+    assert len(appended) == 50
+    assert decomposition.horizontal is None
+    assert decomposition.vertical is None
+    assert decomposition.commands == 120
+    assert list(parsed["commands"]) == data["commands"]
+
+
+def test_parse_path_member_order():
+    """
+    Test the commands may come before the start, and other members are
+    ignored.
+    """
+    body = (
+        b'{"commands": [{"steps": 2, "direction": "east"},'
+        b' {"direction": "north", "steps": 1, "note": [1, {"a": 2}]}],'
+        b' "extra": {"x": [1, 2]}, "start": {"x": 10, "y": 22}}'
+    )
+    data, decomposition = parse_path(io.BytesIO(body))
+
+    assert data["start"] == {"x": 10, "y": 22}
+    assert list(data["commands"]) == [
+        {"direction": "east", "steps": 2},
+        {"direction": "north", "steps": 1},
+    ]
+    assert decomposition.bounds == (0, 2, 0, 1)
+
+
+def test_parse_path_errors():
+    """
+    Test invalid bodies are rejected like buffered ones.
+    """
+    east = '{"direction": "east", "steps": 2}'
+    for body, message in (
+        ("[1, 2]", "Invalid data: [1, 2]. Data should be valid json."),
+        ('{"commands": []}', "Invalid start: None. Should be an object."),
+        (
+            '{"start": {"x": 0, "y": 200000}, "commands": []}',
+            "y value out of bounds: 200000",
+        ),
+        ('{"start": {"x": 0, "y": 0}}', "Invalid commands: None."),
+        (
+            '{"start": {"x": 0, "y": 0}, "commands": {"a": 1}}',
+            "Invalid commands: {'a': 1}. Should be a list.",
+        ),
+        (
+            f'{{"start": {{"x": 0, "y": 0}}, "commands": [{east}, 3]}}',
+            "Command 1 should be an object: 3",
+        ),
+        (
+            f'{{"start": {{"x": 0, "y": 0}}, "commands": [{east}, {east},'
+            ' {"direction": ["east"], "steps": 1}]}',
+            "Direction value of command 2 should be one of:",
+        ),
+        (
+            '{"start": {"x": 0, "y": 0},'
+            ' "commands": [{"direction": "east", "steps": 2.5}]}',
+            "Steps value of command 0 should be an integer: 2.5",
+        ),
+        ('{"start": {"x": 0, "y": 0}, "commands": [', None),
+        ('{"start": {"x": 0, "y": 0}, "commands": []} []', None),
+        ("", None),
+    ):
+        with pytest.raises(BadRequest) as exc_info:
+            parse_path(io.BytesIO(body.encode()))
+        if message is None:
+            assert exc_info.value.description == BadRequest.description
+        else:
+            assert exc_info.value.description.startswith(message)
+
+
+def test_parse_path_fails_fast(monkeypatch):
+    """
+    Test the body is not read further than an invalid command.
+    """
+    monkeypatch.setattr(jsonstream, "BUFFER_SIZE", 16)
+    commands = [{"direction": "east", "steps": 1}] * 1000
+    commands[10] = {"direction": "east", "steps": 0}
+    body = json.dumps({"start": {"x": 0, "y": 0}, "commands": commands})
+
+    with pytest.raises(BadRequest) as exc_info:
+        parse_path(ChunkedBody(body.encode(), limit=1000))
+    assert exc_info.value.description == (
+        "Steps value of command 10 is out of bounds: 0"
+    )
+
+
+def test_execute_cleaning_incremental(
+    app, asgi_client, database, monkeypatch, random_path
+):
+    """
+    Test large bodies are parsed incrementally and give the results of
+    buffered ones.
+    """
+    client = app.test_client()
+    for seed in range(3):
+        data = random_path(seed, commands=300, spread=20)
+        body = json.dumps(data)
+        expected = clean.calculate_unique_places(data)
+
+        for engine in ("", "?engine=columnar", "?engine=python"):
+            for min_length in (0, 1):
+                monkeypatch.setattr(
+                    config,
+                    "JSON_STREAM_MIN_LENGTH",
+                    min_length,
+                )
+                cache.results.clear()
+                response = client.post(
+                    f"tibber-developer-test/enter-path{engine}",
+                    data=body,
+                    content_type="application/json",
+                )
+                assert response.status_code == 200
+                assert response.json["result"] == expected
+                assert response.json["commands"] == 300
+
+        cache.results.clear()
+        response = asgi_client.post(
+            "/tibber-developer-test/enter-path",
+            content=body,
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 200
+        assert response.json()["result"] == expected
+
+    response = client.post(
+        "tibber-developer-test/enter-path",
+        data=body,
+        content_type="text/plain",
+    )
+    assert response.status_code == 415
+
+
+def test_execute_cleaning_incremental_large_path(
+    app, database, monkeypatch, random_path
+):
+    """
+    Test paths above `MAX_COMMANDS` are computed by the external engine and
+    asynchronous executions store the json path.
+    """
+    monkeypatch.setattr(config, "JSON_STREAM_MIN_LENGTH", 1)
+    monkeypatch.setattr(config, "MAX_COMMANDS", 50)
+    data = random_path(4, commands=100, spread=20)
+    cache.results.clear()
+
+    client = app.test_client()
+    response = client.post("tibber-developer-test/enter-path", json=data)
+    assert response.status_code == 200
+    assert response.json["engine"] == "external"
+    assert response.json["result"] == clean.calculate_unique_places(data)
+
+    submitted = []
+    monkeypatch.setattr(clean.job_queue, "submit", submitted.append)
+    response = client.post(
+        "tibber-developer-test/enter-path?mode=async",
+        json=data,
+    )
+    assert response.status_code == 202
+    path, _ = clean.claim_job(submitted[0])
+    assert path == data
@@ -0,0 +1,162 @@
+import pytest
+
+from werkzeug.exceptions import BadRequest
+
+from robot_cleaner import cache, config
+from robot_cleaner.api import clean
+from robot_cleaner.api.packed import decode_path
+from robot_cleaner.packing import CONTENT_TYPE, HEADER, MAGIC, encode_path
+
+
+HEADERS = {"Content-Type": CONTENT_TYPE}
+
+
+def test_round_trip(random_path):
+    """
+    Test binary uploads decode to the json path they were encoded from.
+    """
+    for seed in range(20):
+        data = random_path(seed, commands=seed * 10, x=seed - 10, y=-seed)
+        body = encode_path(data)
+
+        assert len(body) == HEADER.size + 5 * len(data["commands"])
+        path = decode_path(body)
+        assert path.to_json() == data
+        # The commands are read in place.
+        assert not path.directions.flags.owndata
+        assert not path.steps.flags.owndata
+
+
+def test_decode_errors():
+    """
+    Test invalid binary uploads are rejected with the offending command.
+    """
+    data = {
+        "start": {"x": 0, "y": 0},
+        "commands": [
+            {"direction": "north", "steps": 1},
+            {"direction": "east", "steps": 2},
+        ],
+    }
+    body = encode_path(data)
+
+    for invalid, message in (
+        (body[:10], "Invalid path: 10 bytes header."),
+        (b"XXXX" + body[4:], "Invalid path: unknown format b'XXXX'."),
+        (body[:-1], "Invalid path: 2 commands take 26 bytes, got 25."),
+        (body[:-5] + b"\x04" + body[-4:], "Direction code of command 1"),
+        (body[:-4] + b"\x00" * 4, "Steps value of command 1 is out of"),
+        (
+            HEADER.pack(MAGIC, 100001, 0, 0),
+            "x value out of bounds: 100001",
+        ),
+    ):
+        with pytest.raises(BadRequest) as exc_info:
+            decode_path(invalid)
+        assert exc_info.value.description.startswith(message)
+
+
+def test_execute_cleaning_packed(app, asgi_client, database, random_path):
+    """
+    Test binary uploads give the results of their json form.
+    """
+    client = app.test_client()
+    for seed in range(5):
+        data = random_path(seed, commands=100, spread=30)
+        expected = calculate_result(data)
+
+        for engine in ("", "?engine=auto", "?engine=bitmap", "?engine=numpy"):
+            cache.results.clear()
+            response = client.post(
+                f"tibber-developer-test/enter-path{engine}",
+                data=encode_path(data),
+                headers=HEADERS,
+            )
+            assert response.status_code == 200
+            assert response.json["result"] == expected
+            assert response.json["commands"] == 100
+
+        cache.results.clear()
+        response = asgi_client.post(
+            "/tibber-developer-test/enter-path",
+            content=encode_path(data),
+            headers=HEADERS,
+        )
+        assert response.status_code == 200
+        assert response.json()["result"] == expected
+
+
+def calculate_result(data):
+    return clean.calculate_unique_places(
+        {"start": data["start"], "commands": data["commands"]}
+    )
+
+
+def test_execute_cleaning_packed_errors(app, database):
+    """
+    Test invalid binary uploads and engines are rejected.
+    """
+    body = encode_path({"start": {"x": 0, "y": 0}, "commands": []})
+
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path?engine=python",
+        data=body,
+        headers=HEADERS,
+    )
+    assert response.status_code == 400
+    assert b"does not compute binary paths" in response.data
+
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path",
+        data=body[:-1],
+        headers=HEADERS,
+    )
+    assert response.status_code == 400
+
+
+def test_execute_cleaning_packed_cached(
+    app,
+    database,
+    random_path,
+    monkeypatch,
+):
+    """
+    Test binary uploads share the cached results of their json form.
+    """
+    monkeypatch.setattr(config, "NORMALIZE_COMMANDS", False)
+    data = random_path(1)
+    client = app.test_client()
+    response = client.post("tibber-developer-test/enter-path", json=data)
+    hits = cache.results.hits
+
+    response = client.post(
+        "tibber-developer-test/enter-path",
+        data=encode_path(data),
+        headers=HEADERS,
+    )
+    assert response.status_code == 200
+    assert cache.results.hits == hits + 1
+
+
+def test_execute_cleaning_packed_async(app, database):
+    """
+    Test binary uploads are computed asynchronously from their json form.
+    """
+    data = {
+        "start": {"x": 10, "y": 22},
+        "commands": [
+            {"direction": "east", "steps": 2},
+            {"direction": "north", "steps": 1},
+        ],
+    }
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path?mode=async",
+        data=encode_path(data),
+        headers=HEADERS,
+    )
+    assert response.status_code == 202
+
+    clean.job_queue.join()
+    response = app.test_client().get(response.json["uri"])
+    assert response.json["status"] == "done"
+    assert response.json["result"] == 4
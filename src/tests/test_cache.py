@@ -0,0 +1,107 @@
+from mock import patch
+
+from robot_cleaner import cache
+
+
+def test_lru_cache():
+    lru = cache.LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+
+    # "b" is the least recently used item
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("c") == 3
+    assert lru.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+    }
+
+
+def test_lru_cache_disabled():
+    lru = cache.LRUCache(maxsize=0)
+    lru.set("a", 1)
+    assert lru.get("a") is None
+
+
+def test_path_key():
+    data = {
+        "start": {"x": 0, "y": 0},
+        "commands": [
+            {"direction": "east", "steps": 2},
+            {"direction": "north", "steps": 1},
+        ],
+    }
+    key = cache.path_key(data)
+
+    # translated
+    assert key == cache.path_key({**data, "start": {"x": 5, "y": -3}})
+    # rotated by 90 degrees
+    assert key == cache.path_key(
+        {
+            "start": {"x": 0, "y": 0},
+            "commands": [
+                {"direction": "north", "steps": 2},
+                {"direction": "west", "steps": 1},
+            ],
+        }
+    )
+    # mirrored
+    assert key == cache.path_key(
+        {
+            "start": {"x": 0, "y": 0},
+            "commands": [
+                {"direction": "west", "steps": 2},
+                {"direction": "north", "steps": 1},
+            ],
+        }
+    )
+    # different steps
+    assert key != cache.path_key(
+        {
+            "start": {"x": 0, "y": 0},
+            "commands": [
+                {"direction": "east", "steps": 1},
+                {"direction": "north", "steps": 2},
+            ],
+        }
+    )
+
+
+def test_execute_cleaning_cached_result(app, database):
+    cache.results.clear()
+    request_body = {
+        "start": {"x": 10, "y": 22},
+        "commands": [
+            {"direction": "east", "steps": 2},
+            {"direction": "north", "steps": 1},
+            {"direction": "west", "steps": 3},
+        ],
+    }
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path", json=request_body
+    )
+    assert response.json["result"] == 7
+
+    mirrored_body = {
+        "start": {"x": -4, "y": 0},
+        "commands": [
+            {"direction": "west", "steps": 2},
+            {"direction": "south", "steps": 1},
+            {"direction": "east", "steps": 3},
+        ],
+    }
+    with patch("robot_cleaner.workers.run") as m_run:
+        response = app.test_client().post(
+            "tibber-developer-test/enter-path", json=mirrored_body
+        )
+    m_run.assert_not_called()
+    assert response.status_code == 200
+    assert response.json["result"] == 7
+
+    response = app.test_client().get("/_metrics")
+    assert response.json["result_cache"]["hits"] >= 1
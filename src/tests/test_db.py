@@ -1,15 +1,25 @@
+import subprocess
+import sys
+
+import pytest
+
 from mock import patch, MagicMock
 
-from sqlalchemy.exc import OperationalError, DataError
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DataError, OperationalError, TimeoutError
+
+from robot_cleaner import config, db
+from robot_cleaner.models.execution import add_execution, add_executions
 
 
 @patch("robot_cleaner.api.clean.add_execution")
 def test_execute_cleaning_on_exception_max_tries(
-    m_execute_cleaning: MagicMock, app, caplog, database
+    m_execute_cleaning: MagicMock, app, caplog, database, monkeypatch
 ):
     """
     Test db calls giving up after 3 retries on operational errors.
     """
+    monkeypatch.setattr(config, "DB_PERSIST_MAX_TRIES", 3)
     m_execute_cleaning.side_effect = OperationalError(
         None,
         None,
@@ -22,14 +32,50 @@ def test_execute_cleaning_on_exception_max_tries(
     )
 
     assert m_execute_cleaning.call_count == 3
-    assert "Backing off execute_cleaning(...)" in caplog.records[0].message  # noqa
-    assert "Backing off execute_cleaning(...)" in caplog.records[1].message  # noqa
+    assert "Backing off persist_execution(...)" in caplog.records[0].message  # noqa
+    assert "Backing off persist_execution(...)" in caplog.records[1].message  # noqa
     assert (
-        "Giving up execute_cleaning(...) after 3 tries"
+        "Giving up persist_execution(...) after 3 tries"
         in caplog.records[2].message  # noqa
     )
 
 
+@patch("robot_cleaner.api.clean.compute_path")
+@patch("robot_cleaner.api.clean.add_execution")
+def test_execute_cleaning_retries_persistence_only(
+    m_add_execution: MagicMock,
+    m_compute_path: MagicMock,
+    app,
+    database,
+    monkeypatch,
+):
+    """
+    Test the path is computed once when persisting its result is retried.
+    """
+    monkeypatch.setattr(config, "DB_PERSIST_MAX_TRIES", 2)
+    m_compute_path.return_value = ("python", 1)
+    m_add_execution.side_effect = OperationalError(
+        None,
+        None,
+        "Connection Failure",
+    )
+    retries = db.retry_metrics.snapshot()
+
+    app.test_client().post(
+        "/tibber-developer-test/enter-path",
+        json={"start": {"x": 1, "y": 2}, "commands": []},
+    )
+
+    stats = db.retry_metrics.snapshot()
+    assert m_add_execution.call_count == 2
+    assert m_compute_path.call_count == 1
+    assert stats["retries"] == retries["retries"] + 1
+    assert stats["giveups"] == retries["giveups"] + 1
+    assert stats["persist_execution.retries"] == (
+        retries.get("persist_execution.retries", 0) + 1
+    )
+
+
 @patch("robot_cleaner.api.clean.add_execution")
 def test_no_retries_on_non_operational_errors(
     m_execute_cleaning: MagicMock, app, database
@@ -48,3 +94,94 @@ def test_no_retries_on_non_operational_errors(
         json={"start": {"x": 1, "y": 2}, "commands": []},
     )
     assert m_execute_cleaning.call_count == 1
+
+
+def test_add_execution_single_statement(database):
+    """
+    Test executions are inserted and read back in one statement.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        with db.Session() as session:
+            execution = add_execution(
+                session,
+                commands=2,
+                result=4,
+                duration=0.1,
+            )
+            executions = add_executions(
+                session,
+                [
+                    {"commands": 1, "result": 2, "duration": 0.1},
+                    {"commands": 3, "result": 5, "duration": 0.1},
+                ],
+            )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    assert len(statements) == 2
+    assert all(statement.startswith("INSERT") for statement in statements)
+    assert (execution.id, execution.result, execution.status) == (2, 4, "done")
+    assert execution.timestamp is not None
+    assert [execution.id for execution in executions] == [3, 4]
+    assert [execution.result for execution in executions] == [2, 5]
+
+
+def test_pool_stats(app, database):
+    """
+    Test pool stats count checked out connections and checkouts.
+    """
+    before = db.pool_stats()
+    with db.engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        during = db.pool_stats()
+
+    after = app.test_client().get("/_metrics").json["db_pool"]
+    assert during["checked_out"] == before["checked_out"] + 1
+    assert during["checkouts"] == before["checkouts"] + 1
+    assert after["checked_out"] == before["checked_out"]
+    assert after["size"] == config.DB_POOL_SIZE
+    assert after["avg_wait"] >= 0
+
+
+def test_pool_checkout_timeout(database):
+    """
+    Test checkouts timing out on an exhausted pool are counted.
+    """
+    engine = create_engine(
+        config.SQLALCHEMY_URI,
+        poolclass=db.InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    timeouts = db.pool_stats()["timeouts"]
+    try:
+        with engine.connect():
+            with pytest.raises(TimeoutError):
+                engine.connect()
+    finally:
+        engine.dispose()
+
+    stats = db.pool_stats()
+    assert stats["timeouts"] == timeouts + 1
+    assert stats["max_wait"] >= 0.1
+
+
+def test_engine_created_lazily():
+    """
+    Test importing the application creates neither the engine nor the app.
+    """
+    code = (
+        "import sys\n"
+        "from robot_cleaner import app, db\n"
+        "assert db._engine is None and app._app is None\n"
+        "assert 'sortedcontainers' not in sys.modules\n"
+        "assert db.Session.kw['bind'] is db.engine is db.get_engine()\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,50 @@
+from robot_cleaner import config
+from robot_cleaner.api.clean import CommandList, validate_request_data
+from robot_cleaner.engines import auto, bitmap
+
+
+def test_choose_engine(monkeypatch, random_path):
+    # compact path
+    data = random_path(0, commands=1000, spread=3)
+    assert auto.choose_engine(data) == "bitmap"
+
+    # sparse path
+    data = random_path(0, commands=10, spread=10000)
+    assert auto.choose_engine(data) == "numpy"
+
+    # sparse repeated path
+    data["commands"] *= 100
+    assert auto.choose_engine(data) == "periodic"
+
+    # compact path above the grid limit
+    monkeypatch.setattr(config, "BITMAP_MAX_CELLS", 100)
+    data = random_path(0, commands=1000, spread=3)
+    assert auto.choose_engine(data) == "numpy"
+
+    # path above the command limit
+    monkeypatch.setattr(config, "MAX_COMMANDS", 100)
+    assert auto.choose_engine(data) == "external"
+
+
+def test_choose_engine_total_steps(monkeypatch, random_path):
+    """
+    Test short paths are sent to the grid without computing their bounds,
+    which are known to fit from their total steps.
+    """
+    data = random_path(1, commands=50, spread=2)
+    decomposition = validate_request_data(data)
+    area = auto.max_area(decomposition.total_steps)
+    assert area >= decomposition.bounds.area
+
+    monkeypatch.setattr(bitmap, "path_bounds", None)
+    assert auto.choose_engine(data) == "bitmap"
+    packed = {**data, "commands": CommandList.pack(data["commands"])}
+    assert auto.choose_engine(packed) == "bitmap"
+    assert auto.choose_engine(data, decomposition) == "bitmap"
+
+
+def test_max_area():
+    assert auto.max_area(0) == 1
+    assert auto.max_area(1) == 2
+    assert auto.max_area(4) == 9
+    assert auto.max_area(5) == 12
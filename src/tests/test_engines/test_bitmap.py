@@ -0,0 +1,43 @@
+from robot_cleaner import config
+from robot_cleaner.api.clean import (
+    calculate_unique_places,
+    validate_request_data,
+)
+from robot_cleaner.engines import bitmap
+
+
+def test_path_bounds():
+    commands = [
+        {"direction": "west", "steps": 3},
+        {"direction": "north", "steps": 2},
+        {"direction": "east", "steps": 5},
+        {"direction": "south", "steps": 4},
+    ]
+    bounds = bitmap.path_bounds(commands)
+    assert bounds == bitmap.Bounds(-3, 2, -2, 2)
+    assert bounds.area == 30
+
+    assert bitmap.path_bounds([]).area == 1
+
+
+def test_calculate_unique_places_cell_cap(monkeypatch, random_path):
+    """
+    Grids above `BITMAP_MAX_CELLS` are never allocated.
+    """
+    data = {
+        "start": {"x": 0, "y": 0},
+        "commands": [
+            {"direction": "east", "steps": 99999},
+            {"direction": "north", "steps": 99999},
+        ],
+    }
+    monkeypatch.setattr(bitmap, "mark", None)
+    assert bitmap.calculate_unique_places(data) == 199999
+    decomposition = validate_request_data(data)
+    assert bitmap.calculate_unique_places_decomposed(decomposition) == 199999
+
+    monkeypatch.setattr(config, "BITMAP_MAX_CELLS", 10)
+    for seed in range(5):
+        data = random_path(seed, commands=100, spread=5)
+        expected = calculate_unique_places(data)
+        assert bitmap.calculate_unique_places(data) == expected
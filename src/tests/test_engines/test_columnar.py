@@ -0,0 +1,40 @@
+from robot_cleaner.engines import columnar
+
+
+def test_divide_path():
+    data = {
+        "start": {"x": 0, "y": 0},
+        "commands": [
+            {"direction": "east", "steps": 5},
+            {"direction": "north", "steps": 5},
+            {"direction": "west", "steps": 3},
+            {"direction": "south", "steps": 2},
+        ],
+    }
+    horizontal, vertical = columnar.divide_path(data)
+    assert list(horizontal) == [(0, 0, 5), (5, 2, 5)]
+    assert list(vertical) == [(5, 0, 5), (2, 3, 5)]
+
+
+def test_merge_overlapping():
+    store = columnar.SegmentStore()
+    for segment in [(1, 6, 8), (1, 1, 5), (1, 7, 3), (0, 1, 0), (2, 5, 5)]:
+        store.append(*segment)
+
+    columnar.merge_overlapping(store)
+    assert list(store) == [(0, 0, 1), (1, 1, 8), (2, 5, 5)]
+
+    # negative coordinates
+    store = columnar.SegmentStore()
+    for segment in [(-202, -400, -500), (-202, -500, -450)]:
+        store.append(*segment)
+
+    columnar.merge_overlapping(store)
+    assert list(store) == [(-202, -500, -400)]
+
+
+def test_count_points():
+    store = columnar.SegmentStore()
+    for segment in [(0, -2, 3), (1, 4, 4)]:
+        store.append(*segment)
+    assert columnar.count_points(store) == 7
@@ -0,0 +1,87 @@
+import pytest
+
+from robot_cleaner import config, workers
+from robot_cleaner.api.clean import (
+    CommandList,
+    calculate_unique_places,
+    validate_request_data,
+)
+from robot_cleaner.engines import DECOMPOSED_ENGINES, ENGINES, get_engine
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    # Sweeps the stripes of the parallel engine in the pool for any size.
+    monkeypatch.setattr(config, "WORKER_POOL_SIZE", 2)
+    monkeypatch.setattr(config, "PARALLEL_MIN_SEGMENTS", 0)
+    yield
+    workers.shutdown()
+
+
+@pytest.mark.parametrize("name", ENGINES)
+def test_calculate_unique_places(name, random_path):
+    engine = get_engine(name)
+
+    data = {"start": {"x": 1, "y": 1}, "commands": []}
+    assert engine(data) == 1
+
+    data = {
+        "start": {"x": 1, "y": 1},
+        "commands": [
+            {"direction": "east", "steps": 0},
+            {"direction": "north", "steps": 0},
+        ],
+    }
+    assert engine(data) == 1
+
+    data = {
+        "start": {"x": -2, "y": 1},
+        "commands": [
+            {"direction": "south", "steps": 1},
+            {"direction": "north", "steps": 2},
+            {"direction": "east", "steps": 1},
+            {"direction": "west", "steps": 2},
+            {"direction": "west", "steps": 2},
+            {"direction": "north", "steps": 1},
+            {"direction": "east", "steps": 2},
+        ],
+    }
+    assert engine(data) == 10
+
+    data = {
+        "start": {"x": -202, "y": -400},
+        "commands": [
+            {"direction": "south", "steps": 100},
+            {"direction": "north", "steps": 50},
+            {"direction": "east", "steps": 7},
+            {"direction": "west", "steps": 14},
+        ],
+    }
+    assert engine(data) == 115
+
+    for seed in range(20):
+        data = random_path(
+            seed,
+            commands=seed * 10,
+            spread=seed % 7 + 1,
+            x=seed,
+            y=-seed,
+        )
+        expected = calculate_unique_places(data)
+        assert engine(data) == expected
+        # Commands of streamed and normalized paths.
+        commands = CommandList.pack(data["commands"])
+        assert engine({**data, "commands": commands}) == expected
+
+
+@pytest.mark.parametrize("name", DECOMPOSED_ENGINES)
+def test_calculate_unique_places_decomposed(name, random_path):
+    engine = get_engine(name, DECOMPOSED_ENGINES)
+
+    data = {"start": {"x": 3, "y": 4}, "commands": []}
+    assert engine(validate_request_data(data)) == 1
+
+    for seed in range(10):
+        data = random_path(seed, commands=300, spread=seed % 7 + 1, x=-seed)
+        expected = calculate_unique_places(data)
+        assert engine(validate_request_data(data)) == expected
@@ -0,0 +1,108 @@
+import time
+
+from robot_cleaner import config, workers
+from robot_cleaner.api.clean import calculate_unique_places
+from robot_cleaner.engines import external
+
+
+def test_calculate_unique_places_spilled_runs(random_path):
+    """
+    The smallest budget spills a sorted run every 1024 segments.
+    """
+    for seed in range(5):
+        data = random_path(seed, commands=5000, spread=seed + 3)
+        assert external.calculate_unique_places(
+            data, memory_budget=1
+        ) == calculate_unique_places(data)
+
+
+def test_external_sorter(tmp_path):
+    sorter = external.ExternalSorter(str(tmp_path), 2, chunk_size=3)
+    records = [(5, 1), (-1, 2), (3, 3), (0, 0), (5, 0), (-7, 9), (2, 2)]
+    for record in records:
+        sorter.add(record)
+
+    assert len(sorter.runs) == 2
+    assert list(sorter.sorted()) == sorted(records)
+
+
+def test_merge_runs():
+    segments = [(0, 0, 1), (1, 1, 5), (1, 3, 7), (1, 7, 8), (1, 10, 11)]
+    assert list(external.merge_runs(iter(segments))) == [
+        (0, 0, 1),
+        (1, 1, 8),
+        (1, 10, 11),
+    ]
+
+
+def test_execute_cleaning_large_path(app, database, monkeypatch):
+    monkeypatch.setattr(config, "MAX_COMMANDS", 2)
+    monkeypatch.setattr(config, "LARGE_PATH_MAX_COMMANDS", 3)
+
+    request_body = {
+        "start": {"x": 10, "y": 22},
+        "commands": [
+            {"direction": "east", "steps": 2},
+            {"direction": "north", "steps": 1},
+            {"direction": "west", "steps": 3},
+        ],
+    }
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path", json=request_body
+    )
+    assert response.status_code == 200
+    assert response.json["result"] == 7
+
+    request_body["commands"].append({"direction": "south", "steps": 1})
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path", json=request_body
+    )
+    assert response.status_code == 400
+
+
+def test_execute_cleaning_large_path_timeout(
+    app,
+    database,
+    monkeypatch,
+    random_path,
+):
+    """
+    Large paths wait for `LARGE_PATH_TASK_TIMEOUT`, not for the timeout of
+    the other paths.
+    """
+    monkeypatch.setattr(config, "MAX_COMMANDS", 50)
+    monkeypatch.setattr(config, "WORKER_POOL_SIZE", 1)
+    monkeypatch.setattr(config, "WORKER_MIN_COST", 1)
+    # Shorter than the start of a worker.
+    monkeypatch.setattr(config, "WORKER_TASK_TIMEOUT", 0.001)
+    client = app.test_client()
+    try:
+        data = random_path(0, commands=100)
+        response = client.post("tibber-developer-test/enter-path", json=data)
+        assert response.status_code == 200
+        assert response.json["engine"] == "external"
+        assert response.json["result"] == calculate_unique_places(data)
+
+        data = random_path(0, commands=50)
+        response = client.post("tibber-developer-test/enter-path", json=data)
+        assert response.status_code == 504
+    finally:
+        workers.shutdown()
+
+
+def test_large_path_limit(random_path):
+    """
+    Paths of `LARGE_PATH_MAX_COMMANDS` commands are computed within
+    `LARGE_PATH_TASK_TIMEOUT`, and jobs are not run twice meanwhile.
+    """
+    assert config.LARGE_PATH_TASK_TIMEOUT < config.JOB_STALE_AFTER
+
+    commands = 100000
+    data = random_path(0, commands=commands, spread=1000)
+    started = time.monotonic()
+    external.calculate_unique_places(data)
+    elapsed = time.monotonic() - started
+
+    # Twice the linear estimate covers the sort and the request parsing.
+    estimate = 2 * elapsed * config.LARGE_PATH_MAX_COMMANDS / commands
+    assert estimate < config.LARGE_PATH_TASK_TIMEOUT
@@ -0,0 +1,85 @@
+from robot_cleaner.api.clean import calculate_unique_places
+from robot_cleaner.engines.incremental import (
+    CoverageIndex,
+    IncrementalCleaner,
+    IntervalSet,
+)
+
+
+def test_interval_set_add():
+    intervals = IntervalSet()
+    assert intervals.add(0, 3) == [(0, 3)]
+    assert intervals.add(6, 8) == [(6, 8)]
+    # covered cells are not reported again
+    assert intervals.add(2, 7) == [(4, 5)]
+    assert intervals.add(-2, 10) == [(-2, -1), (9, 10)]
+    assert list(intervals.intervals.items()) == [(-2, 10)]
+
+    assert 10 in intervals
+    assert 11 not in intervals
+
+
+def test_coverage_index_count():
+    index = CoverageIndex()
+    assert index.count(-5, 5, 0) == 0
+
+    for fixed, low, high in [(0, 0, 3), (1, 2, 2), (-3, -1, 1), (7, 0, 0)]:
+        index.add(fixed, low, high)
+    assert index.count(-5, 5, 0) == 2
+    assert index.count(0, 1, 2) == 2
+    assert index.count(-3, -3, -1) == 1
+    assert index.count(-2, 6, -1) == 0
+    # levels added by wide ranges are filled with the previous segments
+    assert index.count(-100, 100, 0) == 3
+    index.add(-64, -10, 10)
+    assert index.count(-64, 64, 0) == 4
+    assert index.count(-63, 64, 0) == 3
+
+
+def test_incremental_cleaner_running_count():
+    cleaner = IncrementalCleaner(0, 0)
+    assert cleaner.unique_places == 1
+
+    assert cleaner.move("east", 2) == 3
+    assert cleaner.move("north", 2) == 5
+    assert cleaner.move("west", 3) == 8
+    assert cleaner.move("south", 3) == 11
+    assert cleaner.move("east", 4) == 15
+    assert cleaner.move("north", 2) == 17
+    # crossing the cleaned columns x=2 and x=-1
+    assert cleaner.move("west", 4) == 19
+    # back over cleaned places only
+    assert cleaner.move("east", 4) == 19
+    assert cleaner.commands == 8
+
+
+def test_incremental_cleaner_matches_python_engine(random_path):
+    for seed in range(30):
+        data = random_path(seed, commands=seed * 5, spread=seed % 7 + 1)
+        cleaner = IncrementalCleaner(0, 0)
+        for count, command in enumerate(data["commands"], 1):
+            cleaner.add(command)
+            if count % 10 == 0:
+                prefix = {**data, "commands": data["commands"][:count]}
+                assert cleaner.unique_places == calculate_unique_places(prefix)
+        assert cleaner.unique_places == calculate_unique_places(data)
+
+
+def test_incremental_cleaner_grid():
+    """
+    Rows crossing hundreds of cleaned columns.
+    """
+    size = 300
+    commands = []
+    for i in range(size):
+        vertical = "north" if i % 2 == 0 else "south"
+        commands.append({"direction": vertical, "steps": size})
+        commands.append({"direction": "east", "steps": 1})
+    for i in range(size):
+        horizontal = "west" if i % 2 == 0 else "east"
+        commands.append({"direction": horizontal, "steps": size})
+        commands.append({"direction": "south", "steps": 1})
+    data = {"start": {"x": 0, "y": 0}, "commands": commands}
+
+    cleaner = IncrementalCleaner.from_path(data)
+    assert cleaner.unique_places == calculate_unique_places(data)
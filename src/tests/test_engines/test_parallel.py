@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+
+from robot_cleaner import cache, config, workers
+from robot_cleaner.api import clean
+from robot_cleaner.engines import columnar, parallel
+
+
+class StripeCount(int):
+    """
+    Intersections of a stripe, with the process which swept it.
+    """
+
+
+def fenwick_sweep(*args) -> StripeCount:
+    count = StripeCount(columnar.fenwick_sweep(*args))
+    count.pid = os.getpid()
+    return count
+
+
+def test_count_intersections_stripes(random_path):
+    """
+    Intersections on stripe boundaries are counted exactly once.
+    """
+    data = random_path(7, commands=500, spread=4)
+    horizontal, vertical = columnar.divide_path(data)
+    columnar.merge_overlapping(horizontal)
+    columnar.merge_overlapping(vertical)
+    expected = columnar.count_intersections(vertical, horizontal)
+
+    for stripes in (2, 3, 8, 50):
+        boundaries = parallel.stripe_boundaries(vertical, horizontal, stripes)
+        assert (
+            sum(
+                columnar.count_intersections(*stripe)
+                for stripe in parallel.split(vertical, horizontal, boundaries)
+            )
+            == expected
+        )
+
+
+def test_split():
+    vertical = columnar.SegmentStore()
+    vertical.append(0, 0, 2)
+    vertical.append(5, 0, 2)
+    horizontal = columnar.SegmentStore()
+    horizontal.append(1, -1, 7)
+
+    stripes = parallel.split(vertical, horizontal, [3, 5])
+    assert [list(v) for v, _ in stripes] == [[(0, 0, 2)], [], [(5, 0, 2)]]
+    assert [list(h) for _, h in stripes] == [
+        [(1, -1, 2)],
+        [(1, 3, 4)],
+        [(1, 5, 7)],
+    ]
+
+
+def test_count_intersections_in_worker(monkeypatch, random_path):
+    """
+    Pool workers sweep the stripes inline instead of starting a pool.
+    """
+    monkeypatch.setattr(config, "PARALLEL_MIN_SEGMENTS", 0)
+    monkeypatch.setattr(workers, "in_worker", lambda: True)
+    monkeypatch.setattr(workers, "submit_many", None)
+
+    data = random_path(3, commands=300, spread=4)
+    horizontal, vertical = columnar.divide_path(data)
+    columnar.merge_overlapping(horizontal)
+    columnar.merge_overlapping(vertical)
+    assert parallel.count_intersections(
+        vertical, horizontal, stripes=4
+    ) == columnar.count_intersections(vertical, horizontal)
+
+
+def test_compute_path_stripes_in_pool(monkeypatch, random_path):
+    """
+    Test expensive paths are not offloaded to the pool as a whole, so that
+    their stripes are swept in the pool workers.
+    """
+    monkeypatch.setattr(config, "WORKER_POOL_SIZE", 2)
+    monkeypatch.setattr(config, "WORKER_MIN_COST", 1)
+    monkeypatch.setattr(config, "PARALLEL_MIN_SEGMENTS", 0)
+    monkeypatch.setattr(parallel, "fenwick_sweep", fenwick_sweep)
+    swept = []
+    submit = workers.submit_many
+
+    def submit_many(calculate, args_list, timeout=None):
+        counts = submit(calculate, args_list, timeout)
+        swept.extend(counts)
+        return counts
+
+    monkeypatch.setattr(workers, "submit_many", submit_many)
+    cache.results.clear()
+    data = random_path(5, commands=400, spread=6)
+    expected = clean.calculate_unique_places(data)
+    try:
+        for decomposition in (None, clean.validate_request_data(data)):
+            swept.clear()
+            computed = clean.compute_path(data, "parallel", decomposition)
+            assert computed == ("parallel", expected)
+            assert len(swept) == 2
+            assert all(count.pid != os.getpid() for count in swept)
+            cache.results.clear()
+    finally:
+        workers.shutdown()
+
+
+def test_stripes_without_pool():
+    """
+    Test striping without a process pool is rejected on startup.
+    """
+    env = {**os.environ, "PARALLEL_STRIPES": "4", "WORKER_POOL_SIZE": "0"}
+    process = subprocess.run(
+        [sys.executable, "-c", "import robot_cleaner.config"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert process.returncode != 0
+    assert "PARALLEL_STRIPES requires a WORKER_POOL_SIZE" in process.stderr
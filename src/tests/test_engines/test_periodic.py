@@ -0,0 +1,166 @@
+import random
+
+from array import array
+
+from robot_cleaner.api.clean import (
+    MOVE_MAP,
+    CommandList,
+    calculate_unique_places,
+    validate_request_data,
+)
+from robot_cleaner.engines import periodic, vectorized
+
+
+def periodic_path(seed, block=5, repeats=50, head=0, tail=0, spread=5):
+    rng = random.Random(seed)
+
+    def commands(count):
+        return [
+            {
+                "direction": rng.choice(tuple(MOVE_MAP)),
+                "steps": rng.randint(1, spread),
+            }
+            for _ in range(count)
+        ]
+
+    loop = commands(block)
+    return {
+        "start": {"x": rng.randint(-100, 100), "y": rng.randint(-100, 100)},
+        "commands": commands(head) + loop * repeats + loop[:tail],
+    }
+
+
+def test_calculate_unique_places_loops():
+    # closed loop
+    square = [
+        {"direction": "east", "steps": 2},
+        {"direction": "north", "steps": 2},
+        {"direction": "west", "steps": 2},
+        {"direction": "south", "steps": 2},
+    ]
+    data = {"start": {"x": 0, "y": 0}, "commands": square * 100}
+    assert periodic.calculate_unique_places(data) == 8
+
+    # staircase
+    stairs = [
+        {"direction": "east", "steps": 1},
+        {"direction": "north", "steps": 1},
+    ]
+    data = {"start": {"x": 0, "y": 0}, "commands": stairs * 100}
+    assert periodic.calculate_unique_places(data) == 201
+
+
+def test_calculate_unique_places_matches_python_engine():
+    for seed in range(100):
+        data = periodic_path(
+            seed,
+            block=seed % 6 + 1,
+            repeats=seed % 40 + 2,
+            head=seed % 3,
+            tail=seed % 5,
+            spread=seed % 4 + 1,
+        )
+        expected = calculate_unique_places(data)
+        assert periodic.calculate_unique_places(data) == expected
+
+
+def test_calculate_unique_places_extrapolates():
+    calls = []
+
+    def inner(data):
+        calls.append(len(data["commands"]))
+        return calculate_unique_places(data)
+
+    data = periodic_path(0, block=6, repeats=1000)
+    assert periodic.calculate_unique_places(
+        data, inner=inner
+    ) == calculate_unique_places(data)
+    assert len(calls) == 3
+    assert max(calls) < len(data["commands"]) // 10
+
+
+def test_calculate_unique_places_decomposed(monkeypatch):
+    """
+    Test validated paths are extrapolated from their packed commands.
+    """
+    for seed in range(20):
+        data = periodic_path(
+            seed,
+            block=seed % 6 + 1,
+            repeats=seed * 10 + 2,
+            head=seed % 3,
+            tail=seed % 5,
+            spread=seed % 4 + 1,
+        )
+        expected = calculate_unique_places(data)
+        decomposition = validate_request_data(data)
+        result = periodic.calculate_unique_places_decomposed(decomposition)
+        assert result == expected
+
+    monkeypatch.setattr(vectorized, "calculate_unique_places_decomposed", None)
+    data = periodic_path(0, block=6, repeats=1000)
+    decomposition = validate_request_data(data)
+    assert periodic.calculate_unique_places_decomposed(
+        decomposition
+    ) == calculate_unique_places(data)
+
+
+def test_calculate_unique_places_few_repeats():
+    """
+    Test paths barely longer than the copies needed to extrapolate them are
+    computed once.
+    """
+    calls = []
+
+    def inner(data):
+        calls.append(len(data["commands"]))
+        return calculate_unique_places(data)
+
+    data = periodic_path(3, block=4, repeats=1)
+    block = data["commands"]
+    first = periodic.repeats_needed([], block)
+    repeats = (first + 2) * 2
+    data["commands"] = block * repeats
+    assert repeats >= first + periodic.MIN_REPEATS
+
+    expected = calculate_unique_places(data)
+    assert periodic.calculate_unique_places(data, inner=inner) == expected
+    assert calls == [len(data["commands"])]
+
+
+def test_find_period():
+    east = {"direction": "east", "steps": 1}
+    north = {"direction": "north", "steps": 1}
+    west = {"direction": "west", "steps": 3}
+
+    assert periodic.find_period([]) is None
+    assert periodic.find_period([east, north, west]) is None
+    assert periodic.find_period([east, east, east]) == periodic.Period(0, 1, 3)
+    # tail
+    commands = [east, north, east, north, east]
+    assert periodic.find_period(commands) == periodic.Period(0, 2, 2)
+    # head
+    assert periodic.find_period(
+        [west, east, north, east, north, east, north]
+    ) == periodic.Period(1, 2, 3)
+    # packed commands
+    commands = CommandList.pack([west, east, north] * 3)
+    assert periodic.find_period(commands) == periodic.Period(0, 3, 3)
+    assert periodic.find_period(commands, max_length=2) is None
+
+
+def test_smallest_period():
+    def period(keys, max_length=None):
+        return periodic.smallest_period(array("q", keys), max_length)
+
+    assert period([]) == 0
+    assert period([1]) == 1
+    assert period([1, 2, 3, 1, 2, 3, 1, 2]) == 3
+    assert period([1, 1, 2, 1, 1, 1, 2]) == 7
+    assert period([5] * 20) == 1
+    # The first keys repeat before the period.
+    assert period([1, 2, 1, 2, 3] * 4) == 5
+    # Equal bytes across two keys are not a period.
+    assert period([256, 1, 256, 1]) == 2
+    assert period([1, 256, 0, 1, 256]) == 5
+    assert period([1, 2, 3, 1, 2, 3, 1], max_length=2) == 7
@@ -0,0 +1,44 @@
+import numpy as np
+
+from robot_cleaner.engines import vectorized
+
+
+def test_merge_overlapping():
+    fixed = np.array([1, 1, 1, 0, 2])
+    low = np.array([6, 1, 3, 0, 5])
+    high = np.array([8, 5, 7, 1, 5])
+    fixed, low, high = vectorized.merge_overlapping(fixed, low, high)
+    assert fixed.tolist() == [0, 1, 2]
+    assert low.tolist() == [0, 1, 5]
+    assert high.tolist() == [1, 8, 5]
+
+
+def test_count_intersections():
+    vertical = (np.array([1, 3, 4]), np.array([0, 0, 1]), np.array([3, 3, 2]))
+    horizontal = (
+        np.array([1, 2, 3]),
+        np.array([0, 0, 3]),
+        np.array([4, 4, 4]),
+    )
+    assert vectorized.count_intersections(vertical, horizontal) == 7
+
+
+def test_execute_cleaning_numpy_engine(app, database):
+    request_body = {
+        "start": {"x": 10, "y": 22},
+        "commands": [
+            {"direction": "east", "steps": 2},
+            {"direction": "north", "steps": 1},
+            {"direction": "west", "steps": 3},
+        ],
+    }
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path?engine=numpy", json=request_body
+    )
+    assert response.status_code == 200
+    assert response.json["result"] == 7
+
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path?engine=mess", json=request_body
+    )
+    assert response.status_code == 400
@@ -0,0 +1,53 @@
+import importlib.util
+import pathlib
+
+
+SRC = pathlib.Path(__file__).parents[1]
+
+
+def load_benchmark():
+    # The benchmarks are scripts, not a package.
+    path = SRC / "benchmarks" / "importtime.py"
+    spec = importlib.util.spec_from_file_location("importtime", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_lazy_imports(monkeypatch):
+    """
+    Test the worker pool, the recorder and the job queue are not imported
+    with the clean endpoints, so the applications start without them.
+    """
+    importtime = load_benchmark()
+    monkeypatch.chdir(SRC)
+
+    for module in (
+        "robot_cleaner.api.clean",
+        "robot_cleaner.api.clean_async",
+        "robot_cleaner.app",
+    ):
+        imported = importtime.import_times(module)
+        assert module in imported
+        for lazy in (
+            "robot_cleaner.workers",
+            "robot_cleaner.recorder",
+            "robot_cleaner.jobs",
+            "multiprocessing",
+            "concurrent.futures.process",
+        ):
+            assert lazy not in imported
+
+
+def test_packing_imports(monkeypatch):
+    """
+    Test the binary path format is imported without the server dependencies,
+    so clients can use it.
+    """
+    importtime = load_benchmark()
+    monkeypatch.chdir(SRC)
+
+    imported = importtime.import_times("robot_cleaner.packing")
+    assert "robot_cleaner.packing" in imported
+    for dependency in ("flask", "sqlalchemy", "numpy", "robot_cleaner.api"):
+        assert dependency not in imported
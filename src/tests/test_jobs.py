@@ -0,0 +1,66 @@
+import pytest
+import queue
+import threading
+
+from robot_cleaner import jobs, metrics
+
+
+def test_job_queue():
+    done = []
+    job_queue = jobs.JobQueue("test_jobs", done.append, maxsize=10, threads=2)
+    assert job_queue.stats()["threads"] == 0
+
+    for job_id in range(5):
+        job_queue.submit(job_id)
+    job_queue.join()
+
+    assert sorted(done) == [0, 1, 2, 3, 4]
+    assert metrics.collect()["test_jobs"] == {
+        "depth": 0,
+        "maxsize": 10,
+        "threads": 2,
+        "submitted": 5,
+        "rejected": 0,
+        "completed": 5,
+        "failed": 0,
+    }
+
+
+def test_job_queue_full():
+    release = threading.Event()
+    job_queue = jobs.JobQueue(
+        "test_jobs", lambda job_id: release.wait(), maxsize=1, threads=0
+    )
+    job_queue.submit(1)
+    with pytest.raises(queue.Full):
+        job_queue.submit(2)
+
+    stats = job_queue.stats()
+    assert stats["depth"] == 1
+    assert stats["rejected"] == 1
+
+
+def test_job_queue_failed_job():
+    def handler(job_id):
+        raise ValueError(job_id)
+
+    job_queue = jobs.JobQueue("test_jobs", handler, maxsize=10, threads=1)
+    job_queue.submit(1)
+    job_queue.join()
+
+    assert job_queue.stats()["failed"] == 1
+
+
+def test_job_queue_recover():
+    done = []
+    job_queue = jobs.JobQueue(
+        "test_jobs",
+        done.append,
+        maxsize=1,
+        threads=1,
+        recover=lambda: [3, 1, 2],
+    )
+    job_queue.start()
+    job_queue.join()
+
+    assert done == [3, 1, 2]
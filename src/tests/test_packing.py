@@ -0,0 +1,47 @@
+import pytest
+
+from robot_cleaner import packing
+from robot_cleaner.api import clean
+
+
+def test_round_trip(random_path):
+    """
+    Test binary paths decode to the json path they were encoded from.
+    """
+    for seed in range(20):
+        data = random_path(seed, commands=seed * 10, x=seed - 10, y=-seed)
+        body = packing.encode_path(data)
+
+        assert len(body) == packing.HEADER.size + 5 * len(data["commands"])
+        assert packing.decode_path(body) == data
+
+
+def test_directions():
+    """
+    Test direction codes follow the order of the API directions.
+    """
+    assert packing.DIRECTIONS == clean.DIRECTIONS
+
+
+def test_decode_errors():
+    """
+    Test invalid binary paths are rejected.
+    """
+    data = {
+        "start": {"x": 0, "y": 0},
+        "commands": [
+            {"direction": "north", "steps": 1},
+            {"direction": "east", "steps": 2},
+        ],
+    }
+    body = packing.encode_path(data)
+
+    for invalid, message in (
+        (body[:10], "Invalid path: 10 bytes header."),
+        (b"XXXX" + body[4:], "Invalid path: unknown format b'XXXX'."),
+        (body[:-1], "Invalid path: 2 commands take 26 bytes, got 25."),
+        (body[:-5] + b"\x04" + body[-4:], "Direction code of command 1"),
+    ):
+        with pytest.raises(ValueError) as exc_info:
+            packing.decode_path(invalid)
+        assert str(exc_info.value).startswith(message)
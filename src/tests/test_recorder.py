@@ -0,0 +1,68 @@
+import pytest
+import threading
+
+from mock import patch
+from werkzeug.exceptions import ServiceUnavailable
+
+from robot_cleaner import recorder
+from robot_cleaner.db import Session
+from robot_cleaner.models import Execution
+
+
+def test_recorder(database):
+    execution_recorder = recorder.ExecutionRecorder(
+        maxsize=10, batch_size=3, max_age=0.05, put_timeout=0.1, id_block=2
+    )
+    records = [
+        execution_recorder.record(commands=i, result=i + 1, duration=0.1)
+        for i in range(5)
+    ]
+
+    # ids follow the existing execution
+    assert [record.id for record in records] == [2, 3, 4, 5, 6]
+    execution_recorder.close()
+    assert execution_recorder.get(2) is None
+
+    with Session() as session:
+        executions = session.query(Execution).order_by(Execution.id).all()
+        assert [execution.result for execution in executions] == [
+            4,
+            1,
+            2,
+            3,
+            4,
+            5,
+        ]
+        assert executions[1].timestamp is not None
+        assert executions[1].status == "done"
+
+    stats = execution_recorder.stats()
+    assert stats["depth"] == 0
+    assert stats["recorded"] == 5
+    assert stats["flushed"] == 5
+    assert stats["flushes"] >= 2
+
+
+def test_recorder_backpressure(database):
+    execution_recorder = recorder.ExecutionRecorder(
+        maxsize=1, batch_size=1, max_age=0, put_timeout=0.5, id_block=10
+    )
+    release = threading.Event()
+
+    def insert_records(rows):
+        release.wait()
+
+    with patch("robot_cleaner.recorder.insert_records", insert_records):
+        # one being written, one queued
+        first = execution_recorder.record(commands=1, result=2, duration=0)
+        execution_recorder.record(commands=1, result=2, duration=0)
+        with pytest.raises(ServiceUnavailable):
+            for _ in range(2):
+                execution_recorder.record(commands=1, result=2, duration=0)
+
+        assert execution_recorder.get(first.id) == first
+        assert execution_recorder.stats()["rejected"] == 1
+        release.set()
+        execution_recorder.close()
+
+    assert execution_recorder.stats()["flushed"] == 2
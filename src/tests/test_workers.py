@@ -0,0 +1,141 @@
+import os
+import pytest
+import time
+
+from mock import patch
+from werkzeug.exceptions import GatewayTimeout
+
+from robot_cleaner import config, workers
+from robot_cleaner.api.clean import CommandList, calculate_unique_places
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(config, "WORKER_POOL_SIZE", 1)
+    monkeypatch.setattr(config, "WORKER_MIN_COST", 3)
+    yield
+    workers.shutdown()
+
+
+def test_estimate_cost(monkeypatch):
+    monkeypatch.setattr(config, "WORKER_STEPS_PER_UNIT", 10)
+    data = {
+        "start": {"x": 0, "y": 0},
+        "commands": [
+            {"direction": "east", "steps": 25},
+            {"direction": "north", "steps": 5},
+        ],
+    }
+    assert workers.estimate_cost(data) == 5
+
+    # Packed commands are estimated from their steps array.
+    data["commands"] = CommandList.pack(data["commands"])
+    monkeypatch.setattr(CommandList, "__iter__", None)
+    monkeypatch.setattr(CommandList, "__getitem__", None)
+    assert workers.estimate_cost(data) == 5
+
+
+def test_run_known_cost(pool):
+    data = {"start": {"x": 0, "y": 0}, "commands": []}
+    with patch("robot_cleaner.workers.estimate_cost") as m_estimate_cost:
+        with patch("robot_cleaner.workers.submit") as m_submit:
+            assert workers.run(calculate_unique_places, data, cost=0) == 1
+            m_submit.assert_not_called()
+            workers.run(calculate_unique_places, data, cost=3)
+            m_submit.assert_called_once()
+    m_estimate_cost.assert_not_called()
+
+
+def test_run_inline_below_min_cost(pool):
+    data = {"start": {"x": 0, "y": 0}, "commands": []}
+    with patch("robot_cleaner.workers.submit") as m_submit:
+        assert workers.run(calculate_unique_places, data) == 1
+    m_submit.assert_not_called()
+
+
+def test_run_in_pool(pool, random_path):
+    data = random_path(1, commands=50)
+    with patch("robot_cleaner.workers.submit", wraps=workers.submit) as m:
+        expected = calculate_unique_places(data)
+        assert workers.run(calculate_unique_places, data) == expected
+    m.assert_called_once()
+
+    # computed in another process
+    assert workers.submit(os.getpid) != os.getpid()
+
+
+def test_run_many(pool, random_path):
+    cheap = random_path(1, commands=1)
+    expensive = random_path(2, commands=50)
+    tasks = [
+        (calculate_unique_places, expensive),
+        (calculate_unique_places, cheap),
+        (calculate_unique_places, expensive),
+    ]
+    with patch("robot_cleaner.workers._submit", wraps=workers._submit) as m:
+        assert workers.run_many(tasks) == [
+            calculate_unique_places(data) for _, data in tasks
+        ]
+    assert len(m.call_args.args[0]) == 2
+
+    assert workers.run_many([]) == []
+
+
+def test_submit_timeout(pool, monkeypatch):
+    monkeypatch.setattr(config, "WORKER_TASK_TIMEOUT", 0.1)
+    with pytest.raises(GatewayTimeout):
+        workers.submit(time.sleep, 2)
+
+    # The busy worker was replaced.
+    started = time.monotonic()
+    assert workers.submit(os.getpid)
+    assert time.monotonic() - started < 1
+
+
+def test_shutdown(pool):
+    workers.submit(os.getpid)
+    workers.shutdown()
+    assert workers._pool is None
+
+
+def test_app_shutdown(pool):
+    """
+    Test the servers' exit hook stops the pool processes.
+    """
+    from starlette.testclient import TestClient
+
+    from robot_cleaner import app, asgi
+
+    workers.submit(os.getpid)
+    processes = list(workers.get_pool()._processes.values())
+    app.shutdown()
+    assert workers._pool is None
+    assert not any(process.is_alive() for process in processes)
+
+    with TestClient(asgi.create_app()):
+        workers.submit(os.getpid)
+    assert workers._pool is None
+
+
+def test_in_worker(pool):
+    assert not workers.in_worker()
+    assert workers.submit(workers.in_worker)
+
+
+def test_request_after_timeout(app, database, pool, monkeypatch):
+    monkeypatch.setattr(config, "WORKER_MIN_COST", 1)
+    monkeypatch.setattr(config, "WORKER_TASK_TIMEOUT", 0.5)
+    with pytest.raises(GatewayTimeout):
+        workers.submit(time.sleep, 30)
+    # Long enough for the new worker to start, not for the sleep to end.
+    monkeypatch.setattr(config, "WORKER_TASK_TIMEOUT", 10)
+
+    request_body = {
+        "start": {"x": 0, "y": 0},
+        "commands": [{"direction": "east", "steps": 2}],
+    }
+    response = app.test_client().post(
+        "tibber-developer-test/enter-path?engine=python", json=request_body
+    )
+    assert response.status_code == 200
+    assert response.json["result"] == 3